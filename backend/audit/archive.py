@@ -0,0 +1,247 @@
+"""
+Cold archival of the audit log into compressed, append-only segment files.
+
+Archived rows leave the AuditLog table and land in gzip'd NDJSON segments
+under AUDIT_ARCHIVE_DIR, partitioned by month:
+
+    <AUDIT_ARCHIVE_DIR>/<YYYY-MM>/<segment>.ndjson.gz
+    <AUDIT_ARCHIVE_DIR>/<YYYY-MM>/manifest.json
+
+Rows inside a segment are sorted by (timestamp, log_id). Each month's
+manifest lists its segments with their time range and the rumor_ids they
+contain. Readers skip months outside the queried range by name, and only
+open the segments whose manifest entry can match. Parsed manifests are
+cached per process until the file changes, so an export costs a stat per
+month plus the segments it actually reads. Segments are never rewritten.
+
+A segment is made durable (written, fsynced, renamed, added to the
+manifest, directory entries fsynced) before its rows are deleted from the
+table. If a run dies in between, the next run archives those rows again;
+readers drop the duplicate because equal rows meet side by side in the
+(timestamp, log_id) merge.
+"""
+import fcntl
+import gzip
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AuditLog
+
+SEGMENT_MAX_ROWS = 50000
+DELETE_BATCH_SIZE = 500
+SEGMENT_SUFFIX = '.ndjson.gz'
+MANIFEST_NAME = 'manifest.json'
+
+# manifest path -> (stat key, segment entries)
+_manifest_cache = {}
+_manifest_cache_lock = threading.Lock()
+
+def archive_dir():
+    return Path(settings.AUDIT_ARCHIVE_DIR)
+
+def _partition(timestamp):
+    return timestamp.astimezone(dt_timezone.utc).strftime('%Y-%m')
+
+def _row_to_record(log_id, event_type, rumor_id, user_id, timestamp, calculation_data):
+    return {
+        'log_id': str(log_id),
+        'event_type': event_type,
+        'rumor_id': str(rumor_id) if rumor_id else None,
+        'user_id': str(user_id) if user_id else None,
+        'timestamp': timestamp.isoformat(),
+        'calculation_data': calculation_data,
+    }
+
+def _fsync_dir(directory):
+    # Makes renames and new entries in `directory` durable
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _read_manifest(directory):
+    try:
+        with open(directory / MANIFEST_NAME) as f:
+            return json.load(f)['segments']
+    except FileNotFoundError:
+        return []
+
+def _add_to_manifest(directory, entry):
+    """
+    Appends a segment entry to the partition's manifest (atomically replaced).
+    """
+    with open(directory / '.manifest.lock', 'w') as lock:
+        # Concurrent archive runs must not lose each other's entries
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        segments = _read_manifest(directory) + [entry]
+        tmp = directory / (MANIFEST_NAME + '.tmp')
+        with open(tmp, 'w') as out:
+            json.dump({'segments': segments}, out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, directory / MANIFEST_NAME)
+        _fsync_dir(directory)
+
+def write_segment(partition, records):
+    """
+    Writes one segment (records sorted by (timestamp, log_id)) and adds it to
+    the partition's manifest. Returns the segment path once both are durable.
+    """
+    root = archive_dir()
+    directory = root / partition
+    if not directory.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        _fsync_dir(root)
+    name = f"{records[0]['timestamp'][:19].replace(':', '')}-{uuid.uuid4().hex[:8]}"
+    path = directory / (name + SEGMENT_SUFFIX)
+
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as out:
+            for record in records:
+                out.write((json.dumps(record) + '\n').encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(directory)
+
+    _add_to_manifest(directory, {
+        'segment': path.name,
+        'rows': len(records),
+        'min_timestamp': records[0]['timestamp'],
+        'max_timestamp': records[-1]['timestamp'],
+        'rumor_ids': sorted({record['rumor_id'] for record in records if record['rumor_id']}),
+    })
+    return path
+
+def archivable_logs(older_than_days, include_frozen=True):
+    """
+    AuditLog rows due for archival: older than the retention period, or
+    belonging to a frozen rumor (their history can no longer change).
+    """
+    from rumors.models import Rumor
+
+    condition = Q(timestamp__lt=timezone.now() - timedelta(days=older_than_days))
+    if include_frozen:
+        condition |= Q(rumor_id__in=Rumor.objects.filter(is_frozen=True).values('rumor_id'))
+    return AuditLog.objects.filter(condition)
+
+def archive_audit_logs(older_than_days, include_frozen=True, dry_run=False):
+    """
+    Moves archivable rows into segment files, SEGMENT_MAX_ROWS at a time.
+    Returns (rows archived, segments written).
+    """
+    logs = archivable_logs(older_than_days, include_frozen).order_by('timestamp', 'log_id')
+    if dry_run:
+        return logs.count(), 0
+
+    archived = 0
+    segments = 0
+    after = None
+    while True:
+        batch = logs
+        if after is not None:
+            batch = batch.filter(Q(timestamp__gt=after[0]) | Q(timestamp=after[0], log_id__gt=after[1]))
+        rows = list(batch.values_list(
+            'log_id', 'event_type', 'rumor_id', 'user_id', 'timestamp', 'calculation_data'
+        )[:SEGMENT_MAX_ROWS])
+        if not rows:
+            break
+        after = (rows[-1][4], rows[-1][0])
+
+        # One segment per month partition the batch spans
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or _partition(rows[i][4]) != _partition(rows[start][4]):
+                write_segment(_partition(rows[start][4]), [_row_to_record(*row) for row in rows[start:i]])
+                segments += 1
+                start = i
+
+        log_ids = [row[0] for row in rows]
+        with transaction.atomic():
+            for i in range(0, len(log_ids), DELETE_BATCH_SIZE):
+                AuditLog.objects.filter(log_id__in=log_ids[i:i + DELETE_BATCH_SIZE]).delete()
+        archived += len(rows)
+
+    return archived, segments
+
+def _partition_segments(directory):
+    """
+    The manifest entries of one partition, parsed once per version of the file.
+    """
+    manifest = directory / MANIFEST_NAME
+    try:
+        stat = manifest.stat()
+    except FileNotFoundError:
+        return []
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _manifest_cache_lock:
+        cached = _manifest_cache.get(manifest)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    segments = _read_manifest(directory)
+    with _manifest_cache_lock:
+        _manifest_cache[manifest] = (key, segments)
+    return segments
+
+def _segment_indexes(rumor_id=None, since=None, until=None):
+    """
+    Manifest entries (with a 'path') of the segments that can hold matching rows.
+    """
+    root = archive_dir()
+    if not root.exists():
+        return []
+    first = _partition(since) if since is not None else None
+    last = _partition(until) if until is not None else None
+    indexes = []
+    for directory in sorted(root.iterdir()):
+        # Partition names sort like the months they hold
+        if not directory.is_dir() or (first and directory.name < first) or (last and directory.name > last):
+            continue
+        for entry in _partition_segments(directory):
+            if since is not None and datetime.fromisoformat(entry['max_timestamp']) < since:
+                continue
+            if until is not None and datetime.fromisoformat(entry['min_timestamp']) > until:
+                continue
+            if rumor_id is not None and str(rumor_id) not in entry['rumor_ids']:
+                continue
+            indexes.append(dict(entry, path=directory / entry['segment']))
+    return indexes
+
+def _read_segment(path, rumor_id=None, since=None, until=None, after=None):
+    rumor_id = str(rumor_id) if rumor_id is not None else None
+    with gzip.open(path, 'rt') as lines:
+        for line in lines:
+            record = json.loads(line)
+            timestamp = datetime.fromisoformat(record['timestamp'])
+            if until is not None and timestamp > until:
+                return
+            if since is not None and timestamp < since:
+                continue
+            log_id = uuid.UUID(record['log_id'])
+            if after is not None and (timestamp, log_id) <= after:
+                continue
+            if rumor_id is not None and record['rumor_id'] != rumor_id:
+                continue
+            yield timestamp, log_id, record
+
+def iter_archived_logs(rumor_id=None, since=None, until=None, after=None):
+    """
+    One (timestamp, log_id, record) stream per candidate segment, each sorted.
+    """
+    if after is not None and (since is None or after[0] > since):
+        since = after[0]
+    return [
+        _read_segment(index['path'], rumor_id, since, until, after)
+        for index in _segment_indexes(rumor_id, since, until)
+    ]
@@ -0,0 +1,199 @@
+"""
+Reputation ledger: ReputationEvent rows are the source of truth for a user's
+reputation, and User.profile_trust_score is a balance materialized from them.
+
+Writers (settlement) only append events; they never touch user rows, so any
+number of settlement workers can run at once. The materializer folds each
+user's unapplied events into the balance in ledger order, (created_at,
+event_id), clamping to [0, 100] after every event, and stamps each event with
+applied_at and the balance_after it produced. An OPENING_BALANCE event resets
+the balance to BASE_BALANCE + delta, which is how balances that predate the
+ledger (or manual corrections) enter it.
+
+Given the same events, the fold always yields the same balances, which
+verify_ledger checks against the materialized values.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import ReputationEvent
+
+User = get_user_model()
+
+BASE_BALANCE = Decimal('50.00')
+BALANCE_MIN = Decimal('0.00')
+BALANCE_MAX = Decimal('100.00')
+MATERIALIZE_BATCH_SIZE = 500
+
+# Sent with user_ids after their materialized balances were rewritten (after commit)
+balances_changed = Signal()
+
+def clamp(balance):
+    return min(max(balance, BALANCE_MIN), BALANCE_MAX)
+
+def apply_event(balance, event_type, delta):
+    """
+    Balance after one ledger event.
+    """
+    if event_type == 'OPENING_BALANCE':
+        return clamp(BASE_BALANCE + delta)
+    return clamp(balance + delta)
+
+def fold(balance, events):
+    """
+    Balances after each (event_type, delta) in order, starting from `balance`.
+    """
+    balances = []
+    for event_type, delta in events:
+        balance = apply_event(balance, event_type, delta)
+        balances.append(balance)
+    return balances
+
+def _ordered(events):
+    return events.order_by('created_at', 'event_id')
+
+def _replay_start(user_id, before):
+    """
+    Balance just before ledger position `before` (a (created_at, event_id)
+    pair): the balance_after of the last applied event ahead of it.
+    """
+    created_at, event_id = before
+    previous = _ordered(ReputationEvent.objects.filter(
+        user_id=user_id, applied_at__isnull=False, balance_after__isnull=False
+    ).filter(created_at__lte=created_at)).exclude(
+        created_at=created_at, event_id__gte=event_id
+    ).values_list('balance_after', flat=True)
+    balance = previous.last()
+    return BASE_BALANCE if balance is None else balance
+
+def _materialize_users(user_ids, now):
+    """
+    Folds pending events of a batch of users. Normally that's an append to
+    the current balance; a user whose pending events sort before events that
+    were already applied (a settlement that committed late) is replayed from
+    the last applied event ahead of the earliest pending one.
+    """
+    # Only materializers lock user rows, and only for this short fold
+    users = {
+        user.pk: user
+        for user in User.objects.select_for_update().filter(pk__in=user_ids).order_by('pk')
+    }
+    pending = list(_ordered(ReputationEvent.objects.filter(
+        user_id__in=users.keys(), applied_at__isnull=True
+    )))
+    if not pending:
+        return 0
+
+    by_user = {}
+    for event in pending:
+        by_user.setdefault(event.user_id, []).append(event)
+
+    last_applied = dict(
+        ReputationEvent.objects.filter(user_id__in=by_user.keys(), applied_at__isnull=False)
+        .values('user_id').annotate(last=Max('created_at')).values_list('user_id', 'last')
+    )
+
+    updated_events = []
+    for user_id, events in by_user.items():
+        user = users[user_id]
+        first = events[0]
+        if last_applied.get(user_id) is not None and first.created_at <= last_applied[user_id]:
+            balance = _replay_start(user_id, (first.created_at, first.event_id))
+            events = list(_ordered(ReputationEvent.objects.filter(user_id=user_id)).filter(
+                created_at__gte=first.created_at
+            ).exclude(created_at=first.created_at, event_id__lt=first.event_id))
+        else:
+            balance = user.profile_trust_score
+
+        for event, balance_after in zip(events, fold(balance, [(e.event_type, e.delta) for e in events])):
+            event.balance_after = balance_after
+            event.applied_at = event.applied_at or now
+            updated_events.append(event)
+        user.profile_trust_score = events[-1].balance_after
+
+    ReputationEvent.objects.bulk_update(updated_events, ['balance_after', 'applied_at'], batch_size=MATERIALIZE_BATCH_SIZE)
+    User.objects.bulk_update([users[user_id] for user_id in by_user], ['profile_trust_score'])
+    changed = list(by_user)
+    transaction.on_commit(lambda: balances_changed.send(sender=ReputationEvent, user_ids=changed))
+    return len(pending)
+
+def materialize_balances(user_ids=None, batch_size=MATERIALIZE_BATCH_SIZE):
+    """
+    Applies every pending ledger event (optionally only for some users), one
+    transaction per batch of users. Returns the number of events applied.
+    """
+    users = ReputationEvent.objects.filter(applied_at__isnull=True)
+    if user_ids is not None:
+        users = users.filter(user_id__in=user_ids)
+    pending_users = list(users.values_list('user_id', flat=True).distinct())
+
+    applied = 0
+    now = timezone.now()
+    for i in range(0, len(pending_users), batch_size):
+        with transaction.atomic():
+            applied += _materialize_users(pending_users[i:i + batch_size], now)
+    return applied
+
+def ledger_balance(user_id):
+    """
+    (balance, balance_after per event) from a full fold of the user's ledger.
+    Events before the latest OPENING_BALANCE don't affect the result.
+    """
+    events = ReputationEvent.objects.filter(user_id=user_id)
+    opening = events.filter(event_type='OPENING_BALANCE').aggregate(start=Max('created_at'))['start']
+    if opening is not None:
+        events = events.filter(created_at__gte=opening)
+    rows = list(_ordered(events).values_list('event_id', 'event_type', 'delta'))
+    balances = fold(BASE_BALANCE, [(event_type, delta) for _, event_type, delta in rows])
+    return (balances[-1] if balances else BASE_BALANCE), dict(zip((row[0] for row in rows), balances))
+
+def verify_ledger(user_ids=None, repair=False):
+    """
+    Compares every user's materialized balance (and the stamped balance_after
+    of their events) with a full fold of the ledger. With repair, rewrites
+    drifted values from the fold. Returns a list of (user_id, stored, expected).
+    Users with events still waiting for the materializer are skipped.
+    """
+    users = User.objects.exclude(
+        pk__in=ReputationEvent.objects.filter(applied_at__isnull=True).values('user_id')
+    )
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+
+    drifted = []
+    for user_id, stored in users.values_list('pk', 'profile_trust_score').iterator():
+        expected, balances = ledger_balance(user_id)
+        stamped = dict(ReputationEvent.objects.filter(
+            user_id=user_id, event_id__in=balances.keys()
+        ).values_list('event_id', 'balance_after'))
+        events_drifted = [event_id for event_id, balance in balances.items() if stamped.get(event_id) != balance]
+        if stored == expected and not events_drifted:
+            continue
+        drifted.append((user_id, stored, expected))
+        if repair:
+            with transaction.atomic():
+                now = timezone.now()
+                events = list(ReputationEvent.objects.filter(event_id__in=events_drifted))
+                for event in events:
+                    event.balance_after = balances[event.event_id]
+                    event.applied_at = event.applied_at or now
+                ReputationEvent.objects.bulk_update(events, ['balance_after', 'applied_at'])
+                User.objects.filter(pk=user_id).update(profile_trust_score=expected)
+                transaction.on_commit(
+                    lambda user_id=user_id: balances_changed.send(sender=ReputationEvent, user_ids=[user_id])
+                )
+    return drifted
+
+def pending_summary():
+    """
+    (pending event count, oldest pending created_at) for monitoring materializer lag.
+    """
+    summary = ReputationEvent.objects.filter(applied_at__isnull=True).aggregate(
+        pending=Count('event_id'), oldest=Min('created_at')
+    )
+    return summary['pending'], summary['oldest']
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from audit.archive import archive_audit_logs, archive_dir
+
+class Command(BaseCommand):
+    help = 'Move cold audit log rows (old, or of frozen rumors) into compressed archive segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.AUDIT_RETENTION_DAYS,
+                            help='Archive rows older than this many days')
+        parser.add_argument('--skip-frozen', action='store_true',
+                            help="Don't archive recent rows of frozen rumors")
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        archived, segments = archive_audit_logs(
+            options['older_than_days'],
+            include_frozen=not options['skip_frozen'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{archived} audit rows would be archived')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} audit rows into {segments} segment(s) under {archive_dir()}'
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from audit.ledger import materialize_balances, verify_ledger, pending_summary
+
+class Command(BaseCommand):
+    help = 'Check materialized reputation balances against a full fold of the reputation ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Only verify this user UUID')
+        parser.add_argument('--materialize', action='store_true', help='Apply pending ledger events first')
+        parser.add_argument('--repair', action='store_true', help='Overwrite drifted balances with the ledger values')
+
+    def handle(self, *args, **options):
+        user_ids = [options['user']] if options['user'] else None
+        if options['materialize']:
+            applied = materialize_balances(user_ids)
+            self.stdout.write(f'Applied {applied} pending ledger events')
+
+        pending, oldest = pending_summary()
+        if pending:
+            self.stdout.write(self.style.WARNING(
+                f'{pending} ledger events pending (oldest {oldest}); their users are skipped'
+            ))
+
+        drifted = verify_ledger(user_ids, repair=options['repair'])
+        for user_id, stored, expected in drifted:
+            self.stdout.write(f'{user_id}: stored {stored}, ledger {expected}')
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All balances match the ledger'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drifted)} balances'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{len(drifted)} balances drifted (use --repair to fix)'))
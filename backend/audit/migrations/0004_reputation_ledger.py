@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def open_ledger(apps, schema_editor):
+    """
+    Existing events count as already applied, and every existing user's
+    current balance enters the ledger as an OPENING_BALANCE event.
+    """
+    ReputationEvent = apps.get_model('audit', 'ReputationEvent')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    now = timezone.now()
+
+    ReputationEvent.objects.filter(applied_at__isnull=True).update(applied_at=models.F('created_at'))
+    ReputationEvent.objects.bulk_create([
+        ReputationEvent(
+            user_id=user_id,
+            event_type='OPENING_BALANCE',
+            delta=balance - Decimal('50.00'),
+            applied_at=now,
+            balance_after=balance,
+        )
+        for user_id, balance in User.objects.values_list('pk', 'profile_trust_score').iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_auditlog_export_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reputationevent',
+            name='applied_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reputationevent',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AlterField(
+            model_name='reputationevent',
+            name='event_type',
+            field=models.CharField(choices=[('CORRECT_VOTE', 'Correct Vote'), ('INCORRECT_VOTE', 'Incorrect Vote'), ('HELPFUL_PROOF', 'Helpful Proof'), ('MISLEADING_PROOF', 'Misleading Proof'), ('AUTHOR_BONUS', 'Author Bonus'), ('AUTHOR_PENALTY', 'Author Penalty'), ('OPENING_BALANCE', 'Opening Balance')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='reputationevent',
+            index=models.Index(fields=['user', 'created_at', 'event_id'], name='repevent_user_ledger_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reputationevent',
+            index=models.Index(fields=['applied_at'], name='repevent_applied_idx'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
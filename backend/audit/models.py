@@ -14,6 +14,13 @@ class AuditLog(models.Model):
     calculation_data = models.JSONField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Export keyset order, overall and per rumor
+            models.Index(fields=['timestamp', 'log_id'], name='auditlog_ts_id_idx'),
+            models.Index(fields=['rumor_id', 'timestamp', 'log_id'], name='auditlog_rumor_ts_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.event_type} - {self.timestamp}"
 
@@ -27,7 +34,8 @@ class ReputationEvent(models.Model):
         ('HELPFUL_PROOF', 'Helpful Proof'),
         ('MISLEADING_PROOF', 'Misleading Proof'),
         ('AUTHOR_BONUS', 'Author Bonus'),
-        ('AUTHOR_PENALTY', 'Author Penalty')
+        ('AUTHOR_PENALTY', 'Author Penalty'),
+        ('OPENING_BALANCE', 'Opening Balance'), # Resets the balance to 50 + delta (see audit.ledger)
     ]
     event_type = models.CharField(max_length=30, choices=EVENT_TYPES)
     delta = models.DecimalField(max_digits=5, decimal_places=2)
@@ -36,3 +44,15 @@ class ReputationEvent(models.Model):
     proof_id = models.UUIDField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Ledger materialization (audit.ledger): set once the event is folded into
+    # the user's profile_trust_score, with the balance it produced
+    applied_at = models.DateTimeField(null=True, blank=True)
+    balance_after = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Ledger order per user, and the materializer's pending scan
+            models.Index(fields=['user', 'created_at', 'event_id'], name='repevent_user_ledger_idx'),
+            models.Index(fields=['applied_at'], name='repevent_applied_idx'),
+        ]
@@ -1,3 +1,274 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from django.utils import timezone
+from . import archive
+from .ledger import materialize_balances, verify_ledger
+from .models import AuditLog, ReputationEvent
+from .views import AuditLogExportView
+from .writer import AuditWriter
 
-# Create your tests here.
+User = get_user_model()
+
+class ReputationLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ledger')
+
+    def append(self, *deltas):
+        return ReputationEvent.objects.bulk_create([
+            ReputationEvent(user=self.user, event_type='INCORRECT_VOTE' if delta.startswith('-') else 'CORRECT_VOTE', delta=Decimal(delta))
+            for delta in deltas
+        ])
+
+    def balance(self):
+        return User.objects.get(pk=self.user.pk).profile_trust_score
+
+    def test_events_fold_in_order_with_clamping(self):
+        self.append('30.00', '30.00', '-10.00')
+        self.assertEqual(materialize_balances(), 3)
+        # 50 + 30 = 80, + 30 clamps to 100, - 10 = 90
+        self.assertEqual(self.balance(), Decimal('90.00'))
+        self.assertEqual(
+            list(ReputationEvent.objects.order_by('created_at', 'event_id').values_list('balance_after', flat=True)),
+            [Decimal('80.00'), Decimal('100.00'), Decimal('90.00')]
+        )
+        self.assertEqual(materialize_balances(), 0)
+        self.assertEqual(verify_ledger(), [])
+
+    def test_late_event_is_replayed_in_ledger_order(self):
+        self.append('30.00', '30.00')
+        materialize_balances()
+        self.assertEqual(self.balance(), Decimal('100.00'))
+
+        # A settlement that committed after the materializer ran, with an earlier event time
+        late, = self.append('-40.00')
+        ReputationEvent.objects.filter(pk=late.pk).update(created_at=timezone.now() - timedelta(days=1))
+        materialize_balances()
+
+        # -40 first: 50 - 40 = 10, + 30 = 40, + 30 = 70
+        self.assertEqual(self.balance(), Decimal('70.00'))
+        self.assertEqual(verify_ledger(), [])
+
+    def test_verify_repairs_drifted_balance(self):
+        self.append('5.00')
+        materialize_balances()
+        User.objects.filter(pk=self.user.pk).update(profile_trust_score=Decimal('12.00'))
+
+        self.assertEqual(verify_ledger(), [(self.user.pk, Decimal('12.00'), Decimal('55.00'))])
+        verify_ledger(repair=True)
+        self.assertEqual(self.balance(), Decimal('55.00'))
+        self.assertEqual(verify_ledger(), [])
+
+@override_settings(AUDIT_BUFFER_SIZE=3, AUDIT_FLUSH_INTERVAL_SECONDS=60)
+class AuditWriterTests(TestCase):
+    def setUp(self):
+        self.writer = AuditWriter()
+        self.rumors = [uuid.uuid4() for _ in range(3)]
+        # Timer flushes are tested on their own
+        self.timer_patcher = mock.patch.object(AuditWriter, '_arm_timer')
+        self.timer_patcher.start()
+        self.addCleanup(self.timer_patcher.stop)
+
+    def record(self, rumor_id, previous, stored):
+        self.writer.record_trust_score(
+            rumor_id, previous_score=Decimal(previous), stored_score=Decimal(stored),
+            V=Decimal('0.6'), P=Decimal('0.5'), M=Decimal('0.5'), final_score=Decimal(stored),
+            vote_count=4, mature_proof_count=0,
+        )
+
+    def logged(self):
+        return {
+            uuid.UUID(str(row['rumor_id'])): row['calculation_data']
+            for row in AuditLog.objects.values('rumor_id', 'calculation_data')
+        }
+
+    def test_buffers_skips_unchanged_and_compacts(self):
+        first, _, _ = self.rumors
+        self.record(first, '0.50', '0.50')
+        self.record(first, '0.50', '0.55')
+        self.record(first, '0.55', '0.60')
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(self.writer.flush(), 1)
+
+        data = self.logged()[first]
+        self.assertEqual((data['previous_score'], data['final_score'], data['recomputes']), (0.5, 0.6, 2))
+        self.assertEqual(self.writer.stats, {'recorded': 3, 'unchanged': 1, 'compacted': 1, 'written': 1})
+        self.assertEqual(self.writer.flush(), 0)
+
+    def test_flushes_when_full_or_old(self):
+        for rumor_id in self.rumors[:2]:
+            self.record(rumor_id, '0.50', '0.60')
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.record(self.rumors[2], '0.50', '0.60')
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+        # One entry, but the oldest has waited a full interval
+        self.record(self.rumors[0], '0.60', '0.70')
+        with mock.patch('audit.writer.time.monotonic', return_value=time.monotonic() + 61):
+            self.record(self.rumors[1], '0.60', '0.70')
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+    def test_failed_flush_keeps_entries(self):
+        first, second, _ = self.rumors
+        self.record(first, '0.50', '0.60')
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                self.writer.flush()
+        # A newer entry for the same rumor, recorded after the failure, wins
+        self.record(first, '0.60', '0.70')
+        self.record(second, '0.50', '0.40')
+        self.assertEqual(self.writer.flush(), 2)
+        logged = self.logged()
+        self.assertEqual(logged[first]['final_score'], 0.7)
+        self.assertEqual(logged[second]['final_score'], 0.4)
+
+    @override_settings(AUDIT_FLUSH_INTERVAL_SECONDS=0.05)
+    def test_idle_buffer_is_flushed_by_the_timer(self):
+        self.timer_patcher.stop()
+        with mock.patch.object(self.writer, 'flush') as flush:
+            # Nothing else is recorded, so only the timer can flush this entry
+            self.record(self.rumors[0], '0.50', '0.60')
+            self.writer._timer.join(5)
+        flush.assert_called_once_with()
+
+class AuditLogFixtureMixin:
+    """
+    Audit rows at fixed timestamps, and the export endpoint as a client sees it.
+    """
+    def setUp(self):
+        archive = tempfile.TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+        settings_override = override_settings(AUDIT_ARCHIVE_DIR=archive.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.factory = APIRequestFactory()
+        self.rumor_a, self.rumor_b = uuid.uuid4(), uuid.uuid4()
+
+    def make_logs(self, start, count, step=timedelta(hours=12)):
+        logs = []
+        for i in range(count):
+            log = AuditLog.objects.create(
+                event_type='TRUST_SCORE_CALCULATED', rumor_id=self.rumor_a if i % 3 else self.rumor_b,
+                calculation_data={'final_score': i / 100},
+            )
+            AuditLog.objects.filter(pk=log.pk).update(timestamp=start + step * i)
+            logs.append(log.pk)
+        return logs
+
+    def export(self, query=''):
+        response = AuditLogExportView.as_view()(self.factory.get(f'/logs/export/{query}'))
+        if response.status_code != 200:
+            response.render()
+            return response, None
+        return response, b''.join(response.streaming_content).decode()
+
+    def rows(self, query=''):
+        _, body = self.export(query)
+        return [json.loads(line) for line in body.splitlines()]
+
+class AuditLogExportTests(AuditLogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        self.log_ids = self.make_logs(self.start, 6)
+
+    def test_ndjson_rows_in_time_order(self):
+        response, _ = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self.rows()
+        self.assertEqual([row['log_id'] for row in rows], [str(log_id) for log_id in self.log_ids])
+        self.assertEqual(rows[0]['timestamp'], self.start.isoformat())
+        self.assertEqual(rows[5]['calculation_data'], {'final_score': 0.05})
+
+    def test_csv_output(self):
+        response, body = self.export('?output=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        header, *lines = list(csv.reader(body.splitlines()))
+        self.assertEqual(header, ['log_id', 'event_type', 'rumor_id', 'user_id', 'timestamp', 'calculation_data', 'cursor'])
+        self.assertEqual([line[0] for line in lines], [str(log_id) for log_id in self.log_ids])
+        self.assertEqual(lines[1][3], '')
+        self.assertEqual(json.loads(lines[1][5]), {'final_score': 0.01})
+
+    def test_cursor_resumes_after_the_last_row(self):
+        rows = self.rows()
+        resumed = self.rows(f'?cursor={rows[2]["cursor"]}')
+        self.assertEqual(resumed, rows[3:])
+        self.assertEqual(self.rows(f'?cursor={rows[-1]["cursor"]}'), [])
+
+    def test_filters(self):
+        self.assertEqual(len(self.rows(f'?rumor_id={self.rumor_b}')), 2)
+        since = (self.start + timedelta(hours=12)).isoformat().replace('+00:00', 'Z')
+        until = (self.start + timedelta(hours=36)).isoformat().replace('+00:00', 'Z')
+        rows = self.rows(f'?since={since}&until={until}')
+        self.assertEqual([row['log_id'] for row in rows], [str(log_id) for log_id in self.log_ids[1:4]])
+        for query in ('?output=xml', '?rumor_id=nope', '?since=yesterday', '?cursor=bm9wZQ=='):
+            self.assertEqual(self.export(query)[0].status_code, 400)
+
+class AuditArchiveTests(AuditLogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Cold rows spanning two month partitions, then a few recent (hot) ones
+        self.cold = self.make_logs(datetime(2026, 1, 28, tzinfo=dt_timezone.utc), 12)
+        self.hot = self.make_logs(timezone.now() - timedelta(days=1), 3, step=timedelta(hours=1))
+        self.before = self.rows()
+
+    def test_archive_and_export_round_trip(self):
+        self.assertEqual(archive.archive_audit_logs(30), (12, 2))
+        self.assertEqual(set(AuditLog.objects.values_list('log_id', flat=True)), set(self.hot))
+        self.assertEqual(sorted(path.name for path in archive.archive_dir().iterdir()), ['2026-01', '2026-02'])
+
+        self.assertEqual(self.rows(), self.before)
+        self.assertEqual(
+            self.rows(f'?rumor_id={self.rumor_b}'),
+            [row for row in self.before if row['rumor_id'] == str(self.rumor_b)]
+        )
+        # A second run finds nothing left to archive
+        self.assertEqual(archive.archive_audit_logs(30), (0, 0))
+
+    def test_rows_in_both_stores_are_exported_once(self):
+        # The run dies after writing its segments, before deleting the rows
+        with mock.patch.object(QuerySet, 'delete', side_effect=DatabaseError('killed')):
+            with self.assertRaises(DatabaseError):
+                archive.archive_audit_logs(30)
+        self.assertEqual(AuditLog.objects.count(), 15)
+        self.assertEqual(self.rows(), self.before)
+
+        # The next run archives the same rows into new segments
+        self.assertEqual(archive.archive_audit_logs(30), (12, 2))
+        self.assertEqual(len(archive._segment_indexes()), 4)
+        self.assertEqual(self.rows(), self.before)
+
+    def test_cursor_resumes_across_stores(self):
+        archive.archive_audit_logs(30)
+        rows = self.rows()
+        # Inside one segment, across the month boundary, and from the archive into the table
+        for k in (0, 4, 11, 13):
+            self.assertEqual(self.rows(f'?cursor={rows[k]["cursor"]}'), rows[k + 1:])
+
+    def test_manifests_are_read_once_per_change(self):
+        archive.archive_audit_logs(30)
+        archive._segment_indexes()
+        with mock.patch.object(archive.json, 'load', wraps=json.load) as load:
+            archive._segment_indexes()
+            load.assert_not_called()
+
+            # Months outside the range aren't even looked at
+            february = archive._segment_indexes(since=datetime(2026, 2, 1, tzinfo=dt_timezone.utc))
+            self.assertEqual([index['path'].parent.name for index in february], ['2026-02'])
+
+            self.make_logs(datetime(2026, 2, 10, tzinfo=dt_timezone.utc), 2)
+            archive.archive_audit_logs(30)
+            load.reset_mock()
+            # Only the changed February manifest is parsed again
+            self.assertEqual(len(archive._segment_indexes()), 3)
+            self.assertEqual(load.call_count, 1)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReputationEventViewSet
+from .views import ReputationEventViewSet, AuditLogExportView
 
 router = DefaultRouter()
 router.register(r'reputation', ReputationEventViewSet, basename='reputation')
 
 urlpatterns = [
+    path('logs/export/', AuditLogExportView.as_view(), name='audit-log-export'),
     path('', include(router.urls)),
 ]
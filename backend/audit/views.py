@@ -1,11 +1,57 @@
-from rest_framework import viewsets, permissions
+import uuid
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import ReputationEvent
 from .serializers import ReputationEventSerializer
+from rumors.pagination import LedgerPagination
+from .export import iter_audit_logs, decode_cursor, ndjson_lines, csv_lines
 
 class ReputationEventViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ReputationEventSerializer
+    pagination_class = LedgerPagination
 
     def get_queryset(self):
         # Return only events for the current user
         return ReputationEvent.objects.filter(user=self.request.user).order_by('-created_at')
+
+class AuditLogExportView(APIView):
+    """
+    Public, streamed export of the audit log (NDJSON by default, or ?output=csv).
+    Filters: rumor_id, since, until (ISO timestamps). Resume with ?cursor=<last row's cursor>.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        params = request.query_params
+        output = params.get('output', 'ndjson')
+        if output not in ('ndjson', 'csv'):
+            return Response({'error': 'output must be ndjson or csv'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {}
+        try:
+            if params.get('rumor_id'):
+                filters['rumor_id'] = uuid.UUID(params['rumor_id'])
+            for name in ('since', 'until'):
+                if params.get(name):
+                    filters[name] = parse_datetime(params[name])
+                    if filters[name] is None:
+                        raise ValueError(f'Invalid {name} timestamp')
+                    if timezone.is_naive(filters[name]):
+                        filters[name] = timezone.make_aware(filters[name])
+            if params.get('cursor'):
+                filters['after'] = decode_cursor(params['cursor'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = iter_audit_logs(**filters)
+        if output == 'csv':
+            response = StreamingHttpResponse(csv_lines(rows), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="audit_log.csv"'
+        else:
+            response = StreamingHttpResponse(ndjson_lines(rows), content_type='application/x-ndjson')
+        return response
@@ -0,0 +1,142 @@
+"""
+Buffered writer for trust-score audit entries.
+
+Recomputes hand their result to the writer instead of inserting an AuditLog
+row each. Recomputes that leave the stored score unchanged are dropped, and
+repeated entries for a rumor that is still in the buffer are compacted into
+one (the entry keeps the score it started from and counts the recomputes it
+covers). Pending entries are written with one bulk_create when the buffer is
+full or old enough, and on Celery worker shutdown / interpreter exit.
+
+A per-process timer, armed by the first entry in an empty buffer, flushes
+AUDIT_FLUSH_INTERVAL_SECONDS later, so an idle worker never holds entries
+longer than that.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+class AuditWriter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {} # rumor_id -> calculation_data, in insertion order
+        self._oldest = None
+        self._timer = None
+        self.stats = {'recorded': 0, 'unchanged': 0, 'compacted': 0, 'written': 0}
+
+    def _arm_timer(self):
+        # Called with the lock held. Threads don't survive a fork, so a parent's timer reads as dead.
+        if self._timer is not None and self._timer.is_alive():
+            return
+        self._timer = threading.Timer(settings.AUDIT_FLUSH_INTERVAL_SECONDS, self._flush_on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            # The entries are back in the buffer; try again after another interval
+            logger.exception('Audit buffer flush failed')
+            with self._lock:
+                self._timer = None
+                if self._pending:
+                    self._arm_timer()
+        finally:
+            # The timer thread's own connection
+            connection.close()
+
+    def record_trust_score(self, rumor_id, previous_score, stored_score, V, P, M, final_score,
+                           vote_count, mature_proof_count):
+        """
+        Queues a TRUST_SCORE_CALCULATED entry. previous_score/stored_score are
+        the quantized trust_score before and after the recompute; nothing is
+        logged when they are equal.
+        """
+        with self._lock:
+            self.stats['recorded'] += 1
+            if previous_score == stored_score:
+                self.stats['unchanged'] += 1
+                return
+
+            data = {
+                'V': float(V),
+                'P': float(P),
+                'M': float(M),
+                'final_score': float(final_score),
+                'vote_count': vote_count,
+                'mature_proof_count': mature_proof_count,
+                'previous_score': float(previous_score),
+                'calculated_at': timezone.now().isoformat(),
+                'recomputes': 1,
+            }
+            earlier = self._pending.pop(rumor_id, None)
+            if earlier is not None:
+                self.stats['compacted'] += 1
+                data['previous_score'] = earlier['previous_score']
+                data['recomputes'] += earlier['recomputes']
+            self._pending[rumor_id] = data
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+
+            due = (
+                len(self._pending) >= settings.AUDIT_BUFFER_SIZE
+                or time.monotonic() - self._oldest >= settings.AUDIT_FLUSH_INTERVAL_SECONDS
+            )
+            if not due:
+                self._arm_timer()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes every pending entry in one bulk insert. On failure the entries
+        go back into the buffer (newer entries for the same rumor win).
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._oldest = None
+            # Entries recorded from here on arm a fresh timer
+            self._timer = None
+        if not pending:
+            return 0
+
+        try:
+            AuditLog.objects.bulk_create([
+                AuditLog(event_type='TRUST_SCORE_CALCULATED', rumor_id=rumor_id, calculation_data=data)
+                for rumor_id, data in pending.items()
+            ])
+        except Exception:
+            with self._lock:
+                pending.update(self._pending)
+                self._pending = pending
+                self._oldest = self._oldest or time.monotonic()
+            raise
+
+        with self._lock:
+            self.stats['written'] += len(pending)
+        return len(pending)
+
+audit_writer = AuditWriter()
+
+def _flush_on_shutdown(**kwargs):
+    try:
+        audit_writer.flush()
+    except Exception:
+        logger.exception('Audit buffer flush failed at shutdown')
+
+# Prefork children exit through worker_process_shutdown; solo/threads pools
+# through worker_shutdown. atexit covers everything else (shell, commands).
+worker_process_shutdown.connect(_flush_on_shutdown, weak=False)
+worker_shutdown.connect(_flush_on_shutdown, weak=False)
+atexit.register(_flush_on_shutdown)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Build the duplicate-detection index as each server process starts, not on its first rumor POST
+from rumors.dedup import build_index  # noqa: E402
+
+build_index()
@@ -194,3 +194,64 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+
+# Cache (Redis) - shared between web and worker processes for locks/leases
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://localhost:6379/1'),
+    }
+}
+
+# Trust score recompute coalescing: votes on a rumor within this window share one recompute
+TRUST_RECOMPUTE_WINDOW_SECONDS = int(os.getenv('TRUST_RECOMPUTE_WINDOW_SECONDS', 5))
+# Upper bound on a single recompute; the running lease expires after this if a worker dies
+TRUST_RECOMPUTE_LEASE_SECONDS = int(os.getenv('TRUST_RECOMPUTE_LEASE_SECONDS', 60))
+
+# Audit log writer: trust-score entries are buffered per process and bulk-inserted
+# once this many are pending or the oldest has waited this long
+AUDIT_BUFFER_SIZE = int(os.getenv('AUDIT_BUFFER_SIZE', 200))
+AUDIT_FLUSH_INTERVAL_SECONDS = int(os.getenv('AUDIT_FLUSH_INTERVAL_SECONDS', 5))
+
+# Audit archival: cold audit rows are moved into compressed segment files here
+AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', str(BASE_DIR / 'audit_archive'))
+# Rows older than this are archived (rows of frozen rumors are archived regardless of age)
+AUDIT_RETENTION_DAYS = int(os.getenv('AUDIT_RETENTION_DAYS', 90))
+
+# Rumor lifecycle (PRD): rumors freeze and settle this many days after creation
+RUMOR_FREEZE_DAYS = 60
+# Freeze sweep: due rumors are read in keyset batches of this size, at most this many batches per run;
+# the next run resumes from the recorded cursor
+FREEZE_SWEEP_BATCH_SIZE = int(os.getenv('FREEZE_SWEEP_BATCH_SIZE', 500))
+FREEZE_SWEEP_MAX_BATCHES = int(os.getenv('FREEZE_SWEEP_MAX_BATCHES', 20))
+
+CELERY_BEAT_SCHEDULE = {
+    'freeze-mature-rumors': {
+        'task': 'rumors.tasks.freeze_mature_rumors_task',
+        'schedule': 15 * 60,
+    },
+    # Safety net for the coalesced materializer runs scheduled after each settlement
+    'materialize-reputation': {
+        'task': 'rumors.tasks.materialize_reputation_task',
+        'schedule': 5 * 60,
+    },
+}
+
+# Vote weights: per-process LRU in front of the shared cache. Local entries are trusted for
+# VOTE_WEIGHT_LOCAL_TTL_SECONDS, which bounds how stale another process's invalidation can leave them.
+VOTE_WEIGHT_CACHE_SIZE = int(os.getenv('VOTE_WEIGHT_CACHE_SIZE', 10000))
+VOTE_WEIGHT_LOCAL_TTL_SECONDS = int(os.getenv('VOTE_WEIGHT_LOCAL_TTL_SECONDS', 30))
+VOTE_WEIGHT_CACHE_SECONDS = int(os.getenv('VOTE_WEIGHT_CACHE_SECONDS', 3600))
+
+# Trending feed: a vote's contribution to a rumor's trending score halves every this many hours
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 6))
+
+# Anonymous rumor feed/detail responses are cached per version (see rumors.response_cache);
+# version bumps invalidate them, this only bounds how long superseded entries linger
+RESPONSE_CACHE_SECONDS = int(os.getenv('RESPONSE_CACHE_SECONDS', 300))
+
+# Near-duplicate rumors at submission (see rumors.dedup): 'warn' returns likely duplicates with
+# the created rumor, 'block' rejects the submission, 'off' skips the check
+DUPLICATE_RUMOR_POLICY = os.getenv('DUPLICATE_RUMOR_POLICY', 'warn')
+# Estimated Jaccard similarity of character shingles above which a rumor counts as a duplicate
+DUPLICATE_SIMILARITY_THRESHOLD = float(os.getenv('DUPLICATE_SIMILARITY_THRESHOLD', 0.6))
@@ -0,0 +1,14 @@
+"""
+Settings for the test suite: python manage.py test --settings=backend.test_settings
+
+Tests use a per-process cache and run Celery tasks inline, so the suite
+needs no Redis server.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+CELERY_TASK_ALWAYS_EAGER = True
+
+# Audit entries are written as they are recorded (AuditWriterTests opt back into buffering)
+AUDIT_BUFFER_SIZE = 1
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Build the duplicate-detection index as each server process starts, not on its first rumor POST
+from rumors.dedup import build_index  # noqa: E402
+
+build_index()
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class RumorsConfig(AppConfig):
     name = 'rumors'
+
+    def ready(self):
+        # Connects the vote-weight invalidation and search index receivers
+        from . import search, weights  # noqa: F401
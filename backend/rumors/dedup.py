@@ -0,0 +1,186 @@
+"""
+Near-duplicate detection for new rumors: MinHash signatures over character
+shingles, indexed with LSH banding.
+
+Each process keeps an in-memory index of active (not frozen, not deleted)
+rumors. Web processes build it from the database as they load the
+application (build_index, called from backend.wsgi / backend.asgi), so no
+request pays for the full scan; a process that couldn't build it then does
+so on first use. Before every check it picks up rumors other processes
+created since the last sync (an indexed created_at range read). A candidate
+lookup is a handful of dict probes. Candidates are re-read from the
+database before they are reported, and ones that were frozen or deleted in
+the meantime are evicted.
+
+With BANDS x ROWS = 16 x 4, a rumor at Jaccard similarity 0.6 becomes a
+candidate about 9 times in 10, and one at 0.8 almost always. Candidates are
+then filtered by their estimated similarity.
+"""
+import logging
+import re
+import threading
+import zlib
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from .models import Rumor
+
+SHINGLE_SIZE = 3
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+MERSENNE_PRIME = (1 << 31) - 1
+# Rumors committed by other processes can carry a created_at slightly older than the last sync
+SYNC_OVERLAP = timedelta(minutes=1)
+
+logger = logging.getLogger(__name__)
+
+# Fixed seed: signatures must agree across processes and restarts
+_rng = np.random.default_rng(20240917)
+_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+
+def shingles(content):
+    """
+    Character shingles of the normalized text (lowercase words, single spaces).
+    """
+    text = ' '.join(re.findall(r'\w+', content.lower()))
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def signature(content):
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) for shingle in shingles(content)), dtype=np.uint64
+    )
+    # (a * x + b) mod p per permutation; a, x < 2^32 so the products fit in uint64
+    return ((np.outer(_A, hashes) + _B[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+def similarity(sig_a, sig_b):
+    """
+    Estimated Jaccard similarity of the shingle sets behind two signatures.
+    """
+    return float(np.mean(sig_a == sig_b))
+
+def _band_keys(sig):
+    return [(band, sig[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+class MinHashIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signatures = {}
+        self._buckets = {}
+        self._synced_at = None
+
+    def _add(self, rumor_id, sig):
+        if rumor_id in self._signatures:
+            return
+        self._signatures[rumor_id] = sig
+        for key in _band_keys(sig):
+            self._buckets.setdefault(key, set()).add(rumor_id)
+
+    def _remove(self, rumor_id):
+        sig = self._signatures.pop(rumor_id, None)
+        if sig is None:
+            return
+        for key in _band_keys(sig):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(rumor_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _load(self, rumors):
+        for rumor_id, content in rumors.values_list('rumor_id', 'content').iterator(chunk_size=2000):
+            self._add(rumor_id, signature(content))
+
+    def _rebuild(self):
+        # Called with the lock held. Only a completed load counts as synced, so a failed one is retried.
+        started_at = timezone.now()
+        self._signatures = {}
+        self._buckets = {}
+        self._synced_at = None
+        self._load(Rumor.objects.filter(is_deleted=False, is_frozen=False))
+        self._synced_at = started_at
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild()
+
+    def sync(self):
+        """
+        Adds rumors created since the last sync (builds the index if it hasn't been).
+        """
+        with self._lock:
+            if self._synced_at is None:
+                self._rebuild()
+                return
+            since = self._synced_at - SYNC_OVERLAP
+            self._synced_at = timezone.now()
+            self._load(Rumor.objects.filter(is_deleted=False, is_frozen=False, created_at__gte=since))
+
+    def add(self, rumor_id, content):
+        with self._lock:
+            self._add(rumor_id, signature(content))
+
+    def discard(self, rumor_ids):
+        with self._lock:
+            for rumor_id in rumor_ids:
+                self._remove(rumor_id)
+
+    def candidates(self, sig):
+        """
+        (rumor_id, estimated similarity) of indexed rumors sharing a band with sig.
+        """
+        with self._lock:
+            ids = set()
+            for key in _band_keys(sig):
+                ids |= self._buckets.get(key, set())
+            return [(rumor_id, similarity(sig, self._signatures[rumor_id])) for rumor_id in ids]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, rumor_id):
+        return rumor_id in self._signatures
+
+dedup_index = MinHashIndex()
+
+def build_index():
+    """
+    Builds this process's index ahead of its first request. A database that
+    isn't reachable (or migrated) yet doesn't stop the process from starting;
+    the failure is logged and the index is built on first use instead.
+    """
+    try:
+        dedup_index.sync()
+    except DatabaseError:
+        logger.exception('Duplicate index build failed, deferring it to the first check')
+    finally:
+        # Requests run on their own connections
+        connection.close()
+
+def find_duplicates(content, limit=5):
+    """
+    Active rumors that are likely near-duplicates of `content`:
+    [(rumor_id, estimated similarity)], most similar first.
+    """
+    dedup_index.sync()
+    threshold = settings.DUPLICATE_SIMILARITY_THRESHOLD
+    matches = sorted(
+        ((rumor_id, score) for rumor_id, score in dedup_index.candidates(signature(content)) if score >= threshold),
+        key=lambda match: -match[1]
+    )
+    if not matches:
+        return []
+
+    # Evict candidates that were frozen or deleted since they were indexed
+    active = set(Rumor.objects.filter(
+        pk__in=[rumor_id for rumor_id, _ in matches], is_deleted=False, is_frozen=False
+    ).values_list('rumor_id', flat=True))
+    dedup_index.discard([rumor_id for rumor_id, _ in matches if rumor_id not in active])
+    return [(rumor_id, score) for rumor_id, score in matches if rumor_id in active][:limit]
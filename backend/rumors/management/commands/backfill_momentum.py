@@ -0,0 +1,47 @@
+from datetime import datetime, timezone as dt_timezone
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rumors.models import Vote, MomentumBucket
+from rumors.momentum import window_index, MOMENTUM_WINDOWS, WINDOW_SECONDS
+
+class Command(BaseCommand):
+    help = 'Rebuild momentum vote buckets from Vote.voted_at history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rumor', type=str, help='Only rebuild this rumor UUID')
+
+    def handle(self, *args, **options):
+        oldest = window_index(timezone.now()) - MOMENTUM_WINDOWS + 1
+        since = datetime.fromtimestamp(oldest * WINDOW_SECONDS, tz=dt_timezone.utc)
+
+        votes = Vote.objects.filter(voted_at__gte=since)
+        buckets = MomentumBucket.objects.all()
+        if options['rumor']:
+            votes = votes.filter(rumor_id=options['rumor'])
+            buckets = buckets.filter(rumor_id=options['rumor'])
+
+        # (rumor_id, window_index) -> [verify_count, total_count]
+        counts = {}
+        for rumor_id, vote_type, voted_at in votes.values_list('rumor_id', 'vote_type', 'voted_at').iterator(chunk_size=5000):
+            bucket = counts.setdefault((rumor_id, window_index(voted_at)), [0, 0])
+            bucket[0] += vote_type == 'VERIFY'
+            bucket[1] += 1
+
+        rows = [
+            MomentumBucket(
+                rumor_id=rumor_id,
+                slot=idx % MOMENTUM_WINDOWS,
+                window_index=idx,
+                verify_count=verify,
+                total_count=total,
+            )
+            for (rumor_id, idx), (verify, total) in counts.items()
+        ]
+
+        with transaction.atomic():
+            buckets.delete()
+            MomentumBucket.objects.bulk_create(rows, batch_size=1000)
+
+        rumor_count = len({rumor_id for rumor_id, _ in counts})
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rows)} buckets for {rumor_count} rumors.'))
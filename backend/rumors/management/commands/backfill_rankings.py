@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rumors.models import Rumor, Vote
+from rumors.ranking import trending_score, controversy_score
+from rumors.response_cache import bump_rumor_versions
+
+RANKING_FIELDS = ['trending_score', 'controversy_score']
+
+class Command(BaseCommand):
+    help = 'Rebuild trending and controversy scores from Vote history and the vote counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rumor', type=str, help='Only rebuild this rumor UUID')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rumors per chunk')
+
+    def handle(self, *args, **options):
+        rumors = Rumor.objects.order_by('rumor_id')
+        if options['rumor']:
+            rumors = rumors.filter(rumor_id=options['rumor'])
+
+        last_id = None
+        done = 0
+        while True:
+            page = rumors if last_id is None else rumors.filter(rumor_id__gt=last_id)
+            current = list(page.values_list('rumor_id', 'verify_count', 'dispute_count')[:options['chunk_size']])
+            if not current:
+                break
+            rumor_ids = [row[0] for row in current]
+
+            voted_at = {}
+            for rumor_id, at in Vote.objects.filter(rumor_id__in=rumor_ids).values_list('rumor_id', 'voted_at'):
+                voted_at.setdefault(rumor_id, []).append(at)
+
+            updates = [
+                Rumor(
+                    rumor_id=rumor_id,
+                    trending_score=trending_score(voted_at.get(rumor_id, [])),
+                    controversy_score=controversy_score(verify, dispute),
+                )
+                for rumor_id, verify, dispute in current
+            ]
+            with transaction.atomic():
+                Rumor.objects.bulk_update(updates, RANKING_FIELDS, batch_size=500)
+                bump_rumor_versions(rumor_ids)
+
+            done += len(current)
+            last_id = rumor_ids[-1]
+            self.stdout.write(f'[{done}] rankings rebuilt')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rankings for {done} rumors.'))
@@ -0,0 +1,89 @@
+import random
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from rumors import scoring
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark the scoring kernel: scalar Decimal path vs vectorized batch path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rumors', type=int, default=5000)
+        parser.add_argument('--votes', type=int, default=50, help='Average votes per rumor')
+        parser.add_argument('--proofs', type=int, default=2, help='Average mature proofs per rumor')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        n = options['rumors']
+
+        # Synthetic inputs in the shapes the online and bulk paths see
+        votes = []
+        for _ in range(n):
+            k = rng.randint(0, options['votes'] * 2)
+            votes.append((
+                [rng.choice([Decimal('1.0'), Decimal('0.5'), Decimal('0.0')]) for _ in range(k)],
+                [Decimal(rng.randint(1000, 10000)) / 10000 for _ in range(k)],
+            ))
+        proofs = [
+            [Decimal(rng.randint(0, 100)) / 100 for _ in range(rng.randint(0, options['proofs'] * 2))]
+            for _ in range(n)
+        ]
+        windows = [
+            ([rng.randint(0, 5) for _ in range(4)], [rng.randint(5, 10) for _ in range(4)])
+            for _ in range(n)
+        ]
+
+        # --- Scalar path ---
+        start = time.perf_counter()
+        scalar = []
+        for (values, weights), mature, (verify, totals) in zip(votes, proofs, windows):
+            V = scoring.weighted_average(values, weights, default=scoring.NEUTRAL)
+            P = scoring.proof_score(mature)
+            M = scoring.momentum_score(verify, totals, len(values))
+            scalar.append(scoring.quantize_score(scoring.trust_score(V, P, M)))
+        scalar_time = time.perf_counter() - start
+
+        # Columnar layout, as the bulk path receives it from values_list()
+        vote_idx = np.repeat(np.arange(n), [len(values) for values, _ in votes])
+        vote_values = np.array([float(v) for values, _ in votes for v in values])
+        vote_weights = np.array([float(w) for _, weights in votes for w in weights])
+        proof_idx = np.repeat(np.arange(n), [len(mature) for mature in proofs])
+        proof_scores = np.array([float(p) for mature in proofs for p in mature])
+        verify = np.array([w[0] for w in windows], dtype=np.float64)
+        totals = np.array([w[1] for w in windows], dtype=np.float64)
+
+        # --- Batch path ---
+        start = time.perf_counter()
+        V = scoring.batch_vote_scores(
+            np.bincount(vote_idx, weights=vote_values * vote_weights, minlength=n),
+            np.bincount(vote_idx, weights=vote_weights, minlength=n),
+        )
+        P = scoring.batch_proof_scores(
+            np.bincount(proof_idx, weights=proof_scores, minlength=n),
+            np.bincount(proof_idx, minlength=n),
+        )
+        M = scoring.batch_quantize(scoring.batch_momentum_scores(verify, totals, np.bincount(vote_idx, minlength=n)))
+        T = scoring.batch_trust_scores(V, P, np.array([float(m) for m in M]))
+
+        def exact_T(i):
+            values, weights = votes[i]
+            return scoring.trust_score(
+                scoring.weighted_average(values, weights, default=scoring.NEUTRAL),
+                scoring.proof_score(proofs[i]),
+                M[i],
+            )
+
+        batch = scoring.batch_quantize(T, exact=exact_T)
+        batch_time = time.perf_counter() - start
+
+        mismatches = sum(a != b for a, b in zip(scalar, batch))
+        self.stdout.write(f'Rumors: {n}, votes: {len(vote_values)}, mature proofs: {len(proof_scores)}')
+        self.stdout.write(f'Scalar: {scalar_time * 1000:.1f} ms ({scalar_time / n * 1e6:.1f} us/rumor)')
+        self.stdout.write(f'Batch:  {batch_time * 1000:.1f} ms ({batch_time / n * 1e6:.1f} us/rumor)')
+        self.stdout.write(f'Speedup: {scalar_time / batch_time:.1f}x')
+        style = self.style.SUCCESS if not mismatches else self.style.ERROR
+        self.stdout.write(style(f'Stored trust_score mismatches: {mismatches}'))
@@ -0,0 +1,73 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from rumors.models import Rumor, Proof
+from rumors.serializers import RumorSerializer, ProofSerializer
+from rumors.views import RumorViewSet, ProofViewSet
+
+class Command(BaseCommand):
+    help = 'Benchmark per-page list serialization: ModelSerializer vs the fast .values() path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def timed(self, func, iterations):
+        func()  # warm-up (compiles the fast mappers, fills caches)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations * 1000
+
+    def handle(self, *args, **options):
+        size = options['page_size']
+        iterations = options['iterations']
+        request = Request(APIRequestFactory().get('/'))
+        request.user = AnonymousUser()
+        renderer = JSONRenderer()
+
+        cases = [
+            ('rumors', RumorSerializer, RumorViewSet.fast_list_serializer, Rumor.objects.filter(is_deleted=False)
+                .select_related('author').annotate(vote_count=F('verify_count') + F('uncertain_count') + F('dispute_count'))
+                .order_by('-created_at', '-rumor_id')),
+            ('proofs', ProofSerializer, ProofViewSet.fast_list_serializer, Proof.objects.select_related('poster')
+                .order_by('-trust_score', '-proof_id')),
+        ]
+        for name, serializer_class, fast, queryset in cases:
+            objs = list(queryset[:size])
+            rows = list(queryset.values(*fast.columns)[:size])
+            if not objs:
+                self.stdout.write(f'{name}: no rows to benchmark')
+                continue
+
+            def model_page(objs=objs):
+                return renderer.render(serializer_class(objs, many=True, context={'request': request}).data)
+
+            def fast_page(rows=rows):
+                return renderer.render(fast.serialize(rows, request))
+
+            def model_query(queryset=queryset):
+                return model_page(list(queryset[:size]))
+
+            def fast_query(queryset=queryset, fast=fast):
+                return fast_page(list(queryset.values(*fast.columns)[:size]))
+
+            if model_page() != fast_page():
+                self.stderr.write(self.style.ERROR(f'{name}: fast path output differs from {serializer_class.__name__}'))
+
+            serialize = (self.timed(model_page, iterations), self.timed(fast_page, iterations))
+            end_to_end = (self.timed(model_query, iterations), self.timed(fast_query, iterations))
+            self.stdout.write(f'{name} ({len(objs)} rows/page)')
+            self.stdout.write(
+                f'  serialize+render: {serialize[0]:.3f} ms -> {serialize[1]:.3f} ms ({serialize[0] / serialize[1]:.1f}x)'
+            )
+            self.stdout.write(
+                f'  query+serialize+render: {end_to_end[0]:.3f} ms -> {end_to_end[1]:.3f} ms '
+                f'({end_to_end[0] / end_to_end[1]:.1f}x)'
+            )
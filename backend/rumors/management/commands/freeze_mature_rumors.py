@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from rumors.tasks import freeze_mature_rumors, reset_freeze_cursor, due_rumors
+
+class Command(BaseCommand):
+    help = 'Freeze and settle rumors past the 60-day mark (the same sweep Celery beat runs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Due rumors read per keyset batch')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches (resume on next run)')
+        parser.add_argument('--inline', action='store_true', help='Settle in this process instead of fanning out to workers')
+        parser.add_argument('--reset-cursor', action='store_true', help='Start from the oldest due rumor')
+        parser.add_argument('--dry-run', action='store_true', help='Only count due rumors')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f'{due_rumors().count()} rumors are due for settlement')
+            return
+        if options['reset_cursor']:
+            reset_freeze_cursor()
+
+        handled, exhausted = freeze_mature_rumors(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            dispatch=not options['inline'],
+        )
+        verb = 'Settled' if options['inline'] else 'Dispatched'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {handled} rumors'))
+        if not exhausted:
+            self.stdout.write('More rumors are due; run again to continue from the recorded cursor')
@@ -0,0 +1,189 @@
+import json
+import os
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from audit.models import AuditLog
+from rumors.models import Rumor, Vote, Proof, MomentumBucket
+from rumors.momentum import window_index, MOMENTUM_WINDOWS
+from rumors.response_cache import bump_rumor_versions
+from rumors import ranking, scoring
+
+SCORE_FIELDS = ['trust_score', 'vote_score', 'proof_score', 'momentum_score', 'controversy_score']
+
+def compute_chunk_scores(rumor_ids, now):
+    """
+    Vectorized V/P/M/TrustScore (and controversy) for a chunk of rumors.
+    Pulls votes, mature proofs and momentum buckets as flat columns and
+    reduces them per rumor with bincount, so the cost is a few queries per
+    chunk rather than several queries per rumor.
+    Returns {field: [Decimal, ...]} aligned with rumor_ids, at storage precision.
+    """
+    n = len(rumor_ids)
+    index = {rumor_id: i for i, rumor_id in enumerate(rumor_ids)}
+
+    # --- Votes: (rumor, value, weight, type) columns ---
+    vote_rows = list(
+        Vote.objects.filter(rumor_id__in=rumor_ids)
+        .values_list('rumor_id', 'vote_value', 'weight_snapshot', 'vote_type')
+    )
+    if vote_rows:
+        vote_rumor, vote_value, vote_weight, vote_type = zip(*vote_rows)
+        vote_idx = np.fromiter((index[r] for r in vote_rumor), dtype=np.int64, count=len(vote_rows))
+        values = np.array(vote_value, dtype=np.float64)
+        weights = np.array(vote_weight, dtype=np.float64)
+        types = np.array(vote_type)
+    else:
+        vote_idx = np.zeros(0, dtype=np.int64)
+        values = weights = np.zeros(0, dtype=np.float64)
+        types = np.zeros(0, dtype=str)
+
+    weighted_sum = np.bincount(vote_idx, weights=values * weights, minlength=n)
+    total_weight = np.bincount(vote_idx, weights=weights, minlength=n)
+    vote_count = np.bincount(vote_idx, minlength=n)
+    V = scoring.batch_vote_scores(weighted_sum, total_weight)
+    verify_votes = np.bincount(vote_idx[types == 'VERIFY'], minlength=n)
+    dispute_votes = np.bincount(vote_idx[types == 'DISPUTE'], minlength=n)
+
+    # --- Mature proofs: (rumor, trust_score) columns ---
+    proof_rows = list(
+        Proof.objects.filter(rumor_id__in=rumor_ids, is_mature=True)
+        .values_list('rumor_id', 'trust_score')
+    )
+    if proof_rows:
+        proof_rumor, proof_score = zip(*proof_rows)
+        proof_idx = np.fromiter((index[r] for r in proof_rumor), dtype=np.int64, count=len(proof_rows))
+        scores = np.array(proof_score, dtype=np.float64)
+    else:
+        proof_idx = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float64)
+
+    P = scoring.batch_proof_scores(
+        np.bincount(proof_idx, weights=scores, minlength=n),
+        np.bincount(proof_idx, minlength=n),
+    )
+
+    # --- Momentum: the bucket ring as an (n, windows) matrix ---
+    oldest = window_index(now) - MOMENTUM_WINDOWS + 1
+    verify = np.zeros((n, MOMENTUM_WINDOWS))
+    totals = np.zeros((n, MOMENTUM_WINDOWS))
+    bucket_rows = list(
+        MomentumBucket.objects.filter(rumor_id__in=rumor_ids, window_index__gte=oldest)
+        .values_list('rumor_id', 'window_index', 'verify_count', 'total_count')
+    )
+    for rumor_id, idx, verify_count, total_count in bucket_rows:
+        verify[index[rumor_id], idx - oldest] = verify_count
+        totals[index[rumor_id], idx - oldest] = total_count
+
+    # M is rounded before it enters the trust score, as in the online path
+    M = scoring.batch_quantize(scoring.batch_momentum_scores(verify, totals, vote_count))
+    T = scoring.batch_trust_scores(V, P, np.array([float(m) for m in M]))
+
+    # Exact Decimal inputs, only built for the rare rows whose float result is at a rounding tie
+    def exact_V(i):
+        rows = [(value, weight) for r, value, weight, _ in vote_rows if index[r] == i]
+        return scoring.weighted_average([v for v, _ in rows], [w for _, w in rows], default=scoring.NEUTRAL)
+
+    def exact_P(i):
+        return scoring.proof_score(score for r, score in proof_rows if index[r] == i)
+
+    def exact_T(i):
+        return scoring.trust_score(exact_V(i), exact_P(i), M[i])
+
+    return {
+        'trust_score': scoring.batch_quantize(T, exact=exact_T),
+        'vote_score': scoring.batch_quantize(V, exact=exact_V),
+        'proof_score': scoring.batch_quantize(P, exact=exact_P),
+        'momentum_score': M,
+        'controversy_score': [
+            ranking.controversy_score(int(v), int(d)) for v, d in zip(verify_votes, dispute_votes)
+        ],
+    }
+
+class Command(BaseCommand):
+    help = 'Recompute V/P/M and trust scores for every rumor in vectorized chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rumors per chunk')
+        parser.add_argument('--include-frozen', action='store_true', help='Also recompute frozen rumors')
+        parser.add_argument('--dry-run', action='store_true', help='Print a diff of changed scores without writing')
+        parser.add_argument('--checkpoint', type=str, help='Path of a checkpoint file to record progress in')
+        parser.add_argument('--resume', action='store_true', help='Continue after the rumor recorded in --checkpoint')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        checkpoint_path = options['checkpoint']
+
+        rumors = Rumor.objects.filter(is_deleted=False)
+        if not options['include_frozen']:
+            rumors = rumors.filter(is_frozen=False)
+
+        last_id = None
+        done = 0
+        changed = 0
+        if options['resume']:
+            if not checkpoint_path or not os.path.exists(checkpoint_path):
+                self.stderr.write(self.style.ERROR('--resume needs an existing --checkpoint file'))
+                return
+            with open(checkpoint_path) as f:
+                state = json.load(f)
+            last_id = state['last_rumor_id']
+            done = state['done']
+            changed = state['changed']
+
+        total = rumors.count()
+        now = timezone.now()
+
+        while True:
+            page = rumors.order_by('rumor_id')
+            if last_id is not None:
+                page = page.filter(rumor_id__gt=last_id)
+            current = list(page.values_list('rumor_id', *SCORE_FIELDS)[:chunk_size])
+            if not current:
+                break
+
+            rumor_ids = [row[0] for row in current]
+            scores = compute_chunk_scores(rumor_ids, now)
+
+            updates = []
+            for i, row in enumerate(current):
+                new = {field: scores[field][i] for field in SCORE_FIELDS}
+                old = dict(zip(SCORE_FIELDS, row[1:]))
+                if new == old:
+                    continue
+                changed += 1
+                if dry_run:
+                    diff = ' '.join(f'{field}={old[field]}->{new[field]}' for field in SCORE_FIELDS if old[field] != new[field])
+                    self.stdout.write(f'{row[0]} {diff}')
+                else:
+                    updates.append(Rumor(rumor_id=row[0], **new))
+
+            if updates:
+                with transaction.atomic():
+                    Rumor.objects.bulk_update(updates, SCORE_FIELDS, batch_size=500)
+                    bump_rumor_versions([rumor.rumor_id for rumor in updates])
+
+            done += len(current)
+            last_id = rumor_ids[-1]
+            if checkpoint_path and not dry_run:
+                with open(checkpoint_path, 'w') as f:
+                    json.dump({'last_rumor_id': str(last_id), 'done': done, 'changed': changed}, f)
+            self.stdout.write(f'[{done}/{total}] {changed} changed')
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'Dry run: {changed} of {done} rumors would change.'))
+            return
+
+        AuditLog.objects.create(
+            event_type='TRUST_SCORE_BULK_RECOMPUTE',
+            calculation_data={
+                'rumors_processed': done,
+                'rumors_changed': changed,
+                'include_frozen': options['include_frozen'],
+            }
+        )
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {done} rumors, {changed} changed.'))
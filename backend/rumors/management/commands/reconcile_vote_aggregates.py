@@ -0,0 +1,67 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from rumors.models import Rumor
+from rumors.response_cache import bump_rumor_versions
+from rumors.services import compute_vote_aggregates, compute_proof_counts
+
+AGGREGATE_FIELDS = [
+    'vote_weighted_sum', 'vote_total_weight', 'verify_count', 'uncertain_count', 'dispute_count',
+    'proof_count', 'mature_proof_count',
+]
+
+class Command(BaseCommand):
+    help = 'Check per-rumor running vote aggregates and proof counters against a full recompute from the Vote and Proof tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rumor', type=str, help='Only reconcile this rumor UUID')
+        parser.add_argument('--repair', action='store_true', help='Overwrite drifted aggregates with the recomputed values')
+
+    def handle(self, *args, **options):
+        rumors = Rumor.objects.all()
+        if options['rumor']:
+            rumors = rumors.filter(rumor_id=options['rumor'])
+
+        rumor_ids = None if not options['rumor'] else [options['rumor']]
+        votes_by_rumor = compute_vote_aggregates(rumor_ids)
+        proofs_by_rumor = compute_proof_counts(rumor_ids)
+        no_votes = {
+            'vote_weighted_sum': Decimal('0'),
+            'vote_total_weight': Decimal('0'),
+            'verify_count': 0,
+            'uncertain_count': 0,
+            'dispute_count': 0,
+        }
+        no_proofs = {'proof_count': 0, 'mature_proof_count': 0}
+
+        checked = 0
+        drifted = 0
+        repaired = []
+        for rumor in rumors.only('rumor_id', *AGGREGATE_FIELDS).iterator():
+            checked += 1
+            expected = {
+                **votes_by_rumor.get(rumor.rumor_id, no_votes),
+                **proofs_by_rumor.get(rumor.rumor_id, no_proofs),
+            }
+            mismatches = {
+                field: (getattr(rumor, field), expected[field])
+                for field in AGGREGATE_FIELDS
+                if getattr(rumor, field) != expected[field]
+            }
+            if not mismatches:
+                continue
+
+            drifted += 1
+            details = ', '.join(f'{field}: stored={stored} expected={exp}' for field, (stored, exp) in mismatches.items())
+            self.stdout.write(self.style.WARNING(f'{rumor.rumor_id}: {details}'))
+
+            if options['repair']:
+                Rumor.objects.filter(pk=rumor.rumor_id).update(**expected)
+                repaired.append(rumor.rumor_id)
+
+        if repaired:
+            bump_rumor_versions(repaired)
+
+        summary = f'Checked {checked} rumors, {drifted} drifted.'
+        if drifted and options['repair']:
+            summary += ' Repaired.'
+        self.stdout.write(self.style.SUCCESS(summary) if not drifted or options['repair'] else self.style.ERROR(summary))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from rumors.models import Rumor, Proof
+from rumors.search import reindex
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of rumors and proofs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['rumors', 'proofs'], help='Only rebuild one index')
+
+    def handle(self, *args, **options):
+        models = {'rumors': Rumor, 'proofs': Proof}
+        for name, model in models.items():
+            if options['only'] and options['only'] != name:
+                continue
+            indexed = reindex(model)
+            self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} {name}.'))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from rumors.services import settle_rumor
+from audit.ledger import materialize_balances
 
 class Command(BaseCommand):
     help = 'Force settle a rumor by ID'
@@ -10,4 +11,5 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         rumor_id = options['rumor_id']
         result = settle_rumor(rumor_id)
+        materialize_balances()
         self.stdout.write(self.style.SUCCESS(result))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def aggregate_votes(apps, schema_editor):
+    Rumor = apps.get_model('rumors', 'Rumor')
+    Vote = apps.get_model('rumors', 'Vote')
+
+    def per_rumor(aggregate, output_field, zero, **filters):
+        values = (
+            Vote.objects.filter(rumor=OuterRef('pk'), **filters)
+            .order_by().values('rumor').annotate(x=aggregate).values('x')
+        )
+        return Coalesce(Subquery(values, output_field=output_field), Value(zero, output_field=output_field))
+
+    weighted = ExpressionWrapper(
+        F('vote_value') * F('weight_snapshot'), output_field=DecimalField(max_digits=14, decimal_places=5)
+    )
+    Rumor.objects.update(
+        verify_count=per_rumor(Count('pk'), IntegerField(), 0, vote_type='VERIFY'),
+        uncertain_count=per_rumor(Count('pk'), IntegerField(), 0, vote_type='UNCERTAIN'),
+        dispute_count=per_rumor(Count('pk'), IntegerField(), 0, vote_type='DISPUTE'),
+        vote_weighted_sum=per_rumor(Sum(weighted), DecimalField(max_digits=14, decimal_places=5), Decimal('0')),
+        vote_total_weight=per_rumor(Sum('weight_snapshot'), DecimalField(max_digits=14, decimal_places=4), Decimal('0')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rumors', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rumor',
+            name='dispute_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='rumor',
+            name='uncertain_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='rumor',
+            name='verify_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='rumor',
+            name='vote_total_weight',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='rumor',
+            name='vote_weighted_sum',
+            field=models.DecimalField(decimal_places=5, default=Decimal('0'), max_digits=14),
+        ),
+        migrations.RunPython(aggregate_votes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rumors', '0003_vote_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MomentumBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('window_index', models.BigIntegerField()),
+                ('verify_count', models.IntegerField(default=0)),
+                ('total_count', models.IntegerField(default=0)),
+                ('rumor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='momentum_buckets', to='rumors.rumor')),
+            ],
+            options={
+                'unique_together': {('rumor', 'slot')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rumors', '0004_momentum_buckets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proof',
+            index=models.Index(fields=['trust_score', 'proof_id'], name='proof_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proof',
+            index=models.Index(fields=['rumor', 'trust_score', 'proof_id'], name='proof_rumor_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rumor',
+            index=models.Index(fields=['created_at', 'rumor_id'], name='rumor_feed_idx'),
+        ),
+    ]
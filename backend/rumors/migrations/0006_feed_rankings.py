@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rumors', '0005_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='rumor',
+            name='rumor_feed_idx',
+        ),
+        migrations.AddField(
+            model_name='rumor',
+            name='controversy_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='rumor',
+            name='trending_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='rumor',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'rumor_id'], name='rumor_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rumor',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['trending_score', 'rumor_id'], name='rumor_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rumor',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_frozen', True)), fields=['trust_score', 'rumor_id'], name='rumor_trusted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rumor',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['controversy_score', 'rumor_id'], name='rumor_controversial_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rumor',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['is_frozen', 'created_at', 'rumor_id'], name='rumor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rumor',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['classification', 'created_at', 'rumor_id'], name='rumor_class_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:18
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_proofs(apps, schema_editor):
+    Rumor = apps.get_model('rumors', 'Rumor')
+    Proof = apps.get_model('rumors', 'Proof')
+
+    def live_proofs(**filters):
+        counts = (
+            Proof.objects.filter(rumor=OuterRef('pk'), is_deleted=False, **filters)
+            .order_by().values('rumor').annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Rumor.objects.update(proof_count=live_proofs(), mature_proof_count=live_proofs(is_mature=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rumors', '0006_feed_rankings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rumor',
+            name='mature_proof_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='rumor',
+            name='proof_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_proofs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+SEARCH_TABLES = ['rumors_rumor', 'rumors_proof']
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        for table in SEARCH_TABLES:
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED"
+            )
+            schema_editor.execute(f'CREATE INDEX {table}_search_idx ON {table} USING GIN (search_vector)')
+    elif connection.vendor == 'sqlite':
+        for table, model in zip(SEARCH_TABLES, ['Rumor', 'Proof']):
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5(object_id UNINDEXED, content, tokenize='porter unicode61')"
+            )
+            rows = apps.get_model('rumors', model).objects.filter(is_deleted=False).values_list('pk', 'content')
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {table}_fts (rowid, object_id, content) VALUES (%s, %s, %s)',
+                    [(pk.int >> 65, pk.hex, content or '') for pk, content in rows.iterator()]
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    for table in SEARCH_TABLES:
+        if connection.vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+            schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+        elif connection.vendor == 'sqlite':
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text search index (see rumors/search.py): FTS5 tables on SQLite, a
+    generated tsvector column with a GIN index on PostgreSQL.
+    """
+
+    dependencies = [
+        ('rumors', '0007_proof_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rumors', '0008_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='previous_vote_type',
+            field=models.CharField(blank=True, choices=[('VERIFY', 'Verify'), ('UNCERTAIN', 'Uncertain'), ('DISPUTE', 'Dispute')], max_length=10, null=True),
+        ),
+    ]
@@ -6,6 +6,9 @@ from django.core.validators import MinLengthValidator, MaxLengthValidator
 
 User = settings.AUTH_USER_MODEL
 
+# Feed indexes only cover rumors that can appear in a feed
+LIVE_RUMORS = models.Q(is_deleted=False)
+
 class Rumor(models.Model):
     rumor_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='authored_rumors')
@@ -16,6 +19,21 @@ class Rumor(models.Model):
     vote_score = models.DecimalField(max_digits=4, decimal_places=2, default=Decimal('0.00'))
     proof_score = models.DecimalField(max_digits=4, decimal_places=2, default=Decimal('0.00'))
     momentum_score = models.DecimalField(max_digits=4, decimal_places=2, default=Decimal('0.00'))
+
+    # Running vote aggregates, adjusted by delta on every vote write (see services.apply_vote_delta)
+    # V = vote_weighted_sum / vote_total_weight, so scoring never has to scan the Vote table.
+    vote_weighted_sum = models.DecimalField(max_digits=14, decimal_places=5, default=Decimal('0'))
+    vote_total_weight = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal('0'))
+    verify_count = models.IntegerField(default=0)
+    uncertain_count = models.IntegerField(default=0)
+    dispute_count = models.IntegerField(default=0)
+    # Live (not deleted) proofs, and the mature ones among them (see services.apply_proof_delta)
+    proof_count = models.IntegerField(default=0)
+    mature_proof_count = models.IntegerField(default=0)
+
+    # Feed ranking signals (see rumors.ranking)
+    trending_score = models.FloatField(null=True, blank=True) # log of decayed vote activity
+    controversy_score = models.FloatField(default=0.0)
     
     # Lifecycle
     is_frozen = models.BooleanField(default=False)
@@ -42,6 +60,20 @@ class Rumor(models.Model):
     evidence_type = models.CharField(max_length=20, choices=EVIDENCE_TYPES, null=True, blank=True)
     evidence_url = models.TextField(null=True, blank=True)
 
+    class Meta:
+        # Feed sort modes and filters, in keyset order
+        indexes = [
+            models.Index(fields=['created_at', 'rumor_id'], name='rumor_feed_idx', condition=LIVE_RUMORS),
+            models.Index(fields=['trending_score', 'rumor_id'], name='rumor_trending_idx', condition=LIVE_RUMORS),
+            models.Index(
+                fields=['trust_score', 'rumor_id'], name='rumor_trusted_idx',
+                condition=LIVE_RUMORS & models.Q(is_frozen=True)
+            ),
+            models.Index(fields=['controversy_score', 'rumor_id'], name='rumor_controversial_idx', condition=LIVE_RUMORS),
+            models.Index(fields=['is_frozen', 'created_at', 'rumor_id'], name='rumor_status_idx', condition=LIVE_RUMORS),
+            models.Index(fields=['classification', 'created_at', 'rumor_id'], name='rumor_class_idx', condition=LIVE_RUMORS),
+        ]
+
     def __str__(self):
         return f"{self.content[:50]}..."
 
@@ -60,6 +92,8 @@ class Vote(models.Model):
     voted_at = models.DateTimeField(auto_now_add=True)
     last_updated_at = models.DateTimeField(auto_now=True)
     change_count = models.IntegerField(default=0)
+    # Type replaced by the latest change (written by the vote upsert, see services.cast_vote)
+    previous_vote_type = models.CharField(max_length=10, choices=VOTE_TYPES, null=True, blank=True)
     
     class Meta:
         unique_together = ('rumor', 'voter')
@@ -84,6 +118,13 @@ class Proof(models.Model):
     is_deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Proof list keyset order, overall and per rumor
+            models.Index(fields=['trust_score', 'proof_id'], name='proof_rank_idx'),
+            models.Index(fields=['rumor', 'trust_score', 'proof_id'], name='proof_rumor_rank_idx'),
+        ]
+
 class ProofVote(models.Model):
     proof_vote_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     proof = models.ForeignKey(Proof, on_delete=models.CASCADE, related_name='votes')
@@ -98,3 +139,18 @@ class ProofVote(models.Model):
 
     class Meta:
         unique_together = ('proof', 'voter')
+
+class MomentumBucket(models.Model):
+    """
+    One slot in a rumor's ring of 6-hour vote windows (see rumors.momentum).
+    slot = window_index % MOMENTUM_WINDOWS, so each rumor has at most that many rows;
+    a slot is recycled in place when a newer window lands on it.
+    """
+    rumor = models.ForeignKey(Rumor, on_delete=models.CASCADE, related_name='momentum_buckets')
+    slot = models.PositiveSmallIntegerField()
+    window_index = models.BigIntegerField() # epoch seconds // window length
+    verify_count = models.IntegerField(default=0)
+    total_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('rumor', 'slot')
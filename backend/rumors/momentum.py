@@ -0,0 +1,84 @@
+"""
+Momentum score (M) from a per-rumor ring of 6-hour vote buckets (PRD FR-5.3).
+
+Each vote increments the bucket of the window it was cast in, so computing M
+only reads the last MOMENTUM_WINDOWS bucket rows instead of re-sorting the
+rumor's vote history.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import MomentumBucket
+from . import scoring
+
+WINDOW_HOURS = 6
+MOMENTUM_WINDOWS = 4 # Last 24 hours
+WINDOW_SECONDS = WINDOW_HOURS * 3600
+
+def window_index(at):
+    return int(at.timestamp()) // WINDOW_SECONDS
+
+def record_vote(rumor_id, voted_at, old_type=None, new_type=None):
+    """
+    Moves one vote into/within the bucket of the window it was cast in.
+    old_type is None for a fresh vote; for a changed vote both are given and
+    only the verify count moves. Votes whose window has already rotated out of
+    the ring are ignored, exactly as a backfill from history would.
+    """
+    verify_delta = (new_type == 'VERIFY') - (old_type == 'VERIFY')
+    total_delta = (new_type is not None) - (old_type is not None)
+    if not verify_delta and not total_delta:
+        return
+
+    idx = window_index(voted_at)
+    if idx <= window_index(timezone.now()) - MOMENTUM_WINDOWS:
+        return
+    slot = idx % MOMENTUM_WINDOWS
+
+    # Fast path: the slot already holds this window
+    updated = MomentumBucket.objects.filter(rumor_id=rumor_id, slot=slot, window_index=idx).update(
+        verify_count=F('verify_count') + verify_delta,
+        total_count=F('total_count') + total_delta,
+    )
+    if updated:
+        return
+
+    # Slot is empty or holds an older window: claim/recycle it under a row lock
+    with transaction.atomic():
+        bucket, _ = MomentumBucket.objects.select_for_update().get_or_create(
+            rumor_id=rumor_id, slot=slot, defaults={'window_index': idx}
+        )
+        if bucket.window_index > idx:
+            # Recycled by a newer window already; this vote has aged out
+            return
+        if bucket.window_index < idx:
+            bucket.window_index = idx
+            bucket.verify_count = 0
+            bucket.total_count = 0
+        bucket.verify_count += verify_delta
+        bucket.total_count += total_delta
+        bucket.save()
+
+def momentum_from_buckets(buckets, total_votes, now=None):
+    """
+    FR-5.3 momentum from (window_index, verify_count, total_count) rows:
+    lays the ring out as the last MOMENTUM_WINDOWS windows (oldest -> latest)
+    and hands them to the scoring kernel.
+    """
+    current = window_index(now or timezone.now())
+    by_window = {idx: (verify, total) for idx, verify, total in buckets}
+    windows = [by_window.get(idx, (0, 0)) for idx in range(current - MOMENTUM_WINDOWS + 1, current + 1)]
+    return scoring.momentum_score(
+        [verify for verify, _ in windows],
+        [total for _, total in windows],
+        total_votes,
+    )
+
+def calculate_momentum_score(rumor_id, total_votes, now=None):
+    """
+    M for one rumor: reads at most MOMENTUM_WINDOWS bucket rows.
+    """
+    buckets = MomentumBucket.objects.filter(rumor_id=rumor_id).values_list(
+        'window_index', 'verify_count', 'total_count'
+    )
+    return momentum_from_buckets(list(buckets), total_votes, now)
@@ -0,0 +1,124 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are read with a WHERE on the ordering columns of the last row seen
+instead of OFFSET, and without a COUNT, so a page costs the same at any scroll
+depth when a composite index matches the ordering. The ordering must end in a
+unique column (the primary key) so the position is unambiguous.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    `ordering` is a tuple of field names ('-' for descending). A view can
+    override it per request with get_keyset_ordering().
+    """
+    ordering = None
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        if hasattr(view, 'get_keyset_ordering'):
+            return view.get_keyset_ordering()
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, queryset, ordering, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            model = queryset.model
+            return [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(ordering, values)
+            ]
+        except (ValueError, TypeError, UnicodeDecodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def position_filter(self, ordering, values):
+        """
+        Rows strictly after `values` in `ordering`:
+        (a > a0) | (a = a0 & b > b0) | ... with > flipped for descending fields.
+        """
+        condition = Q()
+        for i in range(len(ordering) - 1, -1, -1):
+            name = ordering[i].lstrip('-')
+            lookup = 'lt' if ordering[i].startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            if i < len(ordering) - 1:
+                step |= Q(**{name: values[i]}) & condition
+            condition = step
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.position_filter(
+                self.ordering, self.decode_cursor(queryset, self.ordering, cursor)
+            ))
+
+        # One extra row tells whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = []
+        for name in self.ordering:
+            # Model instances, or .values() rows on the fast list path
+            value = last[name.lstrip('-')] if isinstance(last, dict) else getattr(last, name.lstrip('-'))
+            values.append(value if isinstance(value, (int, float, str)) else str(value))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+class RumorFeedPagination(KeysetPagination):
+    ordering = ('-created_at', '-rumor_id')
+
+class ProofListPagination(KeysetPagination):
+    ordering = ('-trust_score', '-proof_id')
+
+class LedgerPagination(KeysetPagination):
+    ordering = ('-created_at', '-event_id')
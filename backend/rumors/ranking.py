@@ -0,0 +1,66 @@
+"""
+Feed ranking signals kept on the Rumor row, so every sort mode is an index
+scan instead of a per-request vote aggregation.
+
+Trending: exponentially decayed vote activity, stored in log space. A vote
+at time t contributes e^(rate * t); trending_score holds the log of the sum,
+log(sum_i e^(rate * t_i)). The decayed activity at `now` is
+e^(trending_score - rate * now), which orders rumors exactly like
+trending_score itself, so the column never needs re-decaying and a vote
+updates it with a single log-add-exp in SQL.
+
+Controversial: how evenly VERIFY and DISPUTE votes split, scaled by volume.
+Refreshed with the trust recompute.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Exp, Greatest, Least, Ln
+
+def trending_rate():
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+def activity_log(at):
+    return trending_rate() * at.timestamp()
+
+def trending_update(voted_at):
+    """
+    Expression adding one vote cast at voted_at to trending_score:
+    max(a, b) + ln(1 + exp(min(a, b) - max(a, b))), which can't overflow.
+    """
+    vote = Value(activity_log(voted_at))
+    current = F('trending_score')
+    return Case(
+        When(trending_score__isnull=True, then=vote),
+        default=Greatest(current, vote) + Ln(Value(1.0) + Exp(Least(current, vote) - Greatest(current, vote))),
+    )
+
+def decayed_activity(trending_score, now):
+    """
+    Vote activity at `now`, in votes (a vote cast now counts 1, one half-life ago 0.5).
+    """
+    if trending_score is None:
+        return 0.0
+    return math.exp(trending_score - activity_log(now))
+
+def trending_score(voted_at_list):
+    """
+    trending_score from scratch for a rumor's vote times (used by backfills).
+    """
+    logs = [activity_log(at) for at in voted_at_list]
+    if not logs:
+        return None
+    peak = max(logs)
+    return peak + math.log(sum(math.exp(x - peak) for x in logs))
+
+def controversy_score(verify_count, dispute_count):
+    """
+    balance * ln(1 + votes): balance is 1 for an even VERIFY/DISPUTE split and
+    0 for a one-sided one, and the log favors rumors with more votes.
+    """
+    total = verify_count + dispute_count
+    if not total:
+        return 0.0
+    balance = 1 - abs(verify_count - dispute_count) / total
+    return balance * math.log1p(total)
@@ -0,0 +1,258 @@
+"""
+Trust-formula replay: rebuild every rumor's trust trajectory from the
+Vote / ProofVote / Proof history under a parameterized formula, so a proposed
+change can be compared against production before its public review period.
+
+Votes and proof votes are streamed from the database in timestamp order
+(server-side iterators, merged with heapq) and folded into per-rumor /
+per-proof numpy state in O(1) per event. Scores are only evaluated at
+checkpoints, for all rumors at once, through the batch kernel in scoring.py.
+
+Limitations: the Vote table keeps only the current state of a changed vote,
+so a change is replayed as if the final vote had been cast at voted_at.
+"""
+import heapq
+from decimal import Decimal
+
+import numpy as np
+
+from . import scoring
+from .models import Rumor, Vote, Proof, ProofVote
+
+STREAM_CHUNK_SIZE = 5000
+VOTE_EVENT = 0
+PROOF_VOTE_EVENT = 1
+
+class FormulaParams:
+    """
+    One trust formula. Defaults are the production constants.
+    """
+    def __init__(self, vote_weight=scoring.VOTE_WEIGHT, proof_weight=scoring.PROOF_WEIGHT,
+                 momentum_weight=scoring.MOMENTUM_WEIGHT, maturity_votes=scoring.PROOF_MATURITY_VOTES,
+                 window_hours=6, windows=4, volatility_threshold=scoring.VOLATILITY_THRESHOLD,
+                 min_momentum_votes=scoring.MIN_MOMENTUM_VOTES):
+        self.weights = (Decimal(vote_weight), Decimal(proof_weight), Decimal(momentum_weight))
+        self.maturity_votes = maturity_votes
+        self.window_seconds = window_hours * 3600
+        self.windows = windows
+        self.volatility_threshold = volatility_threshold
+        self.min_momentum_votes = min_momentum_votes
+
+    def describe(self):
+        return {
+            'weights': [float(w) for w in self.weights],
+            'maturity_votes': self.maturity_votes,
+            'window_hours': self.window_seconds / 3600,
+            'windows': self.windows,
+            'volatility_threshold': self.volatility_threshold,
+            'min_momentum_votes': self.min_momentum_votes,
+        }
+
+class TrustReplay:
+    """
+    Replay state for one formula. Vote and proof sums are plain arrays; the
+    momentum windows are a per-rumor ring (slot = window % windows) of counts
+    plus the window index each slot currently holds.
+    """
+    def __init__(self, params, rumor_count, proof_rumor_idx):
+        self.params = params
+        self.weighted_sum = np.zeros(rumor_count)
+        self.total_weight = np.zeros(rumor_count)
+        self.vote_count = np.zeros(rumor_count, dtype=np.int64)
+
+        self.ring_window = np.full((rumor_count, params.windows), -1, dtype=np.int64)
+        self.ring_verify = np.zeros((rumor_count, params.windows))
+        self.ring_total = np.zeros((rumor_count, params.windows))
+
+        self.proof_rumor_idx = proof_rumor_idx
+        self.proof_weighted_sum = np.zeros(len(proof_rumor_idx))
+        self.proof_total_weight = np.zeros(len(proof_rumor_idx))
+        self.proof_vote_count = np.zeros(len(proof_rumor_idx), dtype=np.int64)
+
+        # Classification code per rumor at the previous checkpoint, and how often it changed
+        self.last_class = np.full(rumor_count, -1, dtype=np.int64)
+        self.class_changes = np.zeros(rumor_count, dtype=np.int64)
+
+    def apply_vote(self, t, rumor_idx, value, weight, is_verify):
+        self.weighted_sum[rumor_idx] += value * weight
+        self.total_weight[rumor_idx] += weight
+        self.vote_count[rumor_idx] += 1
+
+        idx = int(t // self.params.window_seconds)
+        slot = idx % self.params.windows
+        if self.ring_window[rumor_idx, slot] != idx:
+            self.ring_window[rumor_idx, slot] = idx
+            self.ring_verify[rumor_idx, slot] = 0
+            self.ring_total[rumor_idx, slot] = 0
+        self.ring_verify[rumor_idx, slot] += is_verify
+        self.ring_total[rumor_idx, slot] += 1
+
+    def apply_proof_vote(self, proof_idx, value, weight):
+        self.proof_weighted_sum[proof_idx] += value * weight
+        self.proof_total_weight[proof_idx] += weight
+        self.proof_vote_count[proof_idx] += 1
+
+    def evaluate(self, t):
+        """
+        V, P, M and TrustScore for every rumor as of time t (vectorized).
+        """
+        params = self.params
+        n = len(self.weighted_sum)
+
+        V = scoring.batch_vote_scores(self.weighted_sum, self.total_weight)
+
+        # Proof scores are stored at 0.01 precision before P averages them
+        proof_scores = np.round(np.where(
+            self.proof_total_weight > 0,
+            self.proof_weighted_sum / np.where(self.proof_total_weight > 0, self.proof_total_weight, 1),
+            0.0,
+        ), 2)
+        mature = self.proof_vote_count >= params.maturity_votes
+        P = scoring.batch_proof_scores(
+            np.bincount(self.proof_rumor_idx[mature], weights=proof_scores[mature], minlength=n),
+            np.bincount(self.proof_rumor_idx[mature], minlength=n),
+        )
+
+        # Lay the ring out oldest -> latest relative to t; slots holding older windows read as empty
+        current = int(t // params.window_seconds)
+        verify = np.zeros((n, params.windows))
+        totals = np.zeros((n, params.windows))
+        for k in range(params.windows):
+            idx = current - params.windows + 1 + k
+            slot = idx % params.windows
+            live = self.ring_window[:, slot] == idx
+            verify[:, k] = np.where(live, self.ring_verify[:, slot], 0)
+            totals[:, k] = np.where(live, self.ring_total[:, slot], 0)
+        M = np.round(scoring.batch_momentum_scores(
+            verify, totals, self.vote_count,
+            min_votes=params.min_momentum_votes,
+            volatility_threshold=params.volatility_threshold,
+        ), 2)
+
+        T = scoring.batch_trust_scores(V, P, M, weights=params.weights)
+        return V, P, M, T
+
+    def checkpoint(self, t, active):
+        """
+        Records classification changes of rumors that exist at time t.
+        """
+        _, _, _, T = self.evaluate(t)
+        codes = scoring.batch_classify(stored_scores(T))
+        changed = active & (self.last_class >= 0) & (codes != self.last_class)
+        self.class_changes += changed
+        self.last_class = np.where(active, codes, self.last_class)
+
+def stored_scores(T):
+    # Bands apply to the stored 0.01 score; classifying the raw float would put
+    # e.g. 0.3999999999999999 below the 0.40 band edge
+    return np.round(T, 2)
+
+def _stream_votes(rumor_index):
+    rows = Vote.objects.order_by('voted_at').values_list(
+        'voted_at', 'rumor_id', 'vote_value', 'weight_snapshot', 'vote_type'
+    ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for voted_at, rumor_id, value, weight, vote_type in rows:
+        if rumor_id in rumor_index:
+            yield voted_at.timestamp(), VOTE_EVENT, rumor_index[rumor_id], float(value), float(weight), vote_type == 'VERIFY'
+
+def _stream_proof_votes(proof_index):
+    rows = ProofVote.objects.order_by('voted_at').values_list(
+        'voted_at', 'proof_id', 'vote_type', 'weight_snapshot'
+    ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for voted_at, proof_id, vote_type, weight in rows:
+        if proof_id in proof_index:
+            value = float(scoring.PROOF_VOTE_VALUES[vote_type])
+            yield voted_at.timestamp(), PROOF_VOTE_EVENT, proof_index[proof_id], value, float(weight), False
+
+def replay(formulas, until, step_hours=6):
+    """
+    Streams the vote history once and folds it into one TrustReplay per formula.
+    Returns (rumor_ids, rumor columns, {name: TrustReplay}) with every replay
+    evaluated up to `until`.
+    """
+    rumor_rows = list(
+        Rumor.objects.filter(is_deleted=False, created_at__lte=until)
+        .order_by('created_at')
+        .values_list('rumor_id', 'created_at', 'trust_score', 'classification')
+    )
+    rumor_ids = [row[0] for row in rumor_rows]
+    rumor_index = {rumor_id: i for i, rumor_id in enumerate(rumor_ids)}
+    created = np.array([row[1].timestamp() for row in rumor_rows])
+
+    proof_rows = list(
+        Proof.objects.filter(is_deleted=False, rumor_id__in=rumor_index.keys())
+        .values_list('proof_id', 'rumor_id')
+    )
+    proof_index = {proof_id: i for i, (proof_id, _) in enumerate(proof_rows)}
+    proof_rumor_idx = np.array([rumor_index[rumor_id] for _, rumor_id in proof_rows], dtype=np.int64)
+
+    replays = {name: TrustReplay(params, len(rumor_ids), proof_rumor_idx) for name, params in formulas.items()}
+
+    step = step_hours * 3600
+    end = until.timestamp()
+    next_checkpoint = None
+    events = heapq.merge(_stream_votes(rumor_index), _stream_proof_votes(proof_index), key=lambda e: e[0])
+    for t, kind, idx, value, weight, is_verify in events:
+        if t > end:
+            break
+        if next_checkpoint is None:
+            next_checkpoint = (t // step + 1) * step
+        while t >= next_checkpoint:
+            active = created <= next_checkpoint
+            for state in replays.values():
+                state.checkpoint(next_checkpoint, active)
+            next_checkpoint += step
+
+        for state in replays.values():
+            if kind == VOTE_EVENT:
+                state.apply_vote(t, idx, value, weight, is_verify)
+            else:
+                state.apply_proof_vote(idx, value, weight)
+
+    active = created <= end
+    for state in replays.values():
+        state.checkpoint(end, active)
+
+    columns = {
+        'stored_trust_score': np.array([float(row[2]) for row in rumor_rows]),
+        'stored_classification': [row[3] for row in rumor_rows],
+    }
+    return rumor_ids, columns, replays
+
+def compare(baseline, candidate, until, bins=10):
+    """
+    Distribution shift and classification flips of `candidate` vs `baseline`.
+    """
+    t = until.timestamp()
+    base_T = baseline.evaluate(t)[3]
+    cand_T = candidate.evaluate(t)[3]
+    base_class = scoring.batch_classify(stored_scores(base_T))
+    cand_class = scoring.batch_classify(stored_scores(cand_T))
+
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    labels = [label for _, label in scoring.CLASSIFICATIONS]
+    flips = {}
+    for b, c in zip(base_class[base_class != cand_class], cand_class[base_class != cand_class]):
+        key = f'{labels[b]} -> {labels[c]}'
+        flips[key] = flips.get(key, 0) + 1
+
+    diff = cand_T - base_T
+    return {
+        'rumors': len(base_T),
+        'mean': (float(base_T.mean()) if len(base_T) else 0.0, float(cand_T.mean()) if len(cand_T) else 0.0),
+        'std': (float(base_T.std()) if len(base_T) else 0.0, float(cand_T.std()) if len(cand_T) else 0.0),
+        'mean_abs_shift': float(np.abs(diff).mean()) if len(diff) else 0.0,
+        'max_abs_shift': float(np.abs(diff).max()) if len(diff) else 0.0,
+        'histogram_edges': edges.tolist(),
+        'histogram': (
+            np.histogram(base_T, bins=edges)[0].tolist(),
+            np.histogram(cand_T, bins=edges)[0].tolist(),
+        ),
+        'class_counts': (
+            np.bincount(base_class, minlength=len(labels)).tolist(),
+            np.bincount(cand_class, minlength=len(labels)).tolist(),
+        ),
+        'flips': flips,
+        'flip_count': int((base_class != cand_class).sum()),
+        'trajectory_changes': (int(baseline.class_changes.sum()), int(candidate.class_changes.sum())),
+    }
@@ -0,0 +1,130 @@
+"""
+Versioned response cache for anonymous reads.
+
+Every cacheable scope ('feed', and 'rumor:<id>' per rumor) has a version
+counter in the shared cache. Responses are stored under the version current
+when they were built, so bumping the counter invalidates exactly the affected
+responses: writers bump after their change commits, and stale entries are
+never read again and simply expire.
+
+The version and request path also make up the ETag, so a client presenting a
+current If-None-Match gets a 304 without the response being built or fetched.
+
+A cache outage never fails a request: reads are built uncached, and a bump
+that couldn't be written is logged (the superseded entries still expire
+after RESPONSE_CACHE_SECONDS).
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'respver:{}'
+RESPONSE_KEY = 'resp:{}:{}:{}'
+FEED_SCOPE = 'feed'
+
+def rumor_scope(rumor_id):
+    return f'rumor:{rumor_id}'
+
+def _fresh_version():
+    # Counters start from the clock, so an evicted counter never reuses an old version
+    return int(time.time() * 1000)
+
+def get_version(scope):
+    key = VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+def bump_version(scope):
+    key = VERSION_KEY.format(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _fresh_version(), timeout=None)
+
+def bump_rumor_versions(rumor_ids):
+    """
+    Invalidates the cached detail of these rumors and every cached feed page,
+    once the current transaction commits.
+    """
+    scopes = [rumor_scope(rumor_id) for rumor_id in rumor_ids] + [FEED_SCOPE]
+
+    def bump():
+        try:
+            for scope in scopes:
+                bump_version(scope)
+        except Exception:
+            # The write has committed; a cache outage must not fail its request
+            logger.exception('Could not bump response-cache versions of %d scopes', len(scopes))
+    transaction.on_commit(bump)
+
+def _matches(if_none_match, etag):
+    return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+
+class VersionedResponseCacheMixin:
+    """
+    Serves anonymous list/retrieve responses from the versioned cache.
+    Authenticated responses carry per-user fields (user_vote) and are never cached.
+    """
+    def get_cache_scope(self):
+        """
+        Scope of this request, or None if it can't be cached (malformed id).
+        """
+        if self.action != 'retrieve':
+            return FEED_SCOPE
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            # Canonical id, so every spelling of it shares the rumor's version
+            return rumor_scope(self.queryset.model._meta.pk.to_python(lookup))
+        except ValidationError:
+            return None
+
+    def cached_response(self, request, build):
+        scope = self.get_cache_scope()
+        if scope is None or request.user.is_authenticated:
+            return build()
+
+        try:
+            version = get_version(scope)
+        except Exception:
+            # Serve uncached while the cache is down
+            logger.exception('Could not read the response-cache version of %s', scope)
+            return build()
+        digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        etag = f'"{version}-{digest}"'
+        if _matches(request.headers.get('If-None-Match', ''), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        key = RESPONSE_KEY.format(scope, version, digest)
+        try:
+            data = cache.get(key)
+        except Exception:
+            logger.exception('Could not read a cached response of %s', scope)
+            return build()
+        if data is None:
+            response = build()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            try:
+                cache.set(key, data, timeout=settings.RESPONSE_CACHE_SECONDS)
+            except Exception:
+                logger.exception('Could not cache a response of %s', scope)
+        return Response(data, headers={'ETag': etag})
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(VersionedResponseCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(VersionedResponseCacheMixin, self).retrieve(request, *args, **kwargs))
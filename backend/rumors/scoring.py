@@ -0,0 +1,186 @@
+"""
+Trust-scoring kernel: the V/P/M/TrustScore math with no ORM access.
+
+Two paths share the same formulas:
+- Scalar functions take Decimals/ints and are used by the online recompute.
+- batch_* functions take numpy arrays (one entry per rumor) and are used by
+  bulk recomputes and simulations.
+
+Values are stored in DecimalField(4, 2) columns; quantize_score/batch_quantize
+give the exact stored value, and batch_quantize defers to the scalar path for
+the few float results that sit within rounding error of a 0.005 tie, so both
+paths always store identical scores.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+
+# TrustScore = 0.50(V) + 0.30(P) + 0.20(M)
+VOTE_WEIGHT = Decimal('0.50')
+PROOF_WEIGHT = Decimal('0.30')
+MOMENTUM_WEIGHT = Decimal('0.20')
+NEUTRAL = Decimal('0.50')
+RUMOR_VOTE_VALUES = {'VERIFY': Decimal('1.0'), 'UNCERTAIN': Decimal('0.5'), 'DISPUTE': Decimal('0.0')}
+
+# Proofs (PRD FR-4.3): only mature proofs feed P
+PROOF_MATURITY_VOTES = 10
+PROOF_VOTE_VALUES = {'SUPPORTS': Decimal('1.0'), 'UNCERTAIN': Decimal('0.5'), 'REFUTES': Decimal('0.0')}
+
+# Momentum (PRD FR-5.3)
+MIN_MOMENTUM_VOTES = 5
+VOLATILITY_THRESHOLD = 0.4
+
+# Classification bands (PRD FR-2.4), lower bounds checked top-down
+CLASSIFICATIONS = [
+    (Decimal('0.75'), 'VERIFIED_TRUE'),
+    (Decimal('0.60'), 'LIKELY_TRUE'),
+    (Decimal('0.40'), 'UNCERTAIN'),
+    (Decimal('0.25'), 'LIKELY_FALSE'),
+    (Decimal('0.00'), 'VERIFIED_FALSE'),
+]
+
+SCORE_QUANTUM = Decimal('0.01')
+# Float results closer than this to a rounding tie are recomputed exactly
+TIE_TOLERANCE = 1e-9
+
+# --- Scalar path ---
+
+def quantize_score(value):
+    """
+    Value as stored in a DecimalField(4, 2) score column.
+    """
+    return Decimal(value).quantize(SCORE_QUANTUM, rounding=ROUND_HALF_EVEN)
+
+def weighted_average(values, weights, default):
+    """
+    sum(value * weight) / sum(weight) over Decimals; `default` when there is no weight.
+    """
+    weighted_sum = Decimal('0')
+    total_weight = Decimal('0')
+    for value, weight in zip(values, weights):
+        weighted_sum += Decimal(value) * Decimal(weight)
+        total_weight += Decimal(weight)
+    if total_weight > 0:
+        return weighted_sum / total_weight
+    return default
+
+def vote_score(weighted_sum, total_weight):
+    """
+    V from running aggregates. 0.50 (neutral) without votes.
+    """
+    if total_weight > 0:
+        return Decimal(weighted_sum) / Decimal(total_weight)
+    return NEUTRAL
+
+def proof_score(mature_scores):
+    """
+    P: plain average of mature proofs' trust scores. 0.50 without mature proofs.
+    """
+    mature_scores = list(mature_scores)
+    if not mature_scores:
+        return NEUTRAL
+    return sum((Decimal(score) for score in mature_scores), Decimal('0')) / len(mature_scores)
+
+def momentum_score(verify_counts, total_counts, total_votes):
+    """
+    M over windows ordered oldest -> latest.
+    - <5 votes overall or <2 active windows -> 0.5 (neutral)
+    - Base score is the latest active window's verify ratio
+    - Max delta between consecutive active windows above 0.4 is penalized by 2x the excess
+    """
+    if total_votes < MIN_MOMENTUM_VOTES:
+        return NEUTRAL
+
+    verify_ratios = [
+        verify / total
+        for verify, total in zip(verify_counts, total_counts)
+        if total > 0
+    ]
+    if len(verify_ratios) < 2:
+        return NEUTRAL
+
+    max_delta = max(
+        abs(verify_ratios[i + 1] - verify_ratios[i])
+        for i in range(len(verify_ratios) - 1)
+    )
+
+    base_score = verify_ratios[-1] # Latest window
+    if max_delta > VOLATILITY_THRESHOLD:
+        penalty = (max_delta - VOLATILITY_THRESHOLD) * 2
+        return Decimal(str(max(0.0, base_score - penalty))).quantize(SCORE_QUANTUM)
+
+    return Decimal(str(base_score)).quantize(SCORE_QUANTUM)
+
+def trust_score(V, P, M):
+    return (VOTE_WEIGHT * V) + (PROOF_WEIGHT * P) + (MOMENTUM_WEIGHT * M)
+
+def classify(score):
+    for lower_bound, classification in CLASSIFICATIONS:
+        if score >= lower_bound:
+            return classification
+    return CLASSIFICATIONS[-1][1]
+
+# --- Batch path (numpy, one entry per rumor) ---
+
+def batch_vote_scores(weighted_sum, total_weight):
+    safe_weight = np.where(total_weight > 0, total_weight, 1.0)
+    return np.where(total_weight > 0, weighted_sum / safe_weight, float(NEUTRAL))
+
+def batch_proof_scores(score_sum, mature_count):
+    return np.where(mature_count > 0, score_sum / np.maximum(mature_count, 1), float(NEUTRAL))
+
+def batch_momentum_scores(verify, totals, vote_count,
+                          min_votes=MIN_MOMENTUM_VOTES, volatility_threshold=VOLATILITY_THRESHOLD):
+    """
+    momentum_score over an (n, windows) matrix, columns oldest -> latest.
+    Empty windows are skipped when measuring deltas between consecutive windows.
+    Unlike the scalar path this doesn't round; pass the result through
+    batch_quantize (it performs the same float ops, so rounding agrees).
+    """
+    n = verify.shape[0]
+    ratios = verify / np.where(totals > 0, totals, 1)
+    latest = np.full(n, np.nan)
+    max_delta = np.zeros(n)
+    active = np.zeros(n, dtype=np.int64)
+    for k in range(verify.shape[1]):
+        has_votes = totals[:, k] > 0
+        delta = np.where(has_votes & ~np.isnan(latest), np.abs(ratios[:, k] - np.nan_to_num(latest)), 0.0)
+        max_delta = np.maximum(max_delta, delta)
+        latest = np.where(has_votes, ratios[:, k], latest)
+        active += has_votes
+
+    penalty = np.where(max_delta > volatility_threshold, (max_delta - volatility_threshold) * 2, 0.0)
+    score = np.maximum(0.0, np.nan_to_num(latest) - penalty)
+    neutral = (vote_count < min_votes) | (active < 2)
+    return np.where(neutral, float(NEUTRAL), score)
+
+def batch_trust_scores(V, P, M, weights=(VOTE_WEIGHT, PROOF_WEIGHT, MOMENTUM_WEIGHT)):
+    vote_weight, proof_weight, momentum_weight = (float(w) for w in weights)
+    return vote_weight * V + proof_weight * P + momentum_weight * M
+
+def batch_classify(scores):
+    """
+    Index into CLASSIFICATIONS for every score (0 = VERIFIED_TRUE ... 4 = VERIFIED_FALSE).
+    """
+    codes = np.full(len(scores), len(CLASSIFICATIONS) - 1, dtype=np.int64)
+    for code in range(len(CLASSIFICATIONS) - 2, -1, -1):
+        codes = np.where(scores >= float(CLASSIFICATIONS[code][0]), code, codes)
+    return codes
+
+def near_ties(values):
+    """
+    Mask of float values too close to a 0.005 rounding tie to quantize safely.
+    """
+    scaled = np.asarray(values, dtype=np.float64) * 100
+    return np.abs(scaled - np.floor(scaled) - 0.5) < TIE_TOLERANCE * 100
+
+def batch_quantize(values, exact=None):
+    """
+    Stored Decimal for every float in `values`. For entries at a rounding tie,
+    exact(i) is called to get the exact Decimal from the scalar path.
+    """
+    ties = near_ties(values) if exact is not None else np.zeros(len(values), dtype=bool)
+    return [
+        quantize_score(exact(i)) if tie else quantize_score(repr(float(value)))
+        for i, (value, tie) in enumerate(zip(values, ties))
+    ]
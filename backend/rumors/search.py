@@ -0,0 +1,130 @@
+"""
+Full-text search over rumor and proof content, backed by the database's own
+inverted index:
+
+- SQLite: an FTS5 table per model (rumors_rumor_fts, rumors_proof_fts), kept
+  in sync by the save/delete receivers below. Rows are keyed by a rowid
+  derived from the object's UUID, so a sync is an indexed delete + insert.
+  Only live (not soft-deleted) objects are indexed.
+- PostgreSQL: a generated tsvector column with a GIN index on each table, which
+  the database keeps in sync by itself; soft-deleted rows are filtered out at
+  query time.
+
+Both are created by migration 0008_search. search_ids() returns primary keys
+in rank order (best first).
+"""
+import re
+
+from django.db import connection
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Rumor, Proof
+
+FTS_TABLES = {Rumor: 'rumors_rumor_fts', Proof: 'rumors_proof_fts'}
+SEARCH_CONFIG = 'english'
+REINDEX_CHUNK_SIZE = 1000
+
+# Unsaved content changes and soft deletes are the only saves that touch the index
+INDEXED_FIELDS = {'content', 'is_deleted'}
+
+def fts_rowid(pk):
+    # First 63 bits of the (random) UUID: a positive SQLite integer, unique in practice
+    return pk.int >> 65
+
+def search_terms(query):
+    """
+    Words of a free-text query; anything else (quotes, operators) is dropped.
+    """
+    return re.findall(r'\w+', query.lower())
+
+def _fts_match(terms):
+    # Every word must match; the last one may be a prefix (search-as-you-type)
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def search_ids(model, query, offset=0, limit=20):
+    """
+    Primary keys of live objects matching `query`, best match first.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'SELECT {pk} FROM {table}, to_tsquery(%s, %s) query '
+                f'WHERE search_vector @@ query AND NOT is_deleted '
+                f'ORDER BY ts_rank_cd(search_vector, query) DESC, {pk} LIMIT %s OFFSET %s',
+                [SEARCH_CONFIG, ' & '.join(terms[:-1] + [terms[-1] + ':*']), limit, offset]
+            )
+        else:
+            fts = FTS_TABLES[model]
+            cursor.execute(
+                f'SELECT object_id FROM {fts} WHERE {fts} MATCH %s ORDER BY rank LIMIT %s OFFSET %s',
+                [_fts_match(terms), limit, offset]
+            )
+        rows = cursor.fetchall()
+    to_python = model._meta.pk.to_python
+    return [to_python(row[0]) for row in rows]
+
+def _uses_fts():
+    return connection.vendor == 'sqlite'
+
+def index_objects(model, objs):
+    """
+    Writes the current content of objs to the FTS index (dropping deleted ones).
+    """
+    fts = FTS_TABLES[model]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {fts} WHERE rowid = %s', [(fts_rowid(obj.pk),) for obj in objs])
+        cursor.executemany(
+            f'INSERT INTO {fts} (rowid, object_id, content) VALUES (%s, %s, %s)',
+            [(fts_rowid(obj.pk), obj.pk.hex, obj.content or '') for obj in objs if not obj.is_deleted]
+        )
+
+def unindex_objects(model, pks):
+    fts = FTS_TABLES[model]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {fts} WHERE rowid = %s', [(fts_rowid(pk),) for pk in pks])
+
+def reindex(model):
+    """
+    Rebuilds the whole index of one model. Returns the number of live objects indexed.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {model._meta.db_table}_search_idx')
+        return model.objects.filter(is_deleted=False).count()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLES[model]}')
+    indexed = 0
+    rows = model.objects.filter(is_deleted=False).only('pk', 'content', 'is_deleted').iterator(chunk_size=REINDEX_CHUNK_SIZE)
+    chunk = []
+    for obj in rows:
+        chunk.append(obj)
+        if len(chunk) == REINDEX_CHUNK_SIZE:
+            index_objects(model, chunk)
+            indexed += len(chunk)
+            chunk = []
+    index_objects(model, chunk)
+    return indexed + len(chunk)
+
+@receiver(post_save, sender=Rumor)
+@receiver(post_save, sender=Proof)
+def _indexed_object_saved(sender, instance, update_fields=None, **kwargs):
+    if not _uses_fts():
+        return
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    index_objects(sender, [instance])
+
+@receiver(post_delete, sender=Rumor)
+@receiver(post_delete, sender=Proof)
+def _indexed_object_deleted(sender, instance, **kwargs):
+    if _uses_fts():
+        unindex_objects(sender, [instance.pk])
@@ -6,6 +6,8 @@ class VoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vote
         fields = ['vote_type', 'vote_value']
+        # Derived from vote_type in validate()
+        extra_kwargs = {'vote_value': {'required': False}}
     
     def validate(self, data):
         # Map vote_type to vote_value if not provided?
@@ -14,52 +16,111 @@ class VoteSerializer(serializers.ModelSerializer):
             data['vote_value'] = vote_map.get(data['vote_type'])
         return data
 
-class RumorSerializer(serializers.ModelSerializer):
-    vote_count = serializers.IntegerField(read_only=True)
-    proof_count = serializers.IntegerField(read_only=True)
+class ProofVoteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProofVote
+        fields = ['vote_type', 'vote_value']
+        extra_kwargs = {'vote_value': {'required': False}}
+
+    def validate(self, data):
+        vote_map = {'SUPPORTS': 1.0, 'UNCERTAIN': 0.5, 'REFUTES': 0.0}
+        if 'vote_type' in data:
+            data['vote_value'] = vote_map.get(data['vote_type'])
+        return data
+
+# Votes accepted in one batch request
+MAX_BATCH_VOTES = 100
+
+class BatchRumorVoteSerializer(serializers.Serializer):
+    rumor_id = serializers.UUIDField()
+    vote_type = serializers.ChoiceField(choices=Vote.VOTE_TYPES)
+
+class BatchProofVoteSerializer(serializers.Serializer):
+    proof_id = serializers.UUIDField()
+    vote_type = serializers.ChoiceField(choices=ProofVote.VOTE_TYPES)
+
+class VoteBatchSerializer(serializers.Serializer):
+    rumor_votes = BatchRumorVoteSerializer(many=True, required=False, default=list)
+    proof_votes = BatchProofVoteSerializer(many=True, required=False, default=list)
+
+    def validate(self, data):
+        total = len(data['rumor_votes']) + len(data['proof_votes'])
+        if not total:
+            raise serializers.ValidationError('No votes given')
+        if total > MAX_BATCH_VOTES:
+            raise serializers.ValidationError(f'At most {MAX_BATCH_VOTES} votes per batch')
+        for key, target in (('rumor_votes', 'rumor_id'), ('proof_votes', 'proof_id')):
+            ids = [item[target] for item in data[key]]
+            if len(ids) != len(set(ids)):
+                raise serializers.ValidationError({key: f'Each {target} may appear only once'})
+        return data
+
+class UserVoteListSerializer(serializers.ListSerializer):
+    """
+    Looks up the requesting user's votes for the whole page in one query
+    before serializing its rows.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.child.prefetch_user_votes(items)
+        return super().to_representation(items)
+
+class UserVoteMixin:
+    """
+    user_vote for serializers of voted-on objects. vote_model is the vote
+    table and vote_target its FK to the serialized model.
+    """
+    vote_model = None
+    vote_target = None
+
+    def prefetch_user_votes(self, objs):
+        request = self.context.get('request')
+        self._user_votes = {}
+        if request and request.user.is_authenticated and objs:
+            self._user_votes = dict(self.vote_model.objects.filter(
+                voter=request.user, **{f'{self.vote_target}_id__in': [obj.pk for obj in objs]}
+            ).values_list(f'{self.vote_target}_id', 'vote_type'))
+
+    def get_user_vote(self, obj):
+        # Outside a list (detail views), look up just this row
+        if getattr(self, '_user_votes', None) is None:
+            self.prefetch_user_votes([obj])
+        return self._user_votes.get(obj.pk)
+
+class RumorSerializer(UserVoteMixin, serializers.ModelSerializer):
+    # Annotated by the feed queryset; default covers freshly created instances
+    vote_count = serializers.IntegerField(read_only=True, default=0)
     author_username = serializers.CharField(source='author.username', read_only=True)
     user_vote = serializers.SerializerMethodField()
 
+    vote_model = Vote
+    vote_target = 'rumor'
+
     class Meta:
         model = Rumor
+        list_serializer_class = UserVoteListSerializer
         fields = [
             'rumor_id', 'content', 'evidence_type', 'evidence_url',
             'trust_score', 'vote_score', 'proof_score', 'momentum_score',
             'classification', 'is_frozen', 'created_at',
-            'vote_count', 'proof_count', 'author_username', 'user_vote'
+            'vote_count', 'verify_count', 'uncertain_count', 'dispute_count',
+            'proof_count', 'mature_proof_count', 'author_username', 'user_vote'
         ]
         read_only_fields = [
             'rumor_id', 'trust_score', 'vote_score', 'proof_score', 'momentum_score',
-            'classification', 'is_frozen', 'created_at', 'vote_count', 'proof_count', 'author_username', 'user_vote'
+            'classification', 'is_frozen', 'created_at', 'vote_count', 'verify_count', 'uncertain_count',
+            'dispute_count', 'proof_count', 'mature_proof_count', 'author_username', 'user_vote'
         ]
 
-    def get_user_vote(self, obj):
-        # Optimized: prefetch user_vote in ViewSet
-        # Or simple query for MVP
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                vote = Vote.objects.get(rumor=obj, voter=request.user)
-                return vote.vote_type
-            except Vote.DoesNotExist:
-                return None
-        return None
-
-class ProofSerializer(serializers.ModelSerializer):
+class ProofSerializer(UserVoteMixin, serializers.ModelSerializer):
     poster_username = serializers.CharField(source='poster.username', read_only=True)
     user_vote = serializers.SerializerMethodField()
 
+    vote_model = ProofVote
+    vote_target = 'proof'
+
     class Meta:
         model = Proof
+        list_serializer_class = UserVoteListSerializer
         fields = '__all__'
         read_only_fields = ['proof_id', 'trust_score', 'vote_count', 'is_mature', 'is_classified', 'created_at']
-
-    def get_user_vote(self, obj):
-         request = self.context.get('request')
-         if request and request.user.is_authenticated:
-             try:
-                 vote = ProofVote.objects.get(proof=obj, voter=request.user)
-                 return vote.vote_type
-             except ProofVote.DoesNotExist:
-                 return None
-         return None
@@ -1,10 +1,359 @@
 from decimal import Decimal
 import math
-from django.utils import timezone
-from datetime import timedelta
+import uuid
+import numpy as np
 from .models import Rumor, Vote, Proof, ProofVote
-from audit.models import AuditLog, ReputationEvent
-from django.db import transaction
+from .momentum import calculate_momentum_score, record_vote
+from .weights import get_vote_weight
+from .response_cache import bump_rumor_versions
+from . import ranking, scoring, settlement
+from audit.models import ReputationEvent
+from audit.writer import audit_writer
+from django.db import connection, transaction
+from django.utils import timezone
+from django.db.models import F, Q, Sum, Count, DecimalField, ExpressionWrapper
+
+# A voter may change their vote on a rumor this many times
+MAX_VOTE_CHANGES = 3
+
+# Vote type -> Rumor counter column maintained alongside the weighted aggregates
+VOTE_COUNT_FIELDS = {
+    'VERIFY': 'verify_count',
+    'UNCERTAIN': 'uncertain_count',
+    'DISPUTE': 'dispute_count',
+}
+
+def apply_vote_delta(rumor_id, old_vote=None, new_vote=None, voted_at=None):
+    """
+    Adjusts a rumor's running vote aggregates by the difference between two
+    states of one vote. Each state is a (vote_type, vote_value, weight) tuple;
+    old_vote is None for a fresh vote, new_vote is None for a removed one.
+    voted_at (fresh votes only) also adds the vote to the trending score.
+    The update is a single F-expression UPDATE so concurrent votes don't race.
+    """
+    weighted_delta = Decimal('0')
+    weight_delta = Decimal('0')
+    count_deltas = {}
+
+    if old_vote is not None:
+        vote_type, value, weight = old_vote
+        weighted_delta -= Decimal(value) * Decimal(weight)
+        weight_delta -= Decimal(weight)
+        field = VOTE_COUNT_FIELDS[vote_type]
+        count_deltas[field] = count_deltas.get(field, 0) - 1
+
+    if new_vote is not None:
+        vote_type, value, weight = new_vote
+        weighted_delta += Decimal(value) * Decimal(weight)
+        weight_delta += Decimal(weight)
+        field = VOTE_COUNT_FIELDS[vote_type]
+        count_deltas[field] = count_deltas.get(field, 0) + 1
+
+    updates = {field: F(field) + delta for field, delta in count_deltas.items() if delta}
+    if weighted_delta:
+        updates['vote_weighted_sum'] = F('vote_weighted_sum') + weighted_delta
+    if weight_delta:
+        updates['vote_total_weight'] = F('vote_total_weight') + weight_delta
+    if voted_at is not None and old_vote is None and new_vote is not None:
+        updates['trending_score'] = ranking.trending_update(voted_at)
+
+    if updates:
+        Rumor.objects.filter(pk=rumor_id).update(**updates)
+
+def apply_proof_delta(rumor_id, proofs=0, mature=0):
+    """
+    Adjusts a rumor's proof counters in a single F-expression UPDATE.
+    """
+    updates = {}
+    if proofs:
+        updates['proof_count'] = F('proof_count') + proofs
+    if mature:
+        updates['mature_proof_count'] = F('mature_proof_count') + mature
+    if updates:
+        Rumor.objects.filter(pk=rumor_id).update(**updates)
+
+def compute_proof_counts(rumor_ids=None):
+    """
+    Full recompute of the proof counters from the Proof table, for reconciliation.
+    Returns {rumor_id: {'proof_count': n, 'mature_proof_count': m}} for rumors with live proofs.
+    """
+    proofs = Proof.objects.filter(is_deleted=False)
+    if rumor_ids is not None:
+        proofs = proofs.filter(rumor_id__in=rumor_ids)
+    rows = proofs.values('rumor_id').annotate(
+        proof_count=Count('pk'),
+        mature_proof_count=Count('pk', filter=Q(is_mature=True)),
+    )
+    return {
+        row['rumor_id']: {'proof_count': row['proof_count'], 'mature_proof_count': row['mature_proof_count']}
+        for row in rows
+    }
+
+def compute_vote_aggregates(rumor_ids=None):
+    """
+    Full recompute of the running vote aggregates straight from the Vote table.
+    Returns {rumor_id: {field: value}} for every rumor that has votes.
+    Used by reconciliation; the hot path never calls this.
+    """
+    votes = Vote.objects.all()
+    if rumor_ids is not None:
+        votes = votes.filter(rumor_id__in=rumor_ids)
+
+    rows = votes.values('rumor_id', 'vote_type').annotate(
+        n=Count('pk'),
+        weighted=Sum(ExpressionWrapper(
+            F('vote_value') * F('weight_snapshot'),
+            output_field=DecimalField(max_digits=14, decimal_places=5)
+        )),
+        weight=Sum('weight_snapshot'),
+    )
+
+    aggregates = {}
+    for row in rows:
+        agg = aggregates.setdefault(row['rumor_id'], {
+            'vote_weighted_sum': Decimal('0'),
+            'vote_total_weight': Decimal('0'),
+            'verify_count': 0,
+            'uncertain_count': 0,
+            'dispute_count': 0,
+        })
+        agg['vote_weighted_sum'] += row['weighted'] or Decimal('0')
+        agg['vote_total_weight'] += row['weight'] or Decimal('0')
+        agg[VOTE_COUNT_FIELDS[row['vote_type']]] += row['n']
+
+    # Match the storage precision of the Rumor columns
+    for agg in aggregates.values():
+        agg['vote_weighted_sum'] = agg['vote_weighted_sum'].quantize(Decimal('0.00001'))
+        agg['vote_total_weight'] = agg['vote_total_weight'].quantize(Decimal('0.0001'))
+    return aggregates
+
+def _db_value(model, name, value):
+    return model._meta.get_field(name).get_db_prep_save(value, connection)
+
+def _python_value(model, name, value):
+    # The conversions the ORM applies to a column it reads
+    col = model._meta.get_field(name).get_col(model._meta.db_table)
+    for converter in connection.ops.get_db_converters(col) + col.get_db_converters(connection):
+        value = converter(value, col, connection)
+    return value
+
+def _upsert_rows(model, rows, conflict, updates, where, returning):
+    """
+    INSERT ... ON CONFLICT (conflict) DO UPDATE SET updates [WHERE where] RETURNING returning,
+    for many rows (dicts with the same columns) in one statement. updates maps a column to an
+    SQL expression, where `new` is the proposed row (EXCLUDED) and `old` the stored one.
+    Returns the returned rows converted to Python values, in no particular order; rows whose
+    update the WHERE clause suppressed return nothing.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = list(rows[0])
+    column = lambda name: qn(model._meta.get_field(name).column)
+    assignments = ', '.join(
+        f"{column(name)} = {expression.format(new='EXCLUDED', old=table)}" for name, expression in updates.items()
+    )
+    placeholders = f"({', '.join(['%s'] * len(columns))})"
+    sql = (
+        f"INSERT INTO {table} ({', '.join(column(name) for name in columns)}) "
+        f"VALUES {', '.join([placeholders] * len(rows))} "
+        f"ON CONFLICT ({', '.join(column(name) for name in conflict)}) DO UPDATE SET {assignments} "
+        + (f"WHERE {where.format(new='EXCLUDED', old=table)} " if where else '')
+        + f"RETURNING {', '.join(column(name) for name in returning)}"
+    )
+    params = [_db_value(model, name, values[name]) for values in rows for name in columns]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        returned = cursor.fetchall()
+    return [[_python_value(model, name, value) for name, value in zip(returning, row)] for row in returned]
+
+def _upsert(model, values, conflict, updates, where, returning):
+    """
+    _upsert_rows for a single row: returns its returned row, or None when the
+    WHERE clause suppressed the update.
+    """
+    returned = _upsert_rows(model, [values], conflict, updates, where, returning)
+    return returned[0] if returned else None
+
+def _vote_row(vote_id, rumor_id, user_id, vote_type, weight, reputation, now):
+    return {
+        'vote_id': vote_id, 'rumor': rumor_id, 'voter': user_id,
+        'vote_type': vote_type, 'vote_value': scoring.RUMOR_VOTE_VALUES[vote_type],
+        'weight_snapshot': weight, 'voter_reputation_snapshot': reputation,
+        'voted_at': now, 'last_updated_at': now, 'change_count': 0,
+    }
+
+# Upsert clauses of a rumor vote; a change is only applied while change_count < MAX_VOTE_CHANGES
+VOTE_UPSERT = {
+    'conflict': ['rumor', 'voter'],
+    'updates': {
+        # Right-hand sides read the stored row, so this keeps the type being replaced
+        'previous_vote_type': '{old}.vote_type',
+        'vote_type': '{new}.vote_type',
+        'vote_value': '{new}.vote_value',
+        'last_updated_at': '{new}.last_updated_at',
+        'change_count': '{old}.change_count + 1',
+    },
+    'where': f'{{old}}.change_count < {int(MAX_VOTE_CHANGES)}',
+}
+
+def _apply_vote_upsert(rumor_id, vote_type, vote_id, stored_id, previous_type, stored_weight, voted_at):
+    """
+    Moves the rumor's aggregates and momentum by what a vote upsert did, as
+    reported by its RETURNING row. Returns 'recorded' or 'changed'.
+    """
+    new_state = (vote_type, scoring.RUMOR_VOTE_VALUES[vote_type], stored_weight)
+    if stored_id == vote_id:
+        apply_vote_delta(rumor_id, None, new_state, voted_at=voted_at)
+        record_vote(rumor_id, voted_at, None, vote_type)
+        return 'recorded'
+    # Weight snapshot is locked at first vote; only type/value move
+    old_state = (previous_type, scoring.RUMOR_VOTE_VALUES[previous_type], stored_weight)
+    apply_vote_delta(rumor_id, old_state, new_state)
+    record_vote(rumor_id, voted_at, previous_type, vote_type)
+    return 'changed'
+
+def cast_vote(rumor_id, user_id, vote_type):
+    """
+    Casts or changes a user's vote on a rumor with one atomic upsert. The
+    change is only applied while change_count < MAX_VOTE_CHANGES (checked
+    inside the statement), and the statement reports what it did, so the
+    running aggregates move by exactly the right delta even under
+    concurrent requests. Votes on a frozen rumor are refused, as in
+    submit_vote_batch; the rumor row stays locked until the vote commits,
+    so a settlement freezing it either runs first or sees the vote.
+    Returns 'recorded', 'changed', 'frozen' (nothing written) or None
+    (limit reached).
+    """
+    weight, reputation = get_vote_weight(user_id)
+    vote_id = uuid.uuid4()
+    with transaction.atomic():
+        if Rumor.objects.select_for_update().filter(pk=rumor_id).values_list('is_frozen', flat=True).first():
+            return 'frozen'
+        row = _upsert(
+            Vote, _vote_row(vote_id, rumor_id, user_id, vote_type, weight, reputation, timezone.now()),
+            returning=['vote_id', 'previous_vote_type', 'weight_snapshot', 'voted_at'], **VOTE_UPSERT
+        )
+        if row is None:
+            return None
+        result = _apply_vote_upsert(rumor_id, vote_type, vote_id, *row)
+        # Counts and trending moved: cached responses showing this rumor are stale
+        bump_rumor_versions([rumor_id])
+    return result
+
+def cast_proof_vote(proof_id, user_id, vote_type):
+    """
+    Casts or changes a user's vote on a proof with one atomic upsert (the
+    weight snapshot of an existing vote is kept). Votes on a deleted proof
+    are refused, as in submit_vote_batch. Returns 'recorded', 'changed' or
+    'deleted' (nothing written).
+    """
+    weight, _ = get_vote_weight(user_id)
+    proof_vote_id = uuid.uuid4()
+    with transaction.atomic():
+        if Proof.objects.select_for_update().filter(pk=proof_id).values_list('is_deleted', flat=True).first():
+            return 'deleted'
+        stored_id, = _upsert(
+            ProofVote,
+            {
+                'proof_vote_id': proof_vote_id, 'proof': proof_id, 'voter': user_id,
+                'vote_type': vote_type, 'vote_value': scoring.PROOF_VOTE_VALUES[vote_type],
+                'weight_snapshot': weight, 'voted_at': timezone.now(),
+            },
+            conflict=['proof', 'voter'],
+            updates={'vote_type': '{new}.vote_type', 'vote_value': '{new}.vote_value'},
+            where=None,
+            returning=['proof_vote_id'],
+        )
+    return 'recorded' if stored_id == proof_vote_id else 'changed'
+
+def submit_vote_batch(user, rumor_votes, proof_votes):
+    """
+    Records many votes of one user in one transaction. rumor_votes and
+    proof_votes are lists of {'rumor_id'|'proof_id': UUID, 'vote_type': str}.
+
+    Each table gets one multi-row upsert with the same ON CONFLICT clauses
+    as cast_vote / cast_proof_vote, so the change limit is checked inside
+    the statement and the aggregates move by what its RETURNING rows report,
+    even when another request votes on the same rumor concurrently. Items on
+    missing, deleted or frozen rumors, and changes past MAX_VOTE_CHANGES, are
+    rejected individually. Returns (rumor results, proof results, voted rumor
+    ids, voted proof ids); the caller schedules the recomputes.
+    """
+    rumor_results = []
+    proof_results = []
+    with transaction.atomic():
+        rumor_ids = [item['rumor_id'] for item in rumor_votes]
+        # Locked (in pk order, like settle_rumors) so no rumor is frozen under the batch
+        frozen = dict(
+            Rumor.objects.select_for_update().filter(pk__in=rumor_ids, is_deleted=False)
+            .order_by('pk').values_list('rumor_id', 'is_frozen')
+        )
+        proof_ids = [item['proof_id'] for item in proof_votes]
+        live_proofs = set(Proof.objects.filter(pk__in=proof_ids, is_deleted=False).values_list('proof_id', flat=True))
+        open_rumor_votes = [item for item in rumor_votes if frozen.get(item['rumor_id']) is False]
+        open_proof_votes = [item for item in proof_votes if item['proof_id'] in live_proofs]
+        if open_rumor_votes or open_proof_votes:
+            weight, reputation = get_vote_weight(user.pk)
+
+        vote_ids = {item['rumor_id']: uuid.uuid4() for item in open_rumor_votes}
+        now = timezone.now()
+        stored = {}
+        if open_rumor_votes:
+            rows = [
+                _vote_row(vote_ids[item['rumor_id']], item['rumor_id'], user.pk, item['vote_type'], weight, reputation, now)
+                for item in open_rumor_votes
+            ]
+            returned = _upsert_rows(
+                Vote, rows, returning=['rumor', 'vote_id', 'previous_vote_type', 'weight_snapshot', 'voted_at'],
+                **VOTE_UPSERT
+            )
+            stored = {row[0]: row[1:] for row in returned}
+
+        voted_rumors = []
+        for item in rumor_votes:
+            rumor_id = item['rumor_id']
+            result = {'rumor_id': str(rumor_id)}
+            rumor_results.append(result)
+            if rumor_id not in frozen:
+                result.update(status='rejected', error='Rumor not found')
+            elif frozen[rumor_id]:
+                result.update(status='rejected', error='Rumor is frozen')
+            elif rumor_id not in stored:
+                result.update(status='rejected', error='Max vote changes reached')
+            else:
+                result['status'] = _apply_vote_upsert(rumor_id, item['vote_type'], vote_ids[rumor_id], *stored[rumor_id])
+                voted_rumors.append(rumor_id)
+        bump_rumor_versions(voted_rumors)
+
+        proof_vote_ids = {item['proof_id']: uuid.uuid4() for item in open_proof_votes}
+        stored = {}
+        if open_proof_votes:
+            rows = [
+                {
+                    'proof_vote_id': proof_vote_ids[item['proof_id']], 'proof': item['proof_id'], 'voter': user.pk,
+                    'vote_type': item['vote_type'], 'vote_value': scoring.PROOF_VOTE_VALUES[item['vote_type']],
+                    'weight_snapshot': weight, 'voted_at': now,
+                }
+                for item in open_proof_votes
+            ]
+            stored = dict(_upsert_rows(
+                ProofVote, rows, conflict=['proof', 'voter'],
+                updates={'vote_type': '{new}.vote_type', 'vote_value': '{new}.vote_value'},
+                where=None, returning=['proof', 'proof_vote_id'],
+            ))
+
+        voted_proofs = []
+        for item in proof_votes:
+            proof_id = item['proof_id']
+            result = {'proof_id': str(proof_id)}
+            proof_results.append(result)
+            if proof_id not in live_proofs:
+                result.update(status='rejected', error='Proof not found')
+                continue
+            result['status'] = 'recorded' if stored[proof_id] == proof_vote_ids[proof_id] else 'changed'
+            voted_proofs.append(proof_id)
+
+    return rumor_results, proof_results, voted_rumors, voted_proofs
 
 def calculate_trust_score(rumor_id):
     try:
@@ -15,92 +364,56 @@ def calculate_trust_score(rumor_id):
     # --- 1. Weighted Vote Score (V) - 50% Weight ---
     # Formula: Weighted Average of all votes.
     # Weight = sqrt(voter_reputation) / 10
+    # Read from the running aggregates kept by apply_vote_delta (no vote scan).
     
-    votes = Vote.objects.filter(rumor=rumor)
-    if not votes.exists():
-        V = Decimal('0.50') # Default neutral if no votes
-    else:
-        total_weight = Decimal('0.00')
-        weighted_sum = Decimal('0.00')
-        
-        for vote in votes:
-            # vote.vote_value is 1.0 (Verify), 0.5 (Uncertain), or 0.0 (Dispute)
-            # vote.weight_snapshot is calculated at time of voting
-            weight = vote.weight_snapshot
-            val = vote.vote_value
-            
-            weighted_sum += val * weight
-            total_weight += weight
-        
-        if total_weight > 0:
-            V = weighted_sum / total_weight
-        else:
-            V = Decimal('0.50')
+    V = scoring.vote_score(rumor.vote_weighted_sum, rumor.vote_total_weight)
+    vote_count = rumor.verify_count + rumor.uncertain_count + rumor.dispute_count
 
     # --- 2. Mature Proofs Score (P) - 30% Weight ---
     # Formula: Average trust score of MATURE proofs (>10 votes).
     
-    mature_proofs = Proof.objects.filter(rumor=rumor, is_mature=True)
-    if not mature_proofs.exists():
-        P = Decimal('0.50') # Neutral if no mature proofs
-    else:
-        # Calculate score from mature proofs
-        # We average the trust_score of all mature proofs
-        
-        proof_scores_sum = Decimal('0.00')
-        for proof in mature_proofs:
-            proof_scores_sum += proof.trust_score
-            
-        avg_proof_score = proof_scores_sum / len(mature_proofs)
-        P = avg_proof_score
+    mature_scores = list(Proof.objects.filter(rumor=rumor, is_mature=True).values_list('trust_score', flat=True))
+    P = scoring.proof_score(mature_scores)
 
     # --- 3. Momentum Score (M) - 20% Weight ---
-    # Formula: Rewards organic consensus building.
-    # Logic: Analyzes voting patterns in 6-hour windows.
-    # MVP Implementation: 
-    # If vote rate is high (>10 votes/6h) AND consensus is high (>0.7 or <0.3), M = 0.8 (High Confidence)
-    # Else M = 0.5 (Normal)
-    
-    # Check count of votes in last 6 hours
-    six_hours_ago = timezone.now() - timedelta(hours=6)
-    recent_vote_count = votes.filter(voted_at__gte=six_hours_ago).count()
+    # Formula: Rewards organic consensus building (PRD FR-5.3).
+    # Logic: Verify ratios across the last four 6-hour windows, penalizing volatility.
+    # Read from the rumor's incrementally maintained bucket ring (see momentum.py).
     
-    if recent_vote_count > 10:
-        # High activity. Check consensus of purely recent votes.
-        # Simplification: Use overall V as proxy for consensus direction
-        if V > Decimal('0.70') or V < Decimal('0.30'):
-             # Strong momentum in one direction
-             M = Decimal('0.80') # Boosted confidence
-        else:
-             # High activity but controversial/uncertain
-             M = Decimal('0.50')
-    else:
-        M = Decimal('0.50') # Low momentum
+    M = calculate_momentum_score(rumor.rumor_id, vote_count)
 
     # --- Final Calculation ---
     # TrustScore = 0.50(V) + 0.30(P) + 0.20(M)
     
-    final_trust_score = (Decimal('0.50') * V) + (Decimal('0.30') * P) + (Decimal('0.20') * M)
+    final_trust_score = scoring.trust_score(V, P, M)
 
     # Update Rumor
-    rumor.trust_score = final_trust_score
-    rumor.vote_score = V
-    rumor.proof_score = P
-    rumor.momentum_score = M
-    rumor.save()
-
-    # Log to Audit
-    AuditLog.objects.create(
-        event_type='TRUST_SCORE_CALCULATED',
-        rumor_id=rumor_id,
-        calculation_data={
-            'V': float(V),
-            'P': float(P),
-            'M': float(M),
-            'final_score': float(final_trust_score),
-            'vote_count': votes.count(),
-            'mature_proof_count': mature_proofs.count()
-        }
+    previous_score = rumor.trust_score
+    scores = {
+        'trust_score': scoring.quantize_score(final_trust_score),
+        'vote_score': scoring.quantize_score(V),
+        'proof_score': scoring.quantize_score(P),
+        'momentum_score': scoring.quantize_score(M),
+        'controversy_score': ranking.controversy_score(rumor.verify_count, rumor.dispute_count),
+    }
+    changed = [field for field, value in scores.items() if getattr(rumor, field) != value]
+    for field in changed:
+        setattr(rumor, field, scores[field])
+    # Only write the score columns: a full save would clobber aggregate deltas
+    # applied by concurrent votes since we read the row.
+    if changed:
+        rumor.save(update_fields=changed)
+        bump_rumor_versions([rumor_id])
+
+    # Log to Audit (buffered; recomputes that leave the score unchanged are not logged)
+    audit_writer.record_trust_score(
+        rumor_id,
+        previous_score=previous_score,
+        stored_score=rumor.trust_score,
+        V=V, P=P, M=M,
+        final_score=final_trust_score,
+        vote_count=vote_count,
+        mature_proof_count=len(mature_scores),
     )
 
     return final_trust_score
@@ -108,151 +421,138 @@ def calculate_trust_score(rumor_id):
 def update_proof_trust_score(proof_id):
     """
     Calculates the trust score for a single proof and check maturity.
+    Returns the proof's rumor_id if the change can move the rumor's P
+    (maturity flipped, or a mature proof's score changed), else None.
+    The caller decides when to recompute the rumor, so several dirty proofs
+    can share one rumor recompute.
     """
     try:
         proof = Proof.objects.get(pk=proof_id)
     except Proof.DoesNotExist:
         return
 
-    votes = ProofVote.objects.filter(proof=proof)
-    vote_count = votes.count()
+    was_mature = proof.is_mature
+    old_score = proof.trust_score
+
+    votes = list(ProofVote.objects.filter(proof=proof).values_list('vote_type', 'weight_snapshot'))
+    vote_count = len(votes)
     
     # Update vote count
     proof.vote_count = vote_count
     
-    # Check Maturity (Threshold > 10 votes)
-    if vote_count >= 10:
-        proof.is_mature = True
-    else:
-        proof.is_mature = False
+    # Check Maturity (Threshold: 10 votes)
+    proof.is_mature = vote_count >= scoring.PROOF_MATURITY_VOTES
     
     # Calculate Score: Weighted average of votes
-    # Supports (1.0), Uncertain (0.5), Refutes (0.0)
-    if vote_count == 0:
-        proof.trust_score = Decimal('0.00') 
-    else:
-        total_weight = Decimal('0.00')
-        weighted_sum = Decimal('0.00')
-        
-        for vote in votes:
-            # voting logic similar to rumors
-            weight = vote.weight_snapshot
-            
-            val = Decimal('0.5')
-            if vote.vote_type == 'SUPPORTS': val = Decimal('1.0')
-            elif vote.vote_type == 'REFUTES': val = Decimal('0.0')
-            # UNCERTAIN remains 0.5
-            
-            weighted_sum += val * weight
-            total_weight += weight
-            
-        if total_weight > 0:
-            proof.trust_score = weighted_sum / total_weight
-        else:
-            proof.trust_score = Decimal('0.00')
-
-    proof.save()
-    
-    # Trigger Rumor Score Recalculation since P component might change
-    calculate_trust_score(proof.rumor_id)
+    # Supports (1.0), Uncertain (0.5), Refutes (0.0); 0.00 without votes
+    proof.trust_score = scoring.quantize_score(scoring.weighted_average(
+        [scoring.PROOF_VOTE_VALUES[vote_type] for vote_type, _ in votes],
+        [weight for _, weight in votes],
+        default=Decimal('0.00'),
+    ))
+
+    proof.save(update_fields=['vote_count', 'is_mature', 'trust_score'])
+    if was_mature != proof.is_mature and not proof.is_deleted:
+        apply_proof_delta(proof.rumor_id, mature=1 if proof.is_mature else -1)
+
+    # P only reads mature proofs' stored scores
+    if was_mature != proof.is_mature or (proof.is_mature and proof.trust_score != old_score):
+        return proof.rumor_id
+    return None
 
 def settle_rumor(rumor_id):
     """
     Finalizes a rumor, freezes it, and distributes reputation rewards/penalties.
     """
-    rumor = Rumor.objects.get(rumor_id=rumor_id)
-    if rumor.is_frozen:
+    settled = settle_rumors([rumor_id])
+    if not settled:
         return "Already frozen"
+    return f"Settled as {settled[0][1]}. Reputation distributed."
 
-    # 1. Determine Outcome
-    # Trust Score > 0.80 -> TRUTH (VERIFY wins)
-    # Trust Score < 0.20 -> FALSEHOOD (DISPUTE wins)
-    # Else -> UNCERTAIN (No reputation change?)
-    
-    score = float(rumor.trust_score)
-    outcome = 'UNCERTAIN'
-    if score >= 0.80:
-        outcome = 'TRUE'
-    elif score <= 0.20:
-        outcome = 'FALSE'
-        
-    rumor.is_frozen = True
-    rumor.save()
-    
-    if outcome == 'UNCERTAIN':
-        return "Settled as Uncertain. No reputation changes."
-
-    # 2. Distribute Rewards/Penalties
-    # Constants (Should be in settings or models)
-    REWARD = Decimal('2.00')
-    PENALTY = Decimal('5.00') # Higher penalty for being wrong? Or equal? PRD says "High Stakes".
-    AUTHOR_BONUS = Decimal('5.00')
-    AUTHOR_PENALTY = Decimal('10.00')
-    
+def settle_rumors(rumor_ids):
+    """
+    Freezes and settles a batch of rumors (PRD FR-6.3) in one transaction:
+    every voter, original poster and mature-proof poster gets a graded
+    adjustment from their alignment with the frozen trust score, computed in
+    one vectorized pass (see settlement.py) and appended to the reputation
+    ledger with a single bulk insert.
+
+    Rumors that are already frozen are skipped, and the freeze happens under a
+    row lock in the same transaction as the ledger rows, so re-running (after
+    a crash, or concurrently) never pays out twice.
+    Returns [(rumor_id, classification)] for the rumors settled by this call.
+    """
     with transaction.atomic():
-        votes = Vote.objects.filter(rumor=rumor)
-        
-        for vote in votes:
-            user = vote.voter
-            delta = Decimal('0.00')
-            event_type = None
-            
-            # If Outcome is TRUE (Content is Real)
-            if outcome == 'TRUE':
-                if vote.vote_type == 'VERIFY':
-                    delta = REWARD
-                    event_type = 'CORRECT_VOTE'
-                elif vote.vote_type == 'DISPUTE':
-                    delta = -PENALTY
-                    event_type = 'INCORRECT_VOTE'
-            
-            # If Outcome is FALSE (Content is Fake)
-            elif outcome == 'FALSE':
-                if vote.vote_type == 'DISPUTE':
-                    delta = REWARD
-                    event_type = 'CORRECT_VOTE'
-                elif vote.vote_type == 'VERIFY':
-                    delta = -PENALTY
-                    event_type = 'INCORRECT_VOTE'
-            
-            if delta != 0:
-                user.profile_trust_score += delta
-                # Clamp score 0-100?
-                if user.profile_trust_score < 0: user.profile_trust_score = Decimal('0.00')
-                if user.profile_trust_score > 100: user.profile_trust_score = Decimal('100.00')
-                user.save()
-                
-                ReputationEvent.objects.create(
-                    user=user,
-                    event_type=event_type,
-                    delta=delta,
-                    rumor_id=rumor.rumor_id
-                )
-    
-        # 3. Author Process
-        author = rumor.author
-        if author:
-            delta = Decimal('0.00')
-            event_type = None
-            
-            if outcome == 'TRUE':
-                delta = AUTHOR_BONUS
-                event_type = 'AUTHOR_BONUS'
-            elif outcome == 'FALSE':
-                delta = -AUTHOR_PENALTY
-                event_type = 'AUTHOR_PENALTY'
-            
-            if delta != 0:
-                author.profile_trust_score += delta
-                if author.profile_trust_score < 0: author.profile_trust_score = Decimal('0.00')
-                if author.profile_trust_score > 100: author.profile_trust_score = Decimal('100.00')
-                author.save()
-                
-                ReputationEvent.objects.create(
-                    user=author,
-                    event_type=event_type,
-                    delta=delta,
-                    rumor_id=rumor.rumor_id
-                )
-    
-    return f"Settled as {outcome}. Reputation distributed."
+        rows = list(
+            Rumor.objects.select_for_update()
+            .filter(pk__in=rumor_ids, is_frozen=False)
+            .order_by('pk')
+            .values_list('rumor_id', 'trust_score', 'author_id')
+        )
+        if not rows:
+            return []
+
+        claimed = [rumor_id for rumor_id, _, _ in rows]
+        classifications = [scoring.classify(trust_score) for _, trust_score, _ in rows]
+        now = timezone.now()
+        for classification in set(classifications):
+            Rumor.objects.filter(
+                pk__in=[rumor_id for rumor_id, c in zip(claimed, classifications) if c == classification],
+                is_frozen=False
+            ).update(is_frozen=True, frozen_at=now, classification=classification)
+        bump_rumor_versions(claimed)
+
+        index = {rumor_id: i for i, rumor_id in enumerate(claimed)}
+        final_scores = settlement.to_hundredths([trust_score for _, trust_score, _ in rows])
+        verified = np.array([c in ('VERIFIED_TRUE', 'VERIFIED_FALSE') for c in classifications])
+        events = []
+
+        # 1. Voters
+        votes = list(Vote.objects.filter(rumor_id__in=claimed).values_list('rumor_id', 'voter_id', 'vote_value'))
+        if votes:
+            vote_rumors, voters, values = zip(*votes)
+            vote_idx = np.fromiter((index[r] for r in vote_rumors), dtype=np.int64, count=len(votes))
+            adjustments = settlement.voter_adjustments(settlement.to_hundredths(values), vote_idx, final_scores, verified)
+            events += _ledger_events(adjustments, voters, vote_rumors, 'CORRECT_VOTE', 'INCORRECT_VOTE')
+
+        # 2. Original posters (3x)
+        authored = [i for i, (_, _, author_id) in enumerate(rows) if author_id]
+        adjustments = settlement.author_adjustments(final_scores, verified)
+        events += _ledger_events(
+            adjustments[authored], [rows[i][2] for i in authored], [claimed[i] for i in authored],
+            'AUTHOR_BONUS', 'AUTHOR_PENALTY'
+        )
+
+        # 3. Mature proof posters
+        proofs = list(
+            Proof.objects.filter(rumor_id__in=claimed, is_mature=True, is_deleted=False, poster__isnull=False)
+            .values_list('rumor_id', 'poster_id', 'proof_id', 'trust_score')
+        )
+        if proofs:
+            proof_rumors, posters, proof_ids, proof_scores = zip(*proofs)
+            proof_idx = np.fromiter((index[r] for r in proof_rumors), dtype=np.int64, count=len(proofs))
+            adjustments = settlement.proof_adjustments(settlement.to_hundredths(proof_scores), proof_idx, final_scores)
+            events += _ledger_events(
+                adjustments, posters, proof_rumors, 'HELPFUL_PROOF', 'MISLEADING_PROOF', proof_ids=proof_ids
+            )
+
+        # Settlement only appends to the reputation ledger; balances are folded in
+        # (and clamped) by the materializer, so settlements never contend on user rows.
+        ReputationEvent.objects.bulk_create(events, batch_size=1000)
+
+    return list(zip(claimed, classifications))
+
+def _ledger_events(adjustments, user_ids, rumor_ids, gain_type, loss_type, proof_ids=None):
+    """
+    ReputationEvents for the non-zero adjustments.
+    """
+    return [
+        ReputationEvent(
+            user_id=user_ids[i],
+            event_type=gain_type if adjustments[i] > 0 else loss_type,
+            delta=Decimal(int(adjustments[i])),
+            rumor_id=rumor_ids[i],
+            proof_id=proof_ids[i] if proof_ids else None
+        )
+        for i in np.flatnonzero(adjustments)
+    ]
@@ -0,0 +1,71 @@
+"""
+Reputation settlement kernel (PRD FR-6.3): graded adjustments from each
+participant's alignment with the frozen trust score, with no ORM access.
+
+Every function takes flat numpy arrays covering any number of rumors at once
+(per-participant columns plus an index into per-rumor columns), so a batch of
+rumors with thousands of voters is settled in one vectorized pass.
+
+Scores are handled in integer hundredths: vote values have one decimal and
+trust scores two, so alignment errors are exact and band edges never suffer
+from float rounding.
+"""
+import numpy as np
+
+# alignment_error = |vote_value - final_trust_score|, in hundredths.
+# Errors below each edge earn the matching adjustment; the last applies past 0.75.
+ALIGNMENT_EDGES = np.array([10, 20, 30, 40, 60, 75])
+ALIGNMENT_ADJUSTMENTS = np.array([5, 3, 2, 1, 0, -2, -4])
+
+# VERIFIED_TRUE / VERIFIED_FALSE: +2 below this error, -2 above the penalty edge
+VERIFIED_BONUS = 2
+VERIFIED_BONUS_EDGE = 25
+VERIFIED_PENALTY_EDGE = 75
+
+# The original poster stands behind the rumor as a VERIFY (1.0) vote, at 3x
+AUTHOR_VOTE_VALUE = 100
+AUTHOR_MULTIPLIER = 3
+
+# Mature proofs: a proof's trust score says how strongly it backs the rumor, so it
+# is helpful when it lands near the final score and misleading when far from it.
+# (error edge, adjustment): first edge the error is below wins; beyond the last, -5.
+PROOF_BANDS = [(10, 5), (25, 4), (40, 3), (60, 0), (75, -3), (90, -4)]
+PROOF_MAX_PENALTY = -5
+
+def to_hundredths(values):
+    return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+def alignment_errors(values, rumor_idx, final_scores):
+    """
+    |value - final score of its rumor| in hundredths. values/final_scores in hundredths.
+    """
+    return np.abs(values - final_scores[rumor_idx])
+
+def voter_adjustments(values, rumor_idx, final_scores, verified):
+    """
+    FR-6.3 adjustment for every vote. verified is a per-rumor bool array
+    (classification is VERIFIED_TRUE or VERIFIED_FALSE).
+    """
+    errors = alignment_errors(values, rumor_idx, final_scores)
+    adjustments = ALIGNMENT_ADJUSTMENTS[np.searchsorted(ALIGNMENT_EDGES, errors, side='right')]
+    bonus = np.where(errors < VERIFIED_BONUS_EDGE, VERIFIED_BONUS,
+                     np.where(errors > VERIFIED_PENALTY_EDGE, -VERIFIED_BONUS, 0))
+    return adjustments + np.where(verified[rumor_idx], bonus, 0)
+
+def author_adjustments(final_scores, verified):
+    """
+    Per-rumor adjustment for the original poster: a VERIFY vote's adjustment, times 3.
+    """
+    n = len(final_scores)
+    return AUTHOR_MULTIPLIER * voter_adjustments(
+        np.full(n, AUTHOR_VOTE_VALUE), np.arange(n), final_scores, verified
+    )
+
+def proof_adjustments(proof_scores, rumor_idx, final_scores):
+    """
+    +3..+5 for helpful mature proofs, -3..-5 for misleading ones, 0 in between.
+    """
+    errors = alignment_errors(proof_scores, rumor_idx, final_scores)
+    edges = np.array([edge for edge, _ in PROOF_BANDS])
+    values = np.array([adjustment for _, adjustment in PROOF_BANDS] + [PROOF_MAX_PENALTY])
+    return values[np.searchsorted(edges, errors, side='right')]
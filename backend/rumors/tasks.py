@@ -1,16 +1,225 @@
-from celery import shared_task
-from .services import calculate_trust_score, update_proof_trust_score
+from datetime import timedelta
+
+from celery import group, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Rumor
+from .services import calculate_trust_score, update_proof_trust_score, settle_rumor, settle_rumors
+from audit.ledger import materialize_balances
+
+# Coalescing keys, per pipeline ('trust' for rumors, 'proof' for proofs) and object id
+# pending: a recompute is queued and will pick up every change that lands before it starts
+# running: a worker holds the recompute lease for this object
+PENDING_KEY = '{}:pending:{}'
+RUNNING_KEY = '{}:running:{}'
+METRIC_KEY = '{}:metrics:{}'
+METRICS = ['scheduled', 'collapsed', 'executed', 'deferred']
+
+def _bump_metric(kind, name):
+    key = METRIC_KEY.format(kind, name)
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
+
+def get_recompute_metrics(kind='trust'):
+    """
+    Counters for the coalescing layer of one pipeline ('trust' or 'proof'):
+    scheduled - recompute tasks actually enqueued
+    collapsed - requests absorbed by an already-pending recompute
+    executed  - recomputes that ran
+    deferred  - tasks that found another recompute running and re-queued
+    """
+    keys = [METRIC_KEY.format(kind, name) for name in METRICS]
+    values = cache.get_many(keys)
+    return {name: values.get(key, 0) for name, key in zip(METRICS, keys)}
+
+def _schedule_once(kind, object_id, task):
+    """
+    The first request in a window enqueues `task` delayed by
+    TRUST_RECOMPUTE_WINDOW_SECONDS; later requests before that task starts
+    are collapsed into it. Returns True if a task was enqueued.
+    """
+    window = settings.TRUST_RECOMPUTE_WINDOW_SECONDS
+    # The pending flag outlives the window so a stalled queue can't duplicate work,
+    # but still expires eventually in case the task is lost.
+    ttl = window + settings.TRUST_RECOMPUTE_LEASE_SECONDS
+    if cache.add(PENDING_KEY.format(kind, object_id), 1, timeout=ttl):
+        task.apply_async((str(object_id),), countdown=window)
+        _bump_metric(kind, 'scheduled')
+        return True
+    _bump_metric(kind, 'collapsed')
+    return False
+
+def _run_exclusive(kind, object_id, task, func):
+    """
+    Runs func(object_id) under a per-object lease. If another worker holds the
+    lease, re-queues `task` as the single follow-up instead of running
+    concurrently; the pending flag is still set so new requests collapse into it.
+    """
+    running_key = RUNNING_KEY.format(kind, object_id)
+    if not cache.add(running_key, 1, timeout=settings.TRUST_RECOMPUTE_LEASE_SECONDS):
+        task.apply_async((object_id,), countdown=settings.TRUST_RECOMPUTE_WINDOW_SECONDS)
+        _bump_metric(kind, 'deferred')
+        return None
+
+    try:
+        # Changes from this point on need a fresh recompute: let them schedule one follow-up
+        cache.delete(PENDING_KEY.format(kind, object_id))
+        _bump_metric(kind, 'executed')
+        return func(object_id)
+    finally:
+        cache.delete(running_key)
+
+def schedule_trust_recompute(rumor_id):
+    """
+    Requests a (coalesced) trust recompute for a rumor.
+    """
+    return _schedule_once('trust', rumor_id, update_trust_score_task)
+
+def schedule_proof_recompute(proof_id):
+    """
+    Requests a (coalesced) recompute of a proof's score and maturity.
+    """
+    return _schedule_once('proof', proof_id, update_proof_trust_score_task)
+
+def _recompute_proof_and_propagate(proof_id):
+    rumor_id = update_proof_trust_score(proof_id)
+    # Only when the rumor's P inputs moved. Every dirty proof of a rumor lands
+    # in the same coalescing window, so they share one rumor recompute.
+    if rumor_id:
+        schedule_trust_recompute(rumor_id)
+    return bool(rumor_id)
 
 @shared_task
 def update_trust_score_task(rumor_id):
     """
     Background task to recalculate trust score for a rumor.
     """
-    return calculate_trust_score(rumor_id)
+    return _run_exclusive('trust', rumor_id, update_trust_score_task, calculate_trust_score)
 
 @shared_task
 def update_proof_trust_score_task(proof_id):
     """
     Background task to recalculate trust score for a proof.
     """
-    return update_proof_trust_score(proof_id)
+    return _run_exclusive('proof', proof_id, update_proof_trust_score_task, _recompute_proof_and_propagate)
+
+@shared_task
+def settle_rumor_task(rumor_id):
+    """
+    Freezes and settles one rumor. Safe to run more than once per rumor.
+    """
+    result = settle_rumor(rumor_id)
+    schedule_reputation_materialize()
+    return result
+
+@shared_task
+def settle_rumors_task(rumor_ids):
+    """
+    Freezes and settles a chunk of rumors in one vectorized pass.
+    """
+    settled = settle_rumors(rumor_ids)
+    schedule_reputation_materialize()
+    return len(settled)
+
+# The ledger materializer is one pipeline: every settlement in a window shares one run
+LEDGER_KEY = 'balances'
+
+def schedule_reputation_materialize():
+    """
+    Requests a (coalesced) fold of pending reputation events into user balances.
+    """
+    return _schedule_once('ledger', LEDGER_KEY, materialize_reputation_task)
+
+def _materialize(_key):
+    return materialize_balances()
+
+@shared_task
+def materialize_reputation_task(key=LEDGER_KEY):
+    """
+    Background task to apply pending reputation ledger events to balances.
+    """
+    return _run_exclusive('ledger', key, materialize_reputation_task, _materialize)
+
+# Freeze sweep state: the keyset cursor the next run resumes from, and a lease against overlapping runs
+FREEZE_CURSOR_KEY = 'freeze:cursor'
+FREEZE_RUNNING_KEY = 'freeze:running'
+FREEZE_LEASE_SECONDS = 15 * 60
+# Rumors per settlement task: large enough to vectorize, small enough to spread over workers
+SETTLE_CHUNK_SIZE = 50
+
+def due_rumors(now=None):
+    """
+    Unfrozen rumors past the freeze age, in (created_at, rumor_id) order.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=settings.RUMOR_FREEZE_DAYS)
+    return Rumor.objects.filter(
+        is_frozen=False, is_deleted=False, created_at__lte=cutoff
+    ).order_by('created_at', 'rumor_id')
+
+def get_freeze_cursor():
+    cursor = cache.get(FREEZE_CURSOR_KEY)
+    if cursor is None:
+        return None
+    return parse_datetime(cursor[0]), cursor[1]
+
+def reset_freeze_cursor():
+    cache.delete(FREEZE_CURSOR_KEY)
+
+def freeze_mature_rumors(batch_size=None, max_batches=None, dispatch=True):
+    """
+    Walks due rumors in keyset batches and settles them: in parallel on the
+    workers (one settle_rumors_task per SETTLE_CHUNK_SIZE rumors) or inline
+    with dispatch=False.
+    Stops after max_batches and records the cursor, so a large backlog drains
+    over consecutive runs in bounded time each; the cursor resets once the
+    end is reached. Settlement is idempotent, so re-running after a crash (or
+    re-visiting a rumor whose task was lost) is safe.
+    Returns (rumors handed to settlement, whether the backlog was exhausted).
+    """
+    batch_size = batch_size or settings.FREEZE_SWEEP_BATCH_SIZE
+    max_batches = max_batches or settings.FREEZE_SWEEP_MAX_BATCHES
+    rumors = due_rumors()
+    cursor = get_freeze_cursor()
+
+    handled = 0
+    for _ in range(max_batches):
+        batch = rumors
+        if cursor is not None:
+            created_at, rumor_id = cursor
+            batch = batch.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, rumor_id__gt=rumor_id))
+        rows = list(batch.values_list('rumor_id', 'created_at')[:batch_size])
+        if not rows:
+            reset_freeze_cursor()
+            return handled, True
+
+        rumor_ids = [str(rumor_id) for rumor_id, _ in rows]
+        if dispatch:
+            group(
+                settle_rumors_task.s(rumor_ids[i:i + SETTLE_CHUNK_SIZE])
+                for i in range(0, len(rumor_ids), SETTLE_CHUNK_SIZE)
+            ).apply_async()
+        else:
+            settle_rumors(rumor_ids)
+            materialize_balances()
+        handled += len(rows)
+
+        cursor = (rows[-1][1], rows[-1][0])
+        cache.set(FREEZE_CURSOR_KEY, (cursor[0].isoformat(), str(cursor[1])), timeout=None)
+
+    return handled, False
+
+@shared_task
+def freeze_mature_rumors_task():
+    """
+    Periodic (beat) sweep that freezes and settles rumors at the PRD's 60-day mark.
+    """
+    if not cache.add(FREEZE_RUNNING_KEY, 1, timeout=FREEZE_LEASE_SECONDS):
+        return 'Sweep already running'
+    try:
+        handled, exhausted = freeze_mature_rumors()
+    finally:
+        cache.delete(FREEZE_RUNNING_KEY)
+    return f"Dispatched {handled} rumors for settlement{'' if exhausted else ' (more due, resuming next run)'}"
@@ -1,3 +1,1244 @@
-from django.test import TestCase
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+from uuid import UUID
+import numpy as np
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+from audit.ledger import materialize_balances
+from audit.models import ReputationEvent
+from .management.commands import recompute_trust
+from .models import MomentumBucket, Rumor, Vote, Proof, ProofVote
+from . import momentum, scoring, services, tasks, weights
+from .dedup import build_index, dedup_index
+from .ranking import trending_score, controversy_score, decayed_activity
+from .replay import FormulaParams, replay
+from .services import MAX_VOTE_CHANGES, apply_vote_delta, calculate_trust_score, cast_vote, settle_rumor, settle_rumors, update_proof_trust_score
+from .serializers import RumorSerializer, ProofSerializer
+from .views import RumorViewSet, ProofViewSet, VoteBatchView
 
-# Create your tests here.
+User = get_user_model()
+
+VOTE_VALUES = {'VERIFY': Decimal('1.0'), 'UNCERTAIN': Decimal('0.5'), 'DISPUTE': Decimal('0.0')}
+
+class SettleRumorTests(TestCase):
+    def make_user(self, name, score='50.00'):
+        return User.objects.create(username=name, profile_trust_score=Decimal(score))
+
+    def make_rumor(self, author, trust_score, votes):
+        rumor = Rumor.objects.create(author=author, content='Library closes early this week', trust_score=Decimal(trust_score))
+        for voter, vote_type in votes:
+            Vote.objects.create(
+                rumor=rumor, voter=voter, vote_type=vote_type, vote_value=VOTE_VALUES[vote_type],
+                weight_snapshot=Decimal('0.7071'), voter_reputation_snapshot=voter.profile_trust_score
+            )
+        return rumor
+
+    def scores(self, *users):
+        return [User.objects.get(pk=user.pk).profile_trust_score for user in users]
+
+    def events(self):
+        return sorted(ReputationEvent.objects.values_list('user__username', 'event_type', 'delta'))
+
+    def test_graded_adjustments_for_verified_rumor(self):
+        author = self.make_user('author', '90.00')
+        verifier = self.make_user('verifier')
+        unsure = self.make_user('unsure')
+        disputer = self.make_user('disputer', '3.00')
+        helpful = self.make_user('helpful')
+        misleading = self.make_user('misleading')
+        rumor = self.make_rumor(author, '0.85', [(verifier, 'VERIFY'), (unsure, 'UNCERTAIN'), (disputer, 'DISPUTE')])
+        Proof.objects.create(rumor=rumor, poster=helpful, proof_type='text', trust_score=Decimal('0.90'), is_mature=True)
+        Proof.objects.create(rumor=rumor, poster=misleading, proof_type='text', trust_score=Decimal('0.10'), is_mature=True)
+        Proof.objects.create(rumor=rumor, poster=misleading, proof_type='text', trust_score=Decimal('0.00'), is_mature=False)
+
+        self.assertEqual(settle_rumor(rumor.rumor_id), 'Settled as VERIFIED_TRUE. Reputation distributed.')
+        # Settlement only appends to the ledger
+        self.assertEqual(self.scores(author), [Decimal('90.00')])
+        materialize_balances()
+
+        self.assertEqual(self.events(), [
+            ('author', 'AUTHOR_BONUS', Decimal('15.00')),        # (error 0.15: +3, verified +2) x 3
+            ('disputer', 'INCORRECT_VOTE', Decimal('-6.00')),    # error 0.85: -4, verified -2
+            ('helpful', 'HELPFUL_PROOF', Decimal('5.00')),       # error 0.05
+            ('misleading', 'MISLEADING_PROOF', Decimal('-4.00')),  # error 0.75
+            ('unsure', 'CORRECT_VOTE', Decimal('1.00')),         # error 0.35: +1, no bonus
+            ('verifier', 'CORRECT_VOTE', Decimal('5.00')),
+        ])
+        self.assertEqual(
+            self.scores(author, verifier, unsure, disputer),
+            [Decimal('100.00'), Decimal('55.00'), Decimal('51.00'), Decimal('0.00')]
+        )
+        rumor.refresh_from_db()
+        self.assertTrue(rumor.is_frozen)
+        self.assertEqual(rumor.classification, 'VERIFIED_TRUE')
+        self.assertIsNotNone(rumor.frozen_at)
+
+    def test_band_edges_are_exact(self):
+        voter = self.make_user('voter')
+        rumor = self.make_rumor(None, '0.90', [(voter, 'VERIFY')])
+
+        settle_rumor(rumor.rumor_id)
+
+        # Error is exactly 0.10: the +3 band, not +5 (plus the verified bonus)
+        self.assertEqual(self.events(), [('voter', 'CORRECT_VOTE', Decimal('5.00'))])
+
+    def test_uncertain_rumor_and_frozen_rumors(self):
+        author = self.make_user('author')
+        verifier = self.make_user('verifier')
+        unsure = self.make_user('unsure')
+        rumor = self.make_rumor(author, '0.50', [(verifier, 'VERIFY'), (unsure, 'UNCERTAIN')])
+
+        self.assertEqual(settle_rumor(rumor.rumor_id), 'Settled as UNCERTAIN. Reputation distributed.')
+        self.assertEqual(settle_rumor(rumor.rumor_id), 'Already frozen')
+
+        # Neutral band (error 0.50) writes nothing; the author's VERIFY stance is neutral too
+        self.assertEqual(self.events(), [('unsure', 'CORRECT_VOTE', Decimal('5.00'))])
+
+    def test_batch_query_count_is_independent_of_size(self):
+        for rumors, voters in ((1, 3), (5, 18)):
+            batch = []
+            for r in range(rumors):
+                users = [self.make_user(f'voter{rumors}_{r}_{i}') for i in range(voters)]
+                batch.append(self.make_rumor(self.make_user(f'author{rumors}_{r}'), '0.90', [
+                    (user, ['VERIFY', 'DISPUTE', 'UNCERTAIN'][i % 3]) for i, user in enumerate(users)
+                ]).rumor_id)
+            # savepoint, claim, freeze, votes, proofs, event insert, release
+            with self.assertNumQueries(7):
+                self.assertEqual(len(settle_rumors(batch)), rumors)
+
+class VoteAggregateBackfillTests(TestCase):
+    def test_migration_fills_aggregates_from_existing_votes(self):
+        rumor = Rumor.objects.create(content='Votes cast before the aggregate columns existed')
+        empty = Rumor.objects.create(content='Nobody voted on this one')
+        for i, (vote_type, weight) in enumerate((('VERIFY', '0.7071'), ('VERIFY', '0.5000'), ('DISPUTE', '1.0000'), ('UNCERTAIN', '0.2500'))):
+            Vote.objects.create(
+                rumor=rumor, voter=User.objects.create(username=f'early{i}'), vote_type=vote_type,
+                vote_value=VOTE_VALUES[vote_type], weight_snapshot=Decimal(weight), voter_reputation_snapshot=Decimal('50.00')
+            )
+        Rumor.objects.update(verify_count=0, uncertain_count=0, dispute_count=0, vote_weighted_sum=0, vote_total_weight=0)
+
+        import_module('rumors.migrations.0003_vote_aggregates').aggregate_votes(django_apps, None)
+
+        rumor.refresh_from_db()
+        self.assertEqual((rumor.verify_count, rumor.uncertain_count, rumor.dispute_count), (2, 1, 1))
+        self.assertEqual(rumor.vote_weighted_sum, Decimal('1.33210'))   # 0.7071 + 0.5 + 0.5 x 0.25
+        self.assertEqual(rumor.vote_total_weight, Decimal('2.4571'))
+        empty.refresh_from_db()
+        self.assertEqual((empty.verify_count, empty.vote_total_weight), (0, Decimal('0')))
+
+class VoteWeightCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        weights._local.clear()
+        self.user = User.objects.create(username='weighted', profile_trust_score=Decimal('49.00'), is_probationary=False)
+
+    def stats_delta(self, before):
+        after = weights.get_weight_cache_stats()
+        return {name: after[name] - before[name] for name in after}
+
+    def test_lookups_go_local_then_shared_then_database(self):
+        before = weights.get_weight_cache_stats()
+        with self.assertNumQueries(1):
+            self.assertEqual(weights.get_vote_weight(self.user.pk), (Decimal('0.7000'), Decimal('49.00')))
+        with self.assertNumQueries(0):
+            weights.get_vote_weight(self.user.pk)
+        # Another process: empty LRU, warm shared cache
+        weights._local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(weights.get_vote_weight(self.user.pk), (Decimal('0.7000'), Decimal('49.00')))
+        self.assertEqual(self.stats_delta(before), {'local_hits': 1, 'shared_hits': 1, 'misses': 1, 'invalidations': 0})
+
+    @override_settings(VOTE_WEIGHT_CACHE_SIZE=2)
+    def test_local_cache_evicts_least_recently_used(self):
+        others = [User.objects.create(username=f'other{i}', is_probationary=False) for i in range(2)]
+        weights.get_vote_weight(self.user.pk)
+        weights.get_vote_weight(others[0].pk)
+        weights.get_vote_weight(self.user.pk)
+        weights.get_vote_weight(others[1].pk)
+
+        self.assertIsNotNone(weights._local.get(str(self.user.pk)))
+        self.assertIsNone(weights._local.get(str(others[0].pk)))
+
+    def test_reputation_changes_invalidate(self):
+        weights.get_vote_weight(self.user.pk)
+        self.user.profile_trust_score = Decimal('64.00')
+        self.user.save()
+        self.assertEqual(weights.get_vote_weight(self.user.pk)[0], Decimal('0.8000'))
+
+        # Saves that can't move the weight keep the entry
+        self.user.save(update_fields=['flagged_as_suspicious'])
+        with self.assertNumQueries(0):
+            weights.get_vote_weight(self.user.pk)
+
+        # Materialized ledger balances invalidate after commit
+        ReputationEvent.objects.create(user=self.user, event_type='CORRECT_VOTE', delta=Decimal('17.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            materialize_balances()
+        self.assertEqual(weights.get_vote_weight(self.user.pk), (Decimal('0.9000'), Decimal('81.00')))
+
+    def test_shared_cache_outage_falls_through_to_the_user_row(self):
+        outage = ConnectionError('cache unreachable')
+        with mock.patch.object(weights.cache, 'get', side_effect=outage), \
+                mock.patch.object(weights.cache, 'set', side_effect=outage), \
+                mock.patch.object(weights.cache, 'delete_many', side_effect=outage), \
+                self.assertLogs('rumors.weights', 'ERROR'):
+            self.assertEqual(weights.get_vote_weight(self.user.pk), (Decimal('0.7000'), Decimal('49.00')))
+            rumor = Rumor.objects.create(content='Voting while the cache is down')
+            weights._local.clear()
+            self.assertEqual(cast_vote(rumor.rumor_id, self.user.pk, 'VERIFY'), 'recorded')
+
+    def test_probation_halves_weight_until_it_ends(self):
+        User.objects.filter(pk=self.user.pk).update(
+            is_probationary=True, probation_ends_at=timezone.now() + timedelta(seconds=10)
+        )
+        self.assertEqual(weights.get_vote_weight(self.user.pk)[0], Decimal('0.3500'))
+        # The shared entry expires with probation, not after VOTE_WEIGHT_CACHE_SECONDS
+        self.assertLessEqual(cache.get(weights.WEIGHT_KEY.format(self.user.pk))[2], 10)
+
+        weights.invalidate_vote_weights([self.user.pk])
+        User.objects.filter(pk=self.user.pk).update(probation_ends_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(weights.get_vote_weight(self.user.pk)[0], Decimal('0.7000'))
+
+    def test_cache_outage_does_not_fail_user_saves(self):
+        weights.get_vote_weight(self.user.pk)
+        with mock.patch.object(weights.cache, 'delete_many', side_effect=ConnectionError('cache down')):
+            with self.assertLogs('rumors.weights', 'ERROR'):
+                self.user.profile_trust_score = Decimal('64.00')
+                self.user.save()
+        # The local entry is gone even though the shared one couldn't be dropped
+        self.assertIsNone(weights._local.get(str(self.user.pk)))
+
+class RecomputeCoalescingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rumor = Rumor.objects.create(content='Shuttle timetable changes next week')
+        self.rumor_id = str(self.rumor.rumor_id)
+        # Capture enqueues instead of running them, to see what the coalescing layer sends
+        patcher = mock.patch.object(tasks.update_trust_score_task, 'apply_async')
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def metrics(self):
+        return tasks.get_recompute_metrics('trust')
+
+    def test_requests_in_a_window_collapse_into_one_run(self):
+        for _ in range(5):
+            tasks.schedule_trust_recompute(self.rumor_id)
+        self.enqueue.assert_called_once_with((self.rumor_id,), countdown=settings.TRUST_RECOMPUTE_WINDOW_SECONDS)
+
+        with mock.patch.object(tasks, 'calculate_trust_score') as recompute:
+            tasks.update_trust_score_task(self.rumor_id)
+        recompute.assert_called_once_with(self.rumor_id)
+        self.assertEqual(self.metrics(), {'scheduled': 1, 'collapsed': 4, 'executed': 1, 'deferred': 0})
+
+        # The run cleared the window: the next request enqueues again
+        self.assertTrue(tasks.schedule_trust_recompute(self.rumor_id))
+        self.assertEqual(self.enqueue.call_count, 2)
+
+    def test_requests_during_a_run_get_one_follow_up(self):
+        tasks.schedule_trust_recompute(self.rumor_id)
+
+        def recompute(rumor_id):
+            # Votes landing while the recompute reads the rumor
+            tasks.schedule_trust_recompute(rumor_id)
+            tasks.schedule_trust_recompute(rumor_id)
+        with mock.patch.object(tasks, 'calculate_trust_score', side_effect=recompute):
+            tasks.update_trust_score_task(self.rumor_id)
+
+        self.assertEqual(self.enqueue.call_count, 2)
+        self.assertEqual(self.metrics()['collapsed'], 1)
+
+    def test_held_lease_defers_instead_of_running_concurrently(self):
+        cache.add(tasks.RUNNING_KEY.format('trust', self.rumor_id), 1)
+        with mock.patch.object(tasks, 'calculate_trust_score') as recompute:
+            tasks.update_trust_score_task(self.rumor_id)
+        recompute.assert_not_called()
+        self.enqueue.assert_called_once_with((self.rumor_id,), countdown=settings.TRUST_RECOMPUTE_WINDOW_SECONDS)
+        self.assertEqual(self.metrics()['deferred'], 1)
+
+    def test_lease_and_pending_flag_expire_after_a_worker_crash(self):
+        # A worker took the lease and died, and its queued task was lost, long enough ago
+        crashed_at = time.time() - settings.TRUST_RECOMPUTE_WINDOW_SECONDS - settings.TRUST_RECOMPUTE_LEASE_SECONDS - 1
+        with mock.patch('time.time', return_value=crashed_at):
+            tasks.schedule_trust_recompute(self.rumor_id)
+            cache.add(tasks.RUNNING_KEY.format('trust', self.rumor_id), 1, timeout=settings.TRUST_RECOMPUTE_LEASE_SECONDS)
+
+        self.assertTrue(tasks.schedule_trust_recompute(self.rumor_id))
+        with mock.patch.object(tasks, 'calculate_trust_score') as recompute:
+            tasks.update_trust_score_task(self.rumor_id)
+        recompute.assert_called_once_with(self.rumor_id)
+
+class MomentumRingTests(TestCase):
+    """
+    The bucket ring against FR-5.3 computed straight from the votes' current
+    types and voted_at, over simulated time spanning many ring rotations.
+    """
+    def reference(self, votes, now):
+        current = momentum.window_index(now)
+        windows = range(current - momentum.MOMENTUM_WINDOWS + 1, current + 1)
+        verify = [sum(1 for at, vote_type in votes if momentum.window_index(at) == idx and vote_type == 'VERIFY') for idx in windows]
+        total = [sum(1 for at, _ in votes if momentum.window_index(at) == idx) for idx in windows]
+        return scoring.momentum_score(verify, total, len(votes))
+
+    def test_ring_matches_reference_from_raw_votes(self):
+        rumor = Rumor.objects.create(content='Bus route 4 is being discontinued')
+        rng = random.Random(7)
+        now = datetime.fromtimestamp(480000 * momentum.WINDOW_SECONDS, tz=dt_timezone.utc)
+        votes = {} # voter -> (voted_at, vote_type)
+        checked = set()
+
+        with mock.patch.object(momentum.timezone, 'now', side_effect=lambda: now):
+            for step in range(200):
+                now += timedelta(minutes=rng.randrange(0, 180))
+                vote_type = rng.choice(list(VOTE_VALUES))
+                if votes and rng.random() < 0.4:
+                    # A change keeps the original voted_at, possibly in a window since rotated out
+                    voter = rng.choice(list(votes))
+                    voted_at, old_type = votes[voter]
+                    momentum.record_vote(rumor.rumor_id, voted_at, old_type, vote_type)
+                    votes[voter] = (voted_at, vote_type)
+                else:
+                    momentum.record_vote(rumor.rumor_id, now, None, vote_type)
+                    votes[step] = (now, vote_type)
+
+                expected = self.reference(list(votes.values()), now)
+                self.assertEqual(momentum.calculate_momentum_score(rumor.rumor_id, len(votes), now), expected, f'step {step}')
+                checked.add(expected)
+                self.assertLessEqual(MomentumBucket.objects.filter(rumor=rumor).count(), momentum.MOMENTUM_WINDOWS)
+
+        # The walk rolled over many windows and left the neutral score
+        self.assertGreater(momentum.window_index(now) - 480000, 4 * momentum.MOMENTUM_WINDOWS)
+        self.assertGreater(len(checked), 3)
+
+class ProofPropagationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rumor = Rumor.objects.create(content='Exam schedule leaked on the notice board')
+        self.proof = Proof.objects.create(rumor=self.rumor, proof_type='text', content='Photo of the board')
+        self.voters = []
+
+    def vote(self, vote_type='SUPPORTS'):
+        voter = User.objects.create(username=f'proofvoter{len(self.voters)}')
+        self.voters.append(voter)
+        return ProofVote.objects.create(
+            proof=self.proof, voter=voter, vote_type=vote_type, vote_value=Decimal('1.0'), weight_snapshot=Decimal('0.7071')
+        )
+
+    def recompute(self):
+        """
+        Runs the proof task; returns whether it asked for a rumor recompute.
+        """
+        with mock.patch.object(tasks, 'schedule_trust_recompute') as schedule:
+            tasks.update_proof_trust_score_task(str(self.proof.proof_id))
+        if schedule.called:
+            schedule.assert_called_once_with(self.rumor.rumor_id)
+        return schedule.called
+
+    def test_rumor_recomputes_only_when_p_inputs_change(self):
+        # Immature proofs don't count toward P, whatever their score does
+        self.vote('REFUTES')
+        self.assertFalse(self.recompute())
+        for _ in range(8):
+            self.vote()
+        self.assertFalse(self.recompute())
+
+        # The 10th vote makes it mature
+        self.vote()
+        self.assertTrue(self.recompute())
+        self.assertFalse(self.recompute())
+
+        # Mature: a vote that moves the score propagates, one that doesn't is skipped
+        first = ProofVote.objects.get(voter=self.voters[0])
+        first.vote_type = 'SUPPORTS'
+        first.save()
+        self.assertTrue(self.recompute())
+        self.vote()
+        self.assertFalse(self.recompute())
+        self.proof.refresh_from_db()
+        self.assertEqual((self.proof.vote_count, self.proof.trust_score), (11, Decimal('1.00')))
+
+        # Dropping back below maturity propagates again
+        ProofVote.objects.filter(voter__in=self.voters[:2]).delete()
+        self.assertTrue(self.recompute())
+
+class ScoringKernelTests(SimpleTestCase):
+    """
+    The batch (numpy) path against the scalar Decimal path, value by value.
+    """
+    def test_batch_matches_scalar_on_random_inputs(self):
+        rng = random.Random(3)
+        n = 400
+        votes, proofs, windows = [], [], []
+        for _ in range(n):
+            k = rng.randint(0, 30)
+            votes.append((
+                [rng.choice(list(VOTE_VALUES.values())) for _ in range(k)],
+                [Decimal(rng.randint(1000, 10000)) / 10000 for _ in range(k)],
+            ))
+            proofs.append([Decimal(rng.randint(0, 100)) / 100 for _ in range(rng.randint(0, 3))])
+            # Empty windows included: they are skipped when measuring deltas
+            windows.append(([rng.randint(0, 4) for _ in range(4)], [rng.choice([0, 4, 6, 9]) for _ in range(4)]))
+        windows = [([min(v, t) for v, t in zip(verify, totals)], totals) for verify, totals in windows]
+
+        V = scoring.batch_vote_scores(
+            np.array([float(sum(v * w for v, w in zip(*vote))) for vote in votes]),
+            np.array([float(sum(vote[1])) for vote in votes]),
+        )
+        P = scoring.batch_proof_scores(np.array([float(sum(p)) for p in proofs]), np.array([len(p) for p in proofs]))
+        M = scoring.batch_quantize(scoring.batch_momentum_scores(
+            np.array([w[0] for w in windows], dtype=np.float64),
+            np.array([w[1] for w in windows], dtype=np.float64),
+            np.array([len(vote[0]) for vote in votes]),
+        ))
+
+        scalar = []
+        for i, ((values, weights), mature, (verify, totals)) in enumerate(zip(votes, proofs, windows)):
+            exact_V = scoring.weighted_average(values, weights, default=scoring.NEUTRAL)
+            exact_P = scoring.proof_score(mature)
+            exact_M = scoring.momentum_score(verify, totals, len(values))
+            self.assertAlmostEqual(V[i], float(exact_V), places=9)
+            self.assertAlmostEqual(P[i], float(exact_P), places=9)
+            self.assertEqual(M[i], exact_M)
+            scalar.append((exact_V, exact_P, exact_M))
+
+        T = scoring.batch_trust_scores(V, P, np.array([float(m) for m in M]))
+        stored = scoring.batch_quantize(T, exact=lambda i: scoring.trust_score(*scalar[i]))
+        expected = [scoring.quantize_score(scoring.trust_score(*args)) for args in scalar]
+        self.assertEqual(stored, expected)
+        self.assertEqual(
+            [scoring.CLASSIFICATIONS[code][1] for code in scoring.batch_classify(np.array([float(t) for t in stored]))],
+            [scoring.classify(t) for t in expected]
+        )
+
+    def test_near_ties_use_the_exact_path(self):
+        # T = 0.5 V + 0.25: every odd hundredth of V lands T on a 0.005 tie
+        V = [Decimal(i) / 100 for i in range(101)]
+        expected = [scoring.quantize_score(scoring.trust_score(v, scoring.NEUTRAL, scoring.NEUTRAL)) for v in V]
+        T = scoring.batch_trust_scores(np.array([float(v) for v in V]), np.full(101, 0.5), np.full(101, 0.5))
+
+        self.assertEqual(int(scoring.near_ties(T).sum()), 50)
+        # Plain float rounding gets some ties wrong (0.375 is 0.37499999999999994)...
+        self.assertNotEqual(scoring.batch_quantize(T), expected)
+        # ...the exact fallback gets them all
+        exact = lambda i: scoring.trust_score(V[i], scoring.NEUTRAL, scoring.NEUTRAL)
+        self.assertEqual(scoring.batch_quantize(T, exact=exact), expected)
+        self.assertEqual(expected[25], Decimal('0.38')) # 0.375, half-even
+
+class RecomputeTrustCommandTests(TestCase):
+    """
+    recompute_trust's vectorized chunks against calculate_trust_score, rumor by rumor.
+    """
+    def setUp(self):
+        rng = random.Random(5)
+        voters = [
+            User.objects.create(username=f'recomputer{i}', profile_trust_score=Decimal(rng.randint(1, 100)))
+            for i in range(12)
+        ]
+        self.rumors = [Rumor.objects.create(content=f'Recomputed rumor {i}') for i in range(9)]
+        for rumor in self.rumors[:6]:
+            for voter in rng.sample(voters, rng.randint(1, 12)):
+                cast_vote(rumor.rumor_id, voter.pk, rng.choice(list(VOTE_VALUES)))
+            # Spread the momentum ring over several windows
+            for age in range(1, momentum.MOMENTUM_WINDOWS):
+                window = momentum.window_index(timezone.now()) - age
+                total = rng.randint(0, 5)
+                MomentumBucket.objects.update_or_create(
+                    rumor=rumor, slot=window % momentum.MOMENTUM_WINDOWS,
+                    defaults={'window_index': window, 'verify_count': rng.randint(0, total), 'total_count': total},
+                )
+        for rumor in self.rumors[2:8]:
+            for _ in range(rng.randint(1, 3)):
+                Proof.objects.create(
+                    rumor=rumor, proof_type='text', is_mature=True, trust_score=Decimal(rng.randint(0, 100)) / 100
+                )
+        # No votes and one mature proof at 0.25: T = 0.25 + 0.075 + 0.1 = 0.425 exactly, a rounding tie
+        self.tie = self.rumors[8]
+        Proof.objects.create(rumor=self.tie, proof_type='text', is_mature=True, trust_score=Decimal('0.25'))
+        self.deleted = Rumor.objects.create(content='Deleted before the recompute', is_deleted=True, trust_score=Decimal('0.99'))
+
+    def scores(self):
+        return {
+            rumor_id: scores
+            for rumor_id, *scores in Rumor.objects.filter(is_deleted=False).values_list('rumor_id', *recompute_trust.SCORE_FIELDS)
+        }
+
+    def test_chunks_match_calculate_trust_score(self):
+        call_command('recompute_trust', '--chunk-size', '4', stdout=StringIO())
+        batch = self.scores()
+
+        Rumor.objects.filter(is_deleted=False).update(**{field: 0 for field in recompute_trust.SCORE_FIELDS})
+        for rumor in self.rumors:
+            calculate_trust_score(rumor.rumor_id)
+        self.assertEqual(self.scores(), batch)
+
+        # The tie went through the exact fallback (float rounding alone gives 0.43)
+        self.assertEqual(batch[self.tie.rumor_id][0], Decimal('0.42'))
+        # Soft-deleted rumors are left alone
+        self.deleted.refresh_from_db()
+        self.assertEqual(self.deleted.trust_score, Decimal('0.99'))
+
+    def test_dry_run_only_reports(self):
+        before = self.scores()
+        out = StringIO()
+        call_command('recompute_trust', '--dry-run', stdout=out)
+        self.assertEqual(self.scores(), before)
+        lines = out.getvalue().splitlines()
+        self.assertIn(f'{self.tie.rumor_id} trust_score=0.00->0.42', [line.split(' vote_score')[0] for line in lines])
+        self.assertEqual(lines[-1], 'Dry run: 9 of 9 rumors would change.')
+
+    def test_resume_continues_after_the_checkpoint(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'checkpoint.json')
+        real = recompute_trust.compute_chunk_scores
+        chunks = []
+
+        def interrupted(rumor_ids, now):
+            if len(chunks) == 1:
+                raise KeyboardInterrupt
+            chunks.append(rumor_ids)
+            return real(rumor_ids, now)
+
+        with mock.patch.object(recompute_trust, 'compute_chunk_scores', side_effect=interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('recompute_trust', '--chunk-size', '4', '--checkpoint', path, stdout=StringIO())
+        with open(path) as f:
+            self.assertEqual(json.load(f), {'last_rumor_id': str(chunks[0][-1]), 'done': 4, 'changed': 4})
+
+        with mock.patch.object(recompute_trust, 'compute_chunk_scores', side_effect=real) as compute:
+            out = StringIO()
+            call_command('recompute_trust', '--chunk-size', '4', '--checkpoint', path, '--resume', stdout=out)
+        recomputed = [rumor_id for call in compute.call_args_list for rumor_id in call.args[0]]
+        self.assertFalse(set(recomputed) & set(chunks[0]))
+        self.assertEqual(len(recomputed), 5)
+        self.assertEqual(out.getvalue().splitlines()[-1], 'Recomputed 9 rumors, 9 changed.')
+        self.assertTrue(all(scores[0] > 0 for scores in self.scores().values()))
+
+class TrustReplayTests(TestCase):
+    """
+    A small vote history replayed with the production formula: at every
+    checkpoint the replay's classification matches calculate_trust_score run
+    on the votes cast up to that point.
+    """
+    def setUp(self):
+        rng = random.Random(11)
+        self.base = timezone.now() - timedelta(days=3)
+        self.rumors = [Rumor.objects.create(content=f'Replayed rumor {i}') for i in range(4)]
+        Rumor.objects.update(created_at=self.base - timedelta(hours=1))
+        self.proofs = [
+            Proof.objects.create(rumor=self.rumors[i], proof_type='text', content=f'Proof {i}') for i in (0, 0, 1)
+        ]
+        voters = [User.objects.create(username=f'replayer{i}') for i in range(30)]
+
+        # (at, kind, target, voter, vote_type, weight); rumor 3 leans hard towards VERIFY late on
+        self.events = []
+        for r, rumor in enumerate(self.rumors):
+            for voter in rng.sample(voters, 12):
+                hours = rng.uniform(0, 36)
+                vote_type = 'VERIFY' if r == 3 and hours > 18 else rng.choice(list(VOTE_VALUES))
+                weight = Decimal(rng.choice(['0.3536', '0.7071', '1.0000']))
+                self.events.append((self.base + timedelta(hours=hours), 'vote', rumor, voter, vote_type, weight))
+        for p, proof in enumerate(self.proofs):
+            for voter in rng.sample(voters, 12 if p < 2 else 6):
+                vote_type = rng.choice(['SUPPORTS', 'SUPPORTS', 'REFUTES'])
+                self.events.append((self.base + timedelta(hours=rng.uniform(0, 30)), 'proof', proof, voter, vote_type, Decimal('0.7071')))
+        self.events.sort(key=lambda event: event[0])
+
+    def cast_until(self, until):
+        while self.events and self.events[0][0] <= until:
+            at, kind, target, voter, vote_type, weight = self.events.pop(0)
+            if kind == 'vote':
+                vote = Vote.objects.create(
+                    rumor=target, voter=voter, vote_type=vote_type, vote_value=VOTE_VALUES[vote_type],
+                    weight_snapshot=weight, voter_reputation_snapshot=Decimal('50.00')
+                )
+            else:
+                vote = ProofVote.objects.create(
+                    proof=target, voter=voter, vote_type=vote_type,
+                    vote_value=scoring.PROOF_VOTE_VALUES[vote_type], weight_snapshot=weight
+                )
+            type(vote).objects.filter(pk=vote.pk).update(voted_at=at)
+
+    def online_scores(self, until):
+        """
+        calculate_trust_score for every rumor as the online path would see it at `until`.
+        """
+        with mock.patch.object(momentum.timezone, 'now', return_value=until):
+            call_command('reconcile_vote_aggregates', '--repair', stdout=StringIO())
+            call_command('backfill_momentum', stdout=StringIO())
+            for proof in self.proofs:
+                update_proof_trust_score(proof.proof_id)
+            return {rumor.rumor_id: calculate_trust_score(rumor.rumor_id) for rumor in self.rumors}
+
+    def test_checkpoints_match_online_recompute(self):
+        labels = [label for _, label in scoring.CLASSIFICATIONS]
+        seen = set()
+        for hours in (12, 24, 36):
+            until = self.base + timedelta(hours=hours)
+            self.cast_until(until)
+            online = self.online_scores(until)
+
+            rumor_ids, _, replays = replay({'production': FormulaParams()}, until)
+            state = replays['production']
+            T = state.evaluate(until.timestamp())[3]
+            for i, rumor_id in enumerate(rumor_ids):
+                self.assertAlmostEqual(T[i], float(online[rumor_id]), places=6, msg=f'{hours}h rumor {i}')
+                stored = Rumor.objects.get(pk=rumor_id).trust_score
+                self.assertEqual(labels[state.last_class[i]], scoring.classify(stored), f'{hours}h rumor {i}')
+                seen.add(labels[state.last_class[i]])
+        self.assertGreater(len(seen), 1)
+
+class FreezeSweepTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        voter = User.objects.create(username='sweep voter')
+        old = timezone.now() - timedelta(days=settings.RUMOR_FREEZE_DAYS + 1)
+        self.due = []
+        for i in range(7):
+            rumor = Rumor.objects.create(content=f'Old rumor {i}', trust_score=Decimal('0.90'))
+            Rumor.objects.filter(pk=rumor.pk).update(created_at=old + timedelta(minutes=i))
+            Vote.objects.create(
+                rumor=rumor, voter=voter, vote_type='VERIFY', vote_value=Decimal('1.0'),
+                weight_snapshot=Decimal('0.7071'), voter_reputation_snapshot=Decimal('50.00')
+            )
+            self.due.append(str(rumor.rumor_id))
+        Rumor.objects.create(content='Fresh rumor')
+
+    def test_batches_are_chunked_and_the_cursor_resumes(self):
+        dispatched = []
+        def group(signatures):
+            # One group per keyset batch, one settle_rumors_task per chunk
+            dispatched.append([signature.args[0] for signature in signatures])
+            return mock.Mock()
+
+        with mock.patch.object(tasks, 'SETTLE_CHUNK_SIZE', 2), mock.patch.object(tasks, 'group', side_effect=group):
+            self.assertEqual(tasks.freeze_mature_rumors(batch_size=3, max_batches=2), (6, False))
+            self.assertEqual(dispatched, [[self.due[0:2], self.due[2:3]], [self.due[3:5], self.due[5:6]]])
+            created_at, rumor_id = tasks.get_freeze_cursor()
+            self.assertEqual(str(rumor_id), self.due[5])
+            self.assertEqual(created_at, Rumor.objects.get(pk=rumor_id).created_at)
+
+            # The next run picks up after the cursor, reaches the end and resets it
+            self.assertEqual(tasks.freeze_mature_rumors(batch_size=3, max_batches=2), (1, True))
+            self.assertEqual(dispatched[-1], [self.due[6:7]])
+        self.assertIsNone(tasks.get_freeze_cursor())
+
+    def test_sweep_is_idempotent(self):
+        tasks.freeze_mature_rumors(batch_size=3, max_batches=1)
+        self.assertEqual(Rumor.objects.filter(is_frozen=True).count(), 3)
+        # The cursor is lost (cache flush): the next sweep starts over
+        tasks.reset_freeze_cursor()
+        self.assertEqual(tasks.freeze_mature_rumors(batch_size=3), (4, True))
+        self.assertEqual(tasks.freeze_mature_rumors(batch_size=3), (0, True))
+
+        self.assertEqual(Rumor.objects.filter(is_frozen=True).count(), 7)
+        # Every rumor paid out exactly once
+        self.assertEqual(
+            sorted(ReputationEvent.objects.values_list('rumor_id', flat=True)),
+            sorted(UUID(rumor_id) for rumor_id in self.due)
+        )
+
+    def test_overlapping_sweeps_are_skipped(self):
+        cache.add(tasks.FREEZE_RUNNING_KEY, 1)
+        self.assertEqual(tasks.freeze_mature_rumors_task(), 'Sweep already running')
+        self.assertFalse(Rumor.objects.filter(is_frozen=True).exists())
+
+class FeedQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(username='reader')
+        self.rumors = []
+        for i in range(25):
+            author = User.objects.create(username=f'author{i}')
+            rumor = Rumor.objects.create(author=author, content=f'Rumor number {i} about campus', verify_count=i, dispute_count=1, proof_count=1)
+            Proof.objects.create(rumor=rumor, poster=author, proof_type='text')
+            self.rumors.append(rumor)
+        for rumor in self.rumors[::2]:
+            Vote.objects.create(
+                rumor=rumor, voter=self.user, vote_type='VERIFY', vote_value=Decimal('1.0'),
+                weight_snapshot=Decimal('0.7071'), voter_reputation_snapshot=Decimal('50.00')
+            )
+            ProofVote.objects.create(
+                proof=rumor.proofs.get(), voter=self.user, vote_type='SUPPORTS', vote_value=Decimal('1.0'),
+                weight_snapshot=Decimal('0.7071')
+            )
+
+    def get(self, view, path, user=None, **kwargs):
+        request = self.factory.get(path)
+        if user:
+            force_authenticate(request, user)
+        response = view(request, **kwargs)
+        response.render()
+        return response
+
+    def test_rumor_feed_query_budget(self):
+        view = RumorViewSet.as_view({'get': 'list'})
+        # page rows (author joined, counts annotated; keyset pagination runs no COUNT)
+        with self.assertNumQueries(1):
+            self.get(view, '/rumors/')
+        # + one batched lookup of the reader's votes
+        with self.assertNumQueries(2):
+            response = self.get(view, '/rumors/', self.user)
+
+        rows = {row['rumor_id']: row for row in response.data['results']}
+        newest = self.rumors[-1]
+        row = rows[str(newest.rumor_id)]
+        self.assertEqual((row['vote_count'], row['proof_count'], row['author_username']), (25, 1, 'author24'))
+        self.assertEqual(row['user_vote'], 'VERIFY')
+        self.assertIsNone(rows[str(self.rumors[-2].rumor_id)]['user_vote'])
+
+    def test_anonymous_feed_reads_only_the_rumor_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(RumorViewSet.as_view({'get': 'list'}), '/rumors/')
+        sql = queries[0]['sql']
+        self.assertNotIn('rumors_vote', sql)
+        self.assertNotIn('rumors_proof', sql)
+        row = response.data['results'][0]
+        self.assertEqual((row['verify_count'], row['dispute_count'], row['proof_count']), (24, 1, 1))
+
+    def test_proof_list_query_budget(self):
+        view = ProofViewSet.as_view({'get': 'list'})
+        with self.assertNumQueries(2):
+            response = self.get(view, '/proofs/', self.user)
+        voted = {str(proof_id) for proof_id in ProofVote.objects.values_list('proof_id', flat=True)}
+        self.assertEqual(len(response.data['results']), 20)
+        for row in response.data['results']:
+            self.assertEqual(row['user_vote'], 'SUPPORTS' if row['proof_id'] in voted else None)
+
+    def test_keyset_pages_cover_the_feed_in_order(self):
+        view = RumorViewSet.as_view({'get': 'list'})
+        path, seen = '/rumors/?page_size=7', []
+        while path:
+            # Every page, however deep, is one query for the rows
+            with self.assertNumQueries(1):
+                response = self.get(view, path)
+            seen += [row['rumor_id'] for row in response.data['results']]
+            path = response.data['next']
+        self.assertEqual(seen, [str(rumor.rumor_id) for rumor in reversed(self.rumors)])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.get(RumorViewSet.as_view({'get': 'list'}), '/rumors/?cursor=bm9wZQ==')
+        self.assertEqual(response.status_code, 404)
+
+class FeedRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.now = timezone.now()
+        author = User.objects.create(username='author')
+        self.rumors = [
+            Rumor.objects.create(author=author, content=f'Ranked rumor number {i}') for i in range(4)
+        ]
+
+    def list(self, query):
+        request = self.factory.get(f'/rumors/{query}')
+        response = RumorViewSet.as_view({'get': 'list'})(request)
+        response.render()
+        return response
+
+    def ids(self, query):
+        return [row['rumor_id'] for row in self.list(query).data['results']]
+
+    def vote(self, rumor, hours_ago):
+        apply_vote_delta(
+            rumor.rumor_id, None, ('VERIFY', Decimal('1.0'), Decimal('1.0000')),
+            voted_at=self.now - timedelta(hours=hours_ago),
+        )
+
+    def test_trending_score_accumulates_decayed_votes(self):
+        old, fresh, _, _ = self.rumors
+        for hours_ago in (48, 47, 46):
+            self.vote(old, hours_ago)
+        self.vote(fresh, 1)
+
+        old.refresh_from_db()
+        self.assertAlmostEqual(old.trending_score, trending_score(
+            [self.now - timedelta(hours=h) for h in (48, 47, 46)]
+        ), places=6)
+        # One vote an hour ago outweighs three from two days ago; a vote now counts 1
+        self.assertAlmostEqual(decayed_activity(trending_score([self.now]), self.now), 1.0, places=6)
+        self.assertEqual(self.ids('?sort=trending'), [str(fresh.rumor_id), str(old.rumor_id)])
+
+    def test_sort_modes_and_filters(self):
+        even, lopsided, frozen, deleted = self.rumors
+        Rumor.objects.filter(pk=even.pk).update(controversy_score=controversy_score(5, 5))
+        Rumor.objects.filter(pk=lopsided.pk).update(controversy_score=controversy_score(9, 1))
+        Rumor.objects.filter(pk=frozen.pk).update(
+            is_frozen=True, trust_score=Decimal('0.80'), classification='VERIFIED_TRUE'
+        )
+        Rumor.objects.filter(pk=deleted.pk).update(is_deleted=True, controversy_score=10)
+
+        self.assertEqual(self.ids('?sort=controversial')[:2], [str(even.rumor_id), str(lopsided.rumor_id)])
+        self.assertNotIn(str(deleted.rumor_id), self.ids('?sort=new'))
+        self.assertEqual(self.ids('?sort=trusted'), [str(frozen.rumor_id)])
+        self.assertEqual(self.ids('?status=frozen&classification=VERIFIED_TRUE'), [str(frozen.rumor_id)])
+        self.assertEqual(len(self.ids('?status=active')), 2)
+        for query in ('?sort=hot', '?status=gone', '?classification=MAYBE'):
+            self.assertEqual(self.list(query).status_code, 400)
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.voter = User.objects.create(username='voter')
+        self.rumor = Rumor.objects.create(content='Dining hall menu changes on Monday')
+
+    def get(self, path, user=None, **headers):
+        request = self.factory.get(path, **headers)
+        if user:
+            force_authenticate(request, user)
+        action = 'retrieve' if str(self.rumor.rumor_id) in path else 'list'
+        kwargs = {'pk': str(self.rumor.rumor_id)} if action == 'retrieve' else {}
+        response = RumorViewSet.as_view({'get': action})(request, **kwargs)
+        response.render()
+        return response
+
+    def test_anonymous_reads_are_cached_until_a_vote(self):
+        detail = f'/rumors/{self.rumor.rumor_id}/'
+        for path in ('/rumors/', detail):
+            first = self.get(path)
+            with self.assertNumQueries(0):
+                again = self.get(path)
+            self.assertEqual(again.data, first.data)
+            self.assertEqual(again['ETag'], first['ETag'])
+            with self.assertNumQueries(0):
+                self.assertEqual(self.get(path, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        etag = self.get(detail)['ETag']
+        request = self.factory.post(f'/rumors/{self.rumor.rumor_id}/vote/', {'vote_type': 'VERIFY', 'vote_value': '1.0'})
+        force_authenticate(request, self.voter)
+        with self.captureOnCommitCallbacks(execute=True):
+            RumorViewSet.as_view({'post': 'vote'})(request, pk=str(self.rumor.rumor_id))
+
+        response = self.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['vote_count'], 1)
+        self.assertEqual(self.get('/rumors/').data['results'][0]['vote_count'], 1)
+
+    def test_authenticated_reads_bypass_the_cache(self):
+        self.get('/rumors/')
+        response = self.get('/rumors/', self.voter)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_cache_outage_serves_uncached_and_keeps_votes_working(self):
+        down = mock.Mock(**{f'{name}.side_effect': ConnectionError('cache unreachable') for name in ('get', 'set', 'add', 'incr')})
+        with mock.patch('rumors.response_cache.cache', down), self.assertLogs('rumors.response_cache', 'ERROR'):
+            response = self.get(f'/rumors/{self.rumor.rumor_id}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('ETag'))
+
+            request = self.factory.post(f'/rumors/{self.rumor.rumor_id}/vote/', {'vote_type': 'VERIFY'})
+            force_authenticate(request, self.voter)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = RumorViewSet.as_view({'post': 'vote'})(request, pk=str(self.rumor.rumor_id))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.get('/rumors/').data['results'][0]['vote_count'], 1)
+
+    def test_bulk_commands_invalidate_cached_responses(self):
+        detail = f'/rumors/{self.rumor.rumor_id}/'
+        commands = [
+            ('recompute_trust',),
+            ('backfill_rankings',),
+            ('reconcile_vote_aggregates', '--repair'),
+        ]
+        for command in commands:
+            with self.subTest(command=command[0]):
+                # Leave something for the command to rewrite
+                Rumor.objects.filter(pk=self.rumor.pk).update(trust_score=Decimal('0.99'), verify_count=3)
+                etags = [self.get(path)['ETag'] for path in ('/rumors/', detail)]
+                with self.captureOnCommitCallbacks(execute=True):
+                    call_command(*command, stdout=StringIO())
+                self.assertNotEqual(self.get('/rumors/')['ETag'], etags[0])
+                self.assertNotEqual(self.get(detail)['ETag'], etags[1])
+
+class ProofCounterTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.poster = User.objects.create(username='poster')
+        self.rumor = Rumor.objects.create(content='Parking lot B closes for repairs')
+
+    def counters(self):
+        self.rumor.refresh_from_db()
+        return self.rumor.proof_count, self.rumor.mature_proof_count
+
+    def test_counters_follow_proof_lifecycle(self):
+        request = self.factory.post('/proofs/', {'rumor': str(self.rumor.rumor_id), 'proof_type': 'text', 'content': 'Saw the sign'})
+        force_authenticate(request, self.poster)
+        response = ProofViewSet.as_view({'post': 'create'})(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(), (1, 0))
+        proof = Proof.objects.get()
+        self.assertEqual(proof.poster, self.poster)
+
+        for i in range(10):
+            ProofVote.objects.create(
+                proof=proof, voter=User.objects.create(username=f'voter{i}'), vote_type='SUPPORTS',
+                vote_value=Decimal('1.0'), weight_snapshot=Decimal('0.7071')
+            )
+        update_proof_trust_score(proof.proof_id)
+        update_proof_trust_score(proof.proof_id)
+        self.assertEqual(self.counters(), (1, 1))
+
+        request = self.factory.delete(f'/proofs/{proof.proof_id}/')
+        force_authenticate(request, self.poster)
+        ProofViewSet.as_view({'delete': 'destroy'})(request, pk=str(proof.proof_id))
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_reconcile_repairs_drifted_counters(self):
+        Proof.objects.create(rumor=self.rumor, poster=self.poster, proof_type='text', is_mature=True)
+        Rumor.objects.filter(pk=self.rumor.pk).update(verify_count=3)
+        call_command('reconcile_vote_aggregates', '--repair', stdout=StringIO())
+        self.rumor.refresh_from_db()
+        self.assertEqual(
+            (self.rumor.verify_count, self.rumor.proof_count, self.rumor.mature_proof_count), (0, 1, 1)
+        )
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.poster = User.objects.create(username='poster')
+        self.library = Rumor.objects.create(content='The library will stay open all night during finals')
+        self.gym = Rumor.objects.create(content='Gym closing early; library hours unchanged')
+        Rumor.objects.create(content='Cafeteria serves free pizza on Friday')
+        self.proof = Proof.objects.create(rumor=self.gym, poster=self.poster, proof_type='text', content='Photo of the gym notice')
+
+    def search(self, viewset, query):
+        request = self.factory.get(f'/search/{query}')
+        response = viewset.as_view({'get': 'search'})(request)
+        response.render()
+        return response
+
+    def ids(self, viewset, query):
+        key = 'rumor_id' if viewset is RumorViewSet else 'proof_id'
+        return [row[key] for row in self.search(viewset, query).data['results']]
+
+    def test_ranked_matches_and_prefixes(self):
+        self.assertEqual(
+            set(self.ids(RumorViewSet, '?q=library')), {str(self.library.rumor_id), str(self.gym.rumor_id)}
+        )
+        # Stemmed and prefix matches; every word has to match
+        self.assertEqual(self.ids(RumorViewSet, '?q=closes+libr'), [str(self.gym.rumor_id)])
+        self.assertEqual(self.ids(ProofViewSet, '?q=notice'), [str(self.proof.proof_id)])
+        self.assertEqual(self.ids(RumorViewSet, '?q=%22pizza%22+OR'), [])
+        self.assertEqual(self.search(RumorViewSet, '?q=%22%22').status_code, 400)
+
+        response = self.search(RumorViewSet, '?q=library&page_size=1')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn('page=2', response.data['next'])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.library.content = 'The library closes at midnight during finals'
+        self.library.save()
+        self.assertEqual(self.ids(RumorViewSet, '?q=midnight'), [str(self.library.rumor_id)])
+
+        self.library.is_deleted = True
+        self.library.save(update_fields=['is_deleted'])
+        self.assertEqual(self.ids(RumorViewSet, '?q=midnight'), [])
+
+        self.gym.delete()
+        self.assertEqual(self.ids(ProofViewSet, '?q=notice'), [])
+
+class DuplicateRumorTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.author = User.objects.create(username='author')
+        self.original = Rumor.objects.create(content='The main library will stay open 24 hours during finals week')
+        Rumor.objects.create(content='Free pizza at the student union on Friday afternoon')
+        dedup_index.rebuild()
+
+    def submit(self, content):
+        request = self.factory.post('/rumors/', {'content': content})
+        force_authenticate(request, self.author)
+        response = RumorViewSet.as_view({'post': 'create'})(request)
+        response.render()
+        return response
+
+    def test_warns_about_near_duplicates(self):
+        response = self.submit('Main library is staying open 24 hours during finals week!')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['rumor_id'] for row in response.data['possible_duplicates']], [str(self.original.rumor_id)])
+        self.assertNotIn('possible_duplicates', self.submit('Chemistry midterm moved to next Thursday').data)
+
+        # The new rumors are indexed right away
+        response = self.submit('Chemistry midterm got moved to next Thursday')
+        self.assertEqual(len(response.data['possible_duplicates']), 1)
+
+    @override_settings(DUPLICATE_RUMOR_POLICY='block')
+    def test_blocks_duplicates_of_active_rumors_only(self):
+        response = self.submit('The main library will stay open 24 hours during finals week!!')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['duplicates'][0]['rumor_id'], str(self.original.rumor_id))
+
+        Rumor.objects.filter(pk=self.original.pk).update(is_frozen=True)
+        self.assertEqual(self.submit('The main library will stay open 24 hours during finals week!!').status_code, 201)
+        self.assertNotIn(self.original.rumor_id, dedup_index)
+
+    # build_index closes the startup connection, which would end the test transaction
+    @mock.patch('rumors.dedup.connection')
+    def test_index_is_built_at_process_start(self, _connection):
+        dedup_index._synced_at = None
+        build_index()
+        self.assertIn(self.original.rumor_id, dedup_index)
+
+        # The first check only syncs what was created since
+        with mock.patch.object(dedup_index, '_rebuild') as rebuild:
+            self.assertEqual(len(self.submit('Main library is staying open 24 hours during finals week!').data['possible_duplicates']), 1)
+        rebuild.assert_not_called()
+
+    @mock.patch('rumors.dedup.connection')
+    def test_failed_startup_build_is_deferred_to_first_check(self, _connection):
+        # Too old for an incremental sync to pick up
+        Rumor.objects.update(created_at=timezone.now() - timedelta(days=1))
+        dedup_index._synced_at = None
+        with mock.patch.object(dedup_index, '_load', side_effect=OperationalError('no such table')):
+            with self.assertLogs('rumors.dedup', 'ERROR'):
+                build_index()
+
+        response = self.submit('Main library is staying open 24 hours during finals week!')
+        self.assertEqual(len(response.data['possible_duplicates']), 1)
+
+class FastListSerializerTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.reader = User.objects.create(username='reader')
+        author = User.objects.create(username='ünïcode author')
+        for i in range(6):
+            rumor = Rumor.objects.create(
+                author=author if i % 2 else None, content=f'Rumor {i} \u2028 with "quotes" and émojis 🎓',
+                trust_score=Decimal('0.7') if i % 3 else Decimal('0.05'), verify_count=i,
+                classification='LIKELY_TRUE' if i == 2 else None, is_frozen=i == 2,
+                evidence_url='https://example.edu/notice' if i == 4 else None,
+            )
+            proof = Proof.objects.create(rumor=rumor, poster=author if i % 2 else None, proof_type='link', file_url=None)
+            if i % 2:
+                Vote.objects.create(
+                    rumor=rumor, voter=self.reader, vote_type='DISPUTE', vote_value=Decimal('0.0'),
+                    weight_snapshot=Decimal('0.7071'), voter_reputation_snapshot=Decimal('50.00')
+                )
+                ProofVote.objects.create(
+                    proof=proof, voter=self.reader, vote_type='REFUTES', vote_value=Decimal('0.0'),
+                    weight_snapshot=Decimal('0.7071')
+                )
+
+    def assert_same_bytes(self, viewset, serializer_class, queryset, path, user=None):
+        request = self.factory.get(path)
+        if user:
+            force_authenticate(request, user)
+        results = viewset.as_view({'get': 'list'})(request).data['results']
+
+        # The same page through the ModelSerializer
+        pk = queryset.model._meta.pk.name
+        objs = queryset.in_bulk([row[pk] for row in results])
+        context_request = Request(self.factory.get(path))
+        context_request.user = user or AnonymousUser()
+        expected = serializer_class(
+            [objs[UUID(row[pk])] for row in results], many=True, context={'request': context_request}
+        ).data
+        self.assertEqual(len(results), 6)
+        self.assertEqual(JSONRenderer().render(results), JSONRenderer().render(expected))
+
+    def test_output_matches_model_serializers(self):
+        for user in (None, self.reader):
+            self.assert_same_bytes(RumorViewSet, RumorSerializer, Rumor.objects.annotate(
+                vote_count=F('verify_count') + F('uncertain_count') + F('dispute_count')
+            ), '/rumors/', user)
+            self.assert_same_bytes(ProofViewSet, ProofSerializer, Proof.objects.all(), '/proofs/', user)
+
+class VoteBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.voter = User.objects.create(username='moderator')
+        self.fresh, self.changed, self.maxed, self.frozen = [
+            Rumor.objects.create(content=f'Batch voted rumor number {i}', is_frozen=i == 3) for i in range(4)
+        ]
+        for rumor, change_count in ((self.changed, 0), (self.maxed, 3)):
+            Vote.objects.create(
+                rumor=rumor, voter=self.voter, vote_type='VERIFY', vote_value=Decimal('1.0'),
+                weight_snapshot=Decimal('0.5000'), voter_reputation_snapshot=Decimal('25.00'), change_count=change_count
+            )
+            Rumor.objects.filter(pk=rumor.pk).update(verify_count=1, vote_weighted_sum=Decimal('0.5'), vote_total_weight=Decimal('0.5'))
+        self.proof = Proof.objects.create(rumor=self.fresh, proof_type='text', content='Notice on the door')
+
+    def post(self, data):
+        request = self.factory.post('/votes/batch/', data, format='json')
+        force_authenticate(request, self.voter)
+        response = VoteBatchView.as_view()(request)
+        response.render()
+        return response
+
+    def test_batch_upserts_votes_and_reports_each_item(self):
+        missing = '00000000-0000-4000-8000-000000000000'
+        response = self.post({
+            'rumor_votes': [
+                {'rumor_id': str(rumor.rumor_id), 'vote_type': 'DISPUTE'}
+                for rumor in (self.fresh, self.changed, self.maxed, self.frozen)
+            ] + [{'rumor_id': missing, 'vote_type': 'VERIFY'}],
+            'proof_votes': [{'proof_id': str(self.proof.proof_id), 'vote_type': 'SUPPORTS'}],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['status'], row.get('error')) for row in response.data['rumor_votes']],
+            [('recorded', None), ('changed', None), ('rejected', 'Max vote changes reached'),
+             ('rejected', 'Rumor is frozen'), ('rejected', 'Rumor not found')]
+        )
+        self.assertEqual(response.data['proof_votes'][0]['status'], 'recorded')
+
+        changed = Vote.objects.get(rumor=self.changed)
+        self.assertEqual((changed.vote_type, changed.change_count, changed.weight_snapshot), ('DISPUTE', 1, Decimal('0.5000')))
+        self.assertEqual(Vote.objects.get(rumor=self.maxed).vote_type, 'VERIFY')
+        self.assertFalse(Vote.objects.filter(rumor=self.frozen).exists())
+        for rumor in (self.fresh, self.changed):
+            rumor.refresh_from_db()
+            self.assertEqual((rumor.verify_count, rumor.dispute_count), (0, 1))
+        self.fresh.refresh_from_db()
+        self.assertIsNotNone(self.fresh.trending_score)
+
+        # Resubmitting changes the stored votes in place
+        response = self.post({'proof_votes': [{'proof_id': str(self.proof.proof_id), 'vote_type': 'REFUTES'}]})
+        self.assertEqual(response.data['proof_votes'][0]['status'], 'changed')
+        self.assertEqual(ProofVote.objects.get().vote_type, 'REFUTES')
+
+    def test_batch_changes_count_toward_the_limit(self):
+        item = {'rumor_votes': [{'rumor_id': str(self.changed.rumor_id), 'vote_type': 'DISPUTE'}]}
+        cast_vote(self.changed.rumor_id, self.voter.pk, 'UNCERTAIN')
+        for _ in range(MAX_VOTE_CHANGES - 1):
+            self.assertEqual(self.post(item).data['rumor_votes'][0]['status'], 'changed')
+        vote = Vote.objects.get(rumor=self.changed)
+        self.assertEqual((vote.change_count, vote.previous_vote_type), (MAX_VOTE_CHANGES, 'DISPUTE'))
+
+        self.assertEqual(self.post(item).data['rumor_votes'][0]['error'], 'Max vote changes reached')
+        self.assertEqual(cast_vote(self.changed.rumor_id, self.voter.pk, 'VERIFY'), None)
+        self.changed.refresh_from_db()
+        self.assertEqual(
+            (self.changed.verify_count, self.changed.uncertain_count, self.changed.dispute_count), (0, 0, 1)
+        )
+
+    def test_single_votes_on_frozen_rumors_are_rejected_too(self):
+        request = self.factory.post(f'/rumors/{self.frozen.rumor_id}/vote/', {'vote_type': 'VERIFY'})
+        force_authenticate(request, self.voter)
+        response = RumorViewSet.as_view({'post': 'vote'})(request, pk=str(self.frozen.rumor_id))
+        self.assertEqual((response.status_code, response.data), (400, {'error': 'Rumor is frozen'}))
+        self.assertFalse(Vote.objects.filter(rumor=self.frozen).exists())
+        self.frozen.refresh_from_db()
+        self.assertEqual(self.frozen.verify_count, 0)
+
+    def test_single_votes_on_deleted_proofs_are_rejected_too(self):
+        Proof.objects.filter(pk=self.proof.pk).update(is_deleted=True)
+        request = self.factory.post(f'/proofs/{self.proof.proof_id}/vote/', {'vote_type': 'SUPPORTS'})
+        force_authenticate(request, self.voter)
+        response = ProofViewSet.as_view({'post': 'vote'})(request, pk=str(self.proof.proof_id))
+        self.assertEqual((response.status_code, response.data), (400, {'error': 'Proof not found'}))
+        self.assertFalse(ProofVote.objects.exists())
+
+    def test_malformed_batches_are_rejected_whole(self):
+        rumor_id = str(self.fresh.rumor_id)
+        for data in (
+            {},
+            {'rumor_votes': [{'rumor_id': rumor_id, 'vote_type': 'VERIFY'}] * 2},
+            {'rumor_votes': [{'rumor_id': rumor_id, 'vote_type': 'MAYBE'}]},
+        ):
+            self.assertEqual(self.post(data).status_code, 400)
+        self.assertFalse(Vote.objects.filter(rumor=self.fresh).exists())
+
+class ConcurrentVoteTests(TransactionTestCase):
+    """
+    Many threads voting on one rumor at once: every vote lands exactly once,
+    no voter gets past the change limit, and the running aggregates match
+    the stored votes.
+    """
+    VOTERS = 6
+    ATTEMPTS = 6
+
+    def setUp(self):
+        self.rumor = Rumor.objects.create(content='Rumor everyone votes on at once')
+        self.voters = [User.objects.create(username=f'voter{i}') for i in range(self.VOTERS)]
+
+    def retry_locked(self, write):
+        try:
+            for _ in range(200):
+                try:
+                    return write()
+                except OperationalError as e:
+                    # SQLite's shared-cache test database allows one writer at a time and refuses
+                    # the others with "database table is locked" instead of waiting. The write's
+                    # transaction was rolled back whole, so retrying can't apply it twice.
+                    # Any other error (a Postgres deadlock or lock timeout) fails the test.
+                    if connection.vendor != 'sqlite' or 'locked' not in str(e):
+                        raise
+                    time.sleep(0.01)
+            raise AssertionError('database stayed locked')
+        finally:
+            connection.close()
+
+    def vote(self, voter, vote_type):
+        return self.retry_locked(lambda: cast_vote(self.rumor.rumor_id, voter.pk, vote_type))
+
+    def test_concurrent_votes_and_changes(self):
+        types = list(VOTE_VALUES)
+        jobs = [(voter, types[attempt % len(types)]) for attempt in range(self.ATTEMPTS) for voter in self.voters]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda job: (job[0].pk, self.vote(*job)), jobs))
+
+        for voter in self.voters:
+            outcomes = [outcome for voter_id, outcome in results if voter_id == voter.pk]
+            self.assertEqual(outcomes.count('recorded'), 1)
+            self.assertEqual(outcomes.count('changed'), MAX_VOTE_CHANGES)
+            self.assertEqual(outcomes.count(None), self.ATTEMPTS - 1 - MAX_VOTE_CHANGES)
+
+        votes = list(Vote.objects.filter(rumor=self.rumor))
+        self.assertEqual(len(votes), self.VOTERS)
+        self.assertTrue(all(vote.change_count == MAX_VOTE_CHANGES for vote in votes))
+        self.rumor.refresh_from_db()
+        for vote_type, count in (('VERIFY', self.rumor.verify_count), ('UNCERTAIN', self.rumor.uncertain_count), ('DISPUTE', self.rumor.dispute_count)):
+            self.assertEqual(count, sum(vote.vote_type == vote_type for vote in votes))
+        self.assertEqual(self.rumor.vote_total_weight, sum(vote.weight_snapshot for vote in votes))
+        self.assertEqual(self.rumor.vote_weighted_sum, sum(vote.weight_snapshot * vote.vote_value for vote in votes))
+
+    def test_vote_racing_settlement_is_refused_or_settled(self):
+        voter = self.voters[0]
+        upsert = services._upsert
+        pool = ThreadPoolExecutor(max_workers=1)
+        settling = []
+
+        def freeze_then_write(*args, **kwargs):
+            # The sweep freezes the rumor after cast_vote checked it, before the vote is written
+            if not settling:
+                settling.append(pool.submit(self.retry_locked, lambda: settle_rumors([self.rumor.rumor_id])))
+                time.sleep(0.2)
+            return upsert(*args, **kwargs)
+
+        with mock.patch.object(services, '_upsert', side_effect=freeze_then_write):
+            result = self.vote(voter, 'VERIFY')
+        self.assertEqual(len(settling[0].result()), 1)
+        pool.shutdown()
+
+        # Either the vote lost the race and was refused, or settlement waited for it and paid it out.
+        # Without the row lock, Postgres commits the freeze during the sleep and the vote lands unseen;
+        # SQLite's table locks serialize the two either way.
+        voted = Vote.objects.filter(rumor=self.rumor, voter=voter).exists()
+        self.assertEqual(voted, result == 'recorded')
+        self.assertEqual(ReputationEvent.objects.filter(user=voter).exists(), voted)
+        if result != 'recorded':
+            self.assertEqual(result, 'frozen')
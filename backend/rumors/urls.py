@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RumorViewSet, ProofViewSet
+from .views import RumorViewSet, ProofViewSet, VoteBatchView
 
 router = DefaultRouter()
 router.register(r'rumors', RumorViewSet, basename='rumor') # /api/v1/rumors/rumors/ ?? Check backend/urls.py
@@ -9,5 +9,6 @@ router.register(r'rumors', RumorViewSet, basename='rumor') # /api/v1/rumors/rumo
 router.register(r'proofs', ProofViewSet, basename='proof')
 
 urlpatterns = [
+    path('votes/batch/', VoteBatchView.as_view(), name='vote-batch'),
     path('', include(router.urls)),
 ]
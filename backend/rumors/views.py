@@ -1,16 +1,71 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.throttling import ScopedRateThrottle, UserRateThrottle, AnonRateThrottle
+from django.conf import settings
+from django.db import transaction
 from django.db.models import F
 from .models import Rumor, Vote, Proof, ProofVote
-from .serializers import RumorSerializer, VoteSerializer, ProofSerializer, ProofVoteSerializer
-from .tasks import update_trust_score_task, update_proof_trust_score_task
+from .serializers import RumorSerializer, VoteSerializer, ProofSerializer, ProofVoteSerializer, VoteBatchSerializer
+from .tasks import schedule_trust_recompute, schedule_proof_recompute
+from .services import apply_proof_delta, cast_vote, cast_proof_vote, submit_vote_batch
+from .pagination import RumorFeedPagination, ProofListPagination
+from .response_cache import VersionedResponseCacheMixin, bump_rumor_versions
+from .search import search_ids, search_terms
+from .dedup import dedup_index, find_duplicates
+from .fast_serializers import FastListSerializer, FastListMixin
 
-class RumorViewSet(viewsets.ModelViewSet):
-    queryset = Rumor.objects.all().order_by('-created_at')
+# ?sort= -> keyset ordering; each one is served by a partial index on Rumor
+FEED_ORDERINGS = {
+    'new': ('-created_at', '-rumor_id'),
+    'trending': ('-trending_score', '-rumor_id'),
+    'trusted': ('-trust_score', '-rumor_id'),
+    'controversial': ('-controversy_score', '-rumor_id'),
+}
+FEED_STATUSES = {'active': False, 'frozen': True}
+MAX_SEARCH_PAGE_SIZE = 100
+
+def duplicate_rows(duplicates):
+    return [{'rumor_id': str(rumor_id), 'similarity': round(score, 2)} for rumor_id, score in duplicates]
+
+class SearchActionMixin:
+    """
+    GET .../search/?q=words[&page=n][&page_size=n]: ranked full-text matches
+    (see search.py), paged by offset since ranks are computed per query.
+    """
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '')
+        if not search_terms(query):
+            return Response({'error': 'Search query is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = max(1, min(int(request.query_params.get('page_size', api_settings.PAGE_SIZE)), MAX_SEARCH_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'Invalid page'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One extra id tells whether there is a next page
+        ids = search_ids(self.queryset.model, query, offset=(page - 1) * page_size, limit=page_size + 1)
+        has_next = len(ids) > page_size
+        ids = ids[:page_size]
+        objs = self.get_queryset().in_bulk(ids)
+        results = self.get_serializer([objs[pk] for pk in ids if pk in objs], many=True).data
+
+        next_link = None
+        if has_next:
+            next_link = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+        return Response({'next': next_link, 'results': results})
+
+class RumorViewSet(VersionedResponseCacheMixin, FastListMixin, SearchActionMixin, viewsets.ModelViewSet):
+    queryset = Rumor.objects.filter(is_deleted=False).order_by('-created_at')
     serializer_class = RumorSerializer
+    fast_list_serializer = FastListSerializer(RumorSerializer)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = RumorFeedPagination
     
     def get_throttles(self):
         if self.action == 'create':
@@ -21,8 +76,80 @@ class RumorViewSet(viewsets.ModelViewSet):
             return [ScopedRateThrottle()]
         return [UserRateThrottle(), AnonRateThrottle()]
 
+    def get_queryset(self):
+        # Feed rows carry everything the serializer reads: author via the join,
+        # vote and proof counts from the counters on the row (no Vote/Proof access).
+        # user_vote is batched per page by the serializer.
+        queryset = super().get_queryset().select_related('author').annotate(
+            vote_count=F('verify_count') + F('uncertain_count') + F('dispute_count'),
+        )
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+        sort = self.get_feed_sort()
+        if sort == 'trending':
+            # Rumors nobody voted on have no trending score
+            queryset = queryset.filter(trending_score__isnull=False)
+        elif sort == 'trusted':
+            # Trust scores are only final once a rumor is frozen
+            queryset = queryset.filter(is_frozen=True)
+
+        status_param = params.get('status')
+        if status_param:
+            if status_param not in FEED_STATUSES:
+                raise ValidationError({'error': f'Invalid status: {status_param}'})
+            queryset = queryset.filter(is_frozen=FEED_STATUSES[status_param])
+
+        classification = params.get('classification')
+        if classification:
+            if classification not in dict(Rumor._meta.get_field('classification').choices):
+                raise ValidationError({'error': f'Invalid classification: {classification}'})
+            queryset = queryset.filter(classification=classification)
+        return queryset
+
+    def get_feed_sort(self):
+        sort = self.request.query_params.get('sort', 'new')
+        if sort not in FEED_ORDERINGS:
+            raise ValidationError({'error': f'Invalid sort: {sort}'})
+        return sort
+
+    def get_keyset_ordering(self):
+        return FEED_ORDERINGS[self.get_feed_sort()]
+
+    def create(self, request, *args, **kwargs):
+        self.possible_duplicates = []
+        response = super().create(request, *args, **kwargs)
+        if self.possible_duplicates:
+            response.data['possible_duplicates'] = duplicate_rows(self.possible_duplicates)
+        return response
+
     def perform_create(self, serializer):
+        # DUPLICATE_RUMOR_POLICY: 'warn' reports likely duplicates with the new rumor, 'block' rejects it
+        policy = settings.DUPLICATE_RUMOR_POLICY
+        if policy != 'off':
+            duplicates = find_duplicates(serializer.validated_data['content'])
+            if duplicates and policy == 'block':
+                raise ValidationError({
+                    'error': 'This rumor looks like a duplicate of an active rumor',
+                    'duplicates': duplicate_rows(duplicates),
+                })
+            self.possible_duplicates = duplicates
         serializer.save(author=self.request.user)
+        dedup_index.add(serializer.instance.rumor_id, serializer.instance.content)
+        bump_rumor_versions([serializer.instance.rumor_id])
+
+    def perform_update(self, serializer):
+        serializer.save()
+        dedup_index.discard([serializer.instance.rumor_id])
+        dedup_index.add(serializer.instance.rumor_id, serializer.instance.content)
+        bump_rumor_versions([serializer.instance.rumor_id])
+
+    def perform_destroy(self, instance):
+        rumor_id = instance.rumor_id
+        instance.delete()
+        dedup_index.discard([rumor_id])
+        bump_rumor_versions([rumor_id])
 
     @action(detail=True, methods=['post'])
     def vote(self, request, pk=None):
@@ -34,32 +161,28 @@ class RumorViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-        vote_type = serializer.validated_data['vote_type']
-        
-        # Check existing vote
-        existing_vote = Vote.objects.filter(rumor=rumor, voter=user).first()
-        if existing_vote:
-            if existing_vote.change_count >= 3:
-                 return Response({'error': 'Max vote changes reached'}, status=status.HTTP_400_BAD_REQUEST)
-            existing_vote.vote_type = vote_type
-            existing_vote.change_count += 1
-            existing_vote.save()
-        else:
-            Vote.objects.create(rumor=rumor, voter=user, vote_type=vote_type)
+        # One atomic upsert: no check-then-act race between concurrent requests
+        result = cast_vote(rumor.rumor_id, user.pk, serializer.validated_data['vote_type'])
+        if result == 'frozen':
+            return Response({'error': 'Rumor is frozen'}, status=status.HTTP_400_BAD_REQUEST)
+        if result is None:
+            return Response({'error': 'Max vote changes reached'}, status=status.HTTP_400_BAD_REQUEST)
             
-        # Trigger Async Update
-        update_trust_score_task.delay(rumor.rumor_id)
+        # Trigger Async Update (coalesced per rumor)
+        schedule_trust_recompute(rumor.rumor_id)
         
         return Response({'status': 'vote recorded'}, status=status.HTTP_200_OK)
 
-class ProofViewSet(viewsets.ModelViewSet):
+class ProofViewSet(FastListMixin, SearchActionMixin, viewsets.ModelViewSet):
     queryset = Proof.objects.all().order_by('-trust_score')
     serializer_class = ProofSerializer
+    fast_list_serializer = FastListSerializer(ProofSerializer)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = ProofListPagination
     filterset_fields = ['rumor']
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('poster')
         rumor_id = self.request.query_params.get('rumor')
         if rumor_id:
             queryset = queryset.filter(rumor_id=rumor_id)
@@ -75,7 +198,11 @@ class ProofViewSet(viewsets.ModelViewSet):
         return [UserRateThrottle(), AnonRateThrottle()]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            serializer.save(poster=self.request.user)
+            apply_proof_delta(serializer.instance.rumor_id, proofs=1)
+        # The rumor's proof_count changed
+        bump_rumor_versions([serializer.instance.rumor_id])
         # Trigger update (Proof added -> Impact on P score?)
         # Only mature proofs count, but we might want to recalc anyway or wait for votes?
         # Let's trigger it.
@@ -87,6 +214,13 @@ class ProofViewSet(viewsets.ModelViewSet):
              # So no immediate impact on Rumor Score. 
              pass
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            if not instance.is_deleted:
+                apply_proof_delta(instance.rumor_id, proofs=-1, mature=-1 if instance.is_mature else 0)
+        bump_rumor_versions([instance.rumor_id])
+
     @action(detail=True, methods=['post'])
     def vote(self, request, pk=None):
         proof = self.get_object()
@@ -96,16 +230,38 @@ class ProofViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-        vote_type = serializer.validated_data['vote_type']
-        
-        existing_vote = ProofVote.objects.filter(proof=proof, voter=user).first()
-        if existing_vote:
-            existing_vote.vote_type = vote_type
-            existing_vote.save()
-        else:
-            ProofVote.objects.create(proof=proof, voter=user, vote_type=vote_type)
+        # Weight snapshot is locked at first vote
+        if cast_proof_vote(proof.proof_id, user.pk, serializer.validated_data['vote_type']) == 'deleted':
+            return Response({'error': 'Proof not found'}, status=status.HTTP_400_BAD_REQUEST)
             
-        # Trigger Update
-        update_proof_trust_score_task.delay(proof.proof_id)
+        # Trigger Update (coalesced per proof; propagates to the rumor only if P's inputs change)
+        schedule_proof_recompute(proof.proof_id)
         
         return Response({'status': 'vote recorded'}, status=status.HTTP_200_OK)
+
+class VoteBatchView(APIView):
+    """
+    POST {"rumor_votes": [{"rumor_id", "vote_type"}], "proof_votes": [{"proof_id", "vote_type"}]}
+    Records up to MAX_BATCH_VOTES votes in one transaction and returns a
+    status per item ('recorded', 'changed' or 'rejected' with an error).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'voting'
+
+    def post(self, request):
+        serializer = VoteBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rumor_results, proof_results, rumor_ids, proof_ids = submit_vote_batch(
+            request.user, serializer.validated_data['rumor_votes'], serializer.validated_data['proof_votes']
+        )
+
+        # One coalesced recompute per affected rumor / proof
+        for rumor_id in rumor_ids:
+            schedule_trust_recompute(rumor_id)
+        for proof_id in proof_ids:
+            schedule_proof_recompute(proof_id)
+
+        return Response({'rumor_votes': rumor_results, 'proof_votes': proof_results}, status=status.HTTP_200_OK)
@@ -0,0 +1,160 @@
+"""
+Vote weights (PRD FR-6.1/6.2): weight = sqrt(profile_trust_score) / 10,
+halved while the voter is on probation.
+
+get_vote_weight serves a user's current (weight, reputation) from a
+process-local LRU, then the shared cache, and only then the user row.
+Entries are dropped whenever a user's reputation or probation can change:
+on User saves (post_save) and when the reputation ledger materializes new
+balances (audit.ledger.balances_changed). Other processes' LRUs only see an
+invalidation through the shared cache, so their entries are trusted for at
+most VOTE_WEIGHT_LOCAL_TTL_SECONDS. A shared-cache outage never fails a
+vote or the write that triggered an invalidation: it is logged, lookups
+fall through to the user row, and a shared entry that missed its
+invalidation expires on its own.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from audit.ledger import balances_changed
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+WEIGHT_KEY = 'weight:{}'
+WEIGHT_QUANTUM = Decimal('0.0001')
+PROBATION_FACTOR = Decimal('0.5')
+
+def compute_vote_weight(reputation, on_probation):
+    weight = Decimal(reputation).sqrt() / 10
+    if on_probation:
+        weight *= PROBATION_FACTOR
+    return weight.quantize(WEIGHT_QUANTUM)
+
+class _LocalWeights:
+    """
+    Thread-safe LRU of user_id -> (expires_at, weight, reputation).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1], entry[2]
+
+    def put(self, user_id, weight, reputation, ttl):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, weight, reputation)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.VOTE_WEIGHT_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_local = _LocalWeights()
+_stats_lock = threading.Lock()
+_stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}
+
+def _bump(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+def get_weight_cache_stats():
+    """
+    This process's counters:
+    local_hits    - served from the in-process LRU
+    shared_hits   - served from the shared cache
+    misses        - computed from the user row
+    invalidations - entries dropped after a reputation/probation change
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+def get_vote_weight(user_id):
+    """
+    (weight, reputation) for a user's vote right now, as Decimals at the
+    precision of Vote.weight_snapshot / voter_reputation_snapshot.
+    """
+    user_id = str(user_id)
+    cached = _local.get(user_id)
+    if cached is not None:
+        _bump('local_hits')
+        return cached
+
+    try:
+        shared = cache.get(WEIGHT_KEY.format(user_id))
+    except Exception:
+        # A vote must not fail on the cache: read the user row instead
+        logger.exception('Could not read the shared vote weight of user %s', user_id)
+        shared = None
+    if shared is not None:
+        _bump('shared_hits')
+        weight, reputation, ttl = Decimal(shared[0]), Decimal(shared[1]), shared[2]
+        _local.put(user_id, weight, reputation, min(ttl, settings.VOTE_WEIGHT_LOCAL_TTL_SECONDS))
+        return weight, reputation
+
+    _bump('misses')
+    reputation, is_probationary, probation_ends_at = User.objects.filter(pk=user_id).values_list(
+        'profile_trust_score', 'is_probationary', 'probation_ends_at'
+    ).get()
+    now = timezone.now()
+    on_probation = is_probationary and (probation_ends_at is None or probation_ends_at > now)
+    weight = compute_vote_weight(reputation, on_probation)
+
+    # Never cache a probationary weight past the end of probation
+    ttl = settings.VOTE_WEIGHT_CACHE_SECONDS
+    if on_probation and probation_ends_at is not None:
+        ttl = max(1, min(ttl, int((probation_ends_at - now).total_seconds())))
+    try:
+        cache.set(WEIGHT_KEY.format(user_id), (str(weight), str(reputation), ttl), timeout=ttl)
+    except Exception:
+        logger.exception('Could not store the shared vote weight of user %s', user_id)
+    _local.put(user_id, weight, reputation, min(ttl, settings.VOTE_WEIGHT_LOCAL_TTL_SECONDS))
+    return weight, reputation
+
+def invalidate_vote_weights(user_ids):
+    user_ids = [str(user_id) for user_id in user_ids]
+    if not user_ids:
+        return
+    _local.discard(user_ids)
+    _bump('invalidations', len(user_ids))
+    try:
+        cache.delete_many([WEIGHT_KEY.format(user_id) for user_id in user_ids])
+    except Exception:
+        # Runs inside User saves and after ledger commits: those must not fail on the cache
+        logger.exception('Could not invalidate shared vote weights for %d users', len(user_ids))
+
+@receiver(post_save, sender=User)
+def _user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'profile_trust_score', 'is_probationary', 'probation_ends_at'} & set(update_fields):
+        return
+    invalidate_vote_weights([instance.pk])
+
+@receiver(balances_changed)
+def _balances_changed(sender, user_ids, **kwargs):
+    invalidate_vote_weights(user_ids)